@@ -0,0 +1,16 @@
+from typing import Callable, Iterator
+
+import contextlib
+import tracemalloc
+
+
+# Traces allocations in the block and gives a function returning the peak memory
+# allocated so far. Tracing slows code down a lot, so the benchmarks take their
+# times from separate untraced runs and only measure memory in here.
+@contextlib.contextmanager
+def traced_memory() -> Iterator[Callable[[], int]]:
+    tracemalloc.start()
+    try:
+        yield lambda: tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,82 @@
+from typing import Annotated, Callable
+
+import dataclasses
+import io
+import os
+import pathlib
+import tempfile
+import time
+
+import typer
+
+from ttdlgc.dataset import load_events
+from ttdlgc.events import Event
+from ttdlgc.milp import create_milp
+from ttdlgc.rules import Constraint, Goal
+from ttdlgc.sparse_milp import create_sparse_milp
+
+from .memory import traced_memory
+
+app = typer.Typer()
+
+
+# Compares building the model and writing it out as MPS through pulp against the
+# sparse model builder, on the time taken and the peak memory allocated
+@app.command()
+def main(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    scale: Annotated[
+        int,
+        typer.Option(help="Number of copies of the events to build the model from."),
+    ] = 1,
+    repeats: Annotated[
+        int,
+        typer.Option(help="Number of times to run each builder, keeping the best."),
+    ] = 3,
+) -> None:
+    events = replicate(load_events(events_filepath), scale)
+    constraints = [Constraint.LawLv4AtEnd]
+    goal = Goal.MaximizeLaw
+
+    def build_pulp() -> None:
+        problem = create_milp(events, constraints, goal)
+        with tempfile.TemporaryDirectory() as directory:
+            problem.writeMPS(os.path.join(directory, "model.mps"))
+
+    def build_sparse() -> None:
+        model = create_sparse_milp(events, constraints, goal)
+        model.write_mps(io.StringIO())
+
+    print(f"Events: {len(events)}")
+    for name, build in [("pulp", build_pulp), ("sparse", build_sparse)]:
+        seconds, peak = measure(build, repeats)
+        print(f"{name:>8}: {seconds:8.3f} s, {peak / 2**20:8.1f} MiB peak")
+
+
+def replicate(events: list[Event], scale: int) -> list[Event]:
+    return [
+        dataclasses.replace(event, name=f"{event.name} ({copy})")
+        for copy in range(scale)
+        for event in events
+    ]
+
+
+def measure(build: Callable[[], None], repeats: int) -> tuple[float, int]:
+    best_seconds = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        build()
+        best_seconds = min(best_seconds, time.perf_counter() - start)
+
+    with traced_memory() as peak_bytes:
+        build()
+        peak = peak_bytes()
+
+    return best_seconds, peak
+
+
+if __name__ == "__main__":
+    app()
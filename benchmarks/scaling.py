@@ -0,0 +1,243 @@
+from typing import Annotated, Any, Optional
+
+import dataclasses
+import io
+import json
+import pathlib
+import platform
+import subprocess
+
+import pulp
+import typer
+
+from ttdlgc.events import Event
+from ttdlgc.milp import create_milp, extract_solution, ModelSize
+from ttdlgc.profiling import Profiler
+from ttdlgc.rules import Constraint, Goal, LAST_CHAPTER
+from ttdlgc.simulation import Simulation
+from ttdlgc.solver_settings import SolverSettings
+from ttdlgc.solvers import solve_problem
+
+from .memory import traced_memory
+from .synthetic import generate_events, SyntheticConfig, write_events_csv
+
+app = typer.Typer()
+
+# Bumped whenever the layout of the results file changes
+RESULTS_VERSION = 1
+
+PHASES = ["parse", "build", "solve", "extract", "simulate"]
+
+
+# Times each phase of solving synthetic event lists of increasing sizes, from parsing
+# the CSV file to simulating the solution, and writes the results as JSON so that
+# runs on different commits can be compared
+@app.command()
+def run(
+    sizes: Annotated[
+        str,
+        typer.Option(help="Comma separated numbers of events to benchmark."),
+    ] = "100,1000,10000,100000",
+    repeats: Annotated[
+        int,
+        typer.Option(
+            help="Number of times to time each size, keeping the best.", min=1
+        ),
+    ] = 3,
+    route_gated_fraction: Annotated[
+        float,
+        typer.Option(help="Fraction of the late chapter events that need a route."),
+    ] = 0.3,
+    seed: Annotated[int, typer.Option(help="Seed of the event generator.")] = 0,
+    goal: Annotated[Goal, typer.Option(help="Goal to solve for.")] = Goal.MaximizeLaw,
+    constraint: Annotated[
+        Optional[list[Constraint]],
+        typer.Option(help="Constraints to solve with."),
+    ] = None,
+    time_limit: Annotated[
+        Optional[float],
+        typer.Option(help="Seconds that each solve may take."),
+    ] = None,
+    output_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(help="Filepath to write the results to as JSON."),
+    ] = None,
+) -> None:
+    constraints = constraint if constraint is not None else []
+    settings = SolverSettings(time_limit=time_limit)
+
+    results = []
+    for size in (int(part) for part in sizes.split(",") if part.strip()):
+        config = SyntheticConfig(
+            events_per_chapter=max(1, size // LAST_CHAPTER),
+            route_gated_fraction=route_gated_fraction,
+            seed=seed,
+        )
+        csv_stream = io.StringIO()
+        write_events_csv(generate_events(config), csv_stream)
+        contents = csv_stream.getvalue()
+
+        best: dict[str, float] = {}
+        for _ in range(repeats):
+            profiler = Profiler(enabled=True)
+            run_phases(contents, constraints, goal, settings, profiler)
+            for phase in profiler.phases:
+                best[phase.name] = min(
+                    best.get(phase.name, phase.seconds), phase.seconds
+                )
+
+        with traced_memory():
+            profiler = Profiler(enabled=True, trace_memory=True)
+            run_phases(contents, constraints, goal, settings, profiler)
+
+        result = {
+            "events": config.events,
+            "config": dataclasses.asdict(config),
+            **profiler.metrics,
+            "phases": {
+                phase.name: {
+                    "seconds": best[phase.name],
+                    "peak_bytes": phase.peak_bytes,
+                }
+                for phase in profiler.phases
+            },
+        }
+        results.append(result)
+
+        print(
+            f"{config.events:>8} events: "
+            + ", ".join(
+                f"{name} {phase['seconds']:.3f} s"
+                for name, phase in result["phases"].items()
+            )
+        )
+
+    if output_filepath is not None:
+        with open(output_filepath, "w", encoding="utf8") as output_stream:
+            json.dump(
+                {
+                    "version": RESULTS_VERSION,
+                    "environment": environment(),
+                    "goal": goal.value,
+                    "constraints": [c.value for c in constraints],
+                    "repeats": repeats,
+                    "results": results,
+                },
+                output_stream,
+                indent=2,
+            )
+            output_stream.write("\n")
+        print(f"Wrote results to: {output_filepath}")
+
+
+# Prints how much slower or faster each phase got between two results files
+@app.command()
+def compare(
+    baseline_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath of the results to compare against."),
+    ],
+    results_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath of the new results."),
+    ],
+) -> None:
+    baseline = _load_results(baseline_filepath)
+    results = _load_results(results_filepath)
+
+    print(
+        f"{'events':>8} {'phase':<10} {'baseline':>10} {'new':>10} {'change':>8}"
+        f" {'memory':>8}"
+    )
+    for events, result in sorted(results.items()):
+        if events not in baseline:
+            continue
+
+        for name in PHASES:
+            old_phase = baseline[events]["phases"].get(name)
+            new_phase = result["phases"].get(name)
+            if old_phase is None or new_phase is None:
+                continue
+
+            old_seconds = old_phase["seconds"]
+            new_seconds = new_phase["seconds"]
+            change = (new_seconds - old_seconds) / max(old_seconds, 1e-9)
+
+            memory = ""
+            if old_phase["peak_bytes"] and new_phase["peak_bytes"] is not None:
+                memory_change = new_phase["peak_bytes"] / old_phase["peak_bytes"] - 1
+                memory = f"{memory_change:+.0%}"
+
+            print(
+                f"{events:>8} {name:<10} {old_seconds:>9.3f}s {new_seconds:>9.3f}s"
+                f" {change:>+8.0%} {memory:>8}"
+            )
+
+
+def run_phases(
+    contents: str,
+    constraints: list[Constraint],
+    goal: Goal,
+    settings: SolverSettings,
+    profiler: Profiler,
+) -> None:
+    with profiler.phase("parse"):
+        events = Event.multiple_from_csv(io.StringIO(contents))
+
+    with profiler.phase("build"):
+        problem = create_milp(events, constraints, goal)
+
+    with profiler.phase("solve"):
+        report = solve_problem(problem, settings)
+
+    model_size = ModelSize.from_problem(problem)
+    profiler.record("variables", model_size.variables)
+    profiler.record("constraints", model_size.constraints)
+    profiler.record("nonzeros", model_size.nonzeros)
+    profiler.record("status", pulp.const.LpStatus[report.status])
+    profiler.record("objective", report.objective)
+
+    if not report.has_solution:
+        return
+
+    with profiler.phase("extract"):
+        solution = extract_solution(events, problem)
+
+    with profiler.phase("simulate"):
+        simulation = Simulation(events)
+        simulation.apply_solution(solution)
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit: Optional[str] = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=pathlib.Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "pulp": pulp.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def _load_results(filepath: pathlib.Path) -> dict[int, dict[str, Any]]:
+    with open(filepath, "r", encoding="utf8") as input_stream:
+        contents = json.load(input_stream)
+
+    if contents.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported results version in: {filepath}")
+
+    return {result["events"]: result for result in contents["results"]}
+
+
+if __name__ == "__main__":
+    app()
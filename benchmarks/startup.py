@@ -0,0 +1,155 @@
+from typing import Annotated, Optional
+
+import json
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import typer
+
+app = typer.Typer()
+
+# Runs a CLI command in process and reports which heavy modules it imported
+_RUNNER = """
+import json
+import sys
+
+from ttdlgc.main import app
+
+try:
+    app(sys.argv[1:], standalone_mode=False)
+except SystemExit:
+    pass
+
+print(json.dumps([m for m in ("pulp", "numpy") if m in sys.modules]))
+"""
+
+# Commands that must not import pulp or numpy
+LIGHTWEIGHT_COMMANDS = {"simulate", "simulate-batch", "bundle"}
+
+
+def commands(
+    events_filepath: pathlib.Path,
+    solution_filepath: pathlib.Path,
+    directory: pathlib.Path,
+) -> dict[str, list[str]]:
+    events = ["--events-filepath", str(events_filepath)]
+    solution = ["--input-solution-filepath", str(solution_filepath)]
+
+    return {
+        "simulate": ["simulate", *events, *solution],
+        "simulate-batch": [
+            "simulate-batch",
+            *events,
+            "--solutions",
+            str(solution_filepath),
+            "--output-results-filepath",
+            str(directory / "results.csv"),
+            "--processes",
+            "1",
+        ],
+        "bundle": [
+            "bundle",
+            *events,
+            "--solutions",
+            str(solution_filepath),
+            "--output-bundle-filepath",
+            str(directory / "solutions.plans"),
+        ],
+        "solve": ["solve", *events, "--no-cache"],
+        "solve-batch": [
+            "solve-batch",
+            *events,
+            "--output-directory",
+            str(directory / "batch"),
+        ],
+        "pareto": [
+            "pareto",
+            *events,
+            "--output-directory",
+            str(directory / "pareto"),
+            "--chaos-step",
+            "100",
+        ],
+        "criticality": [
+            "criticality",
+            *events,
+            "--output-report-filepath",
+            str(directory / "criticality.csv"),
+        ],
+        "enumerate-plans": [
+            "enumerate-plans",
+            *events,
+            "--output-directory",
+            str(directory / "plans"),
+            "--max-plans",
+            "10",
+        ],
+        "sample": ["sample", *events, "--samples", "1000"],
+        "what-if": ["what-if", *events, *solution, "--pin-route", "Law"],
+        "serve": ["serve", *events],
+    }
+
+
+# Measures the wall time of running each CLI command in a new Python process,
+# including interpreter startup and imports, which dominate the lightweight
+# commands
+@app.command()
+def main(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    input_solution_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file of choices to simulate."),
+    ],
+    command: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Command to time. Can be given multiple times."),
+    ] = None,
+    repeats: Annotated[
+        int,
+        typer.Option(help="Number of times to run each command, keeping the median."),
+    ] = 5,
+) -> None:
+    failed = False
+
+    with tempfile.TemporaryDirectory() as directory:
+        all_commands = commands(
+            events_filepath, input_solution_filepath, pathlib.Path(directory)
+        )
+
+        for name in command or list(all_commands):
+            times = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                result = subprocess.run(
+                    [sys.executable, "-c", _RUNNER, *all_commands[name]],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    check=True,
+                )
+                times.append(time.perf_counter() - start)
+
+            heavy_modules = json.loads(result.stdout.splitlines()[-1])
+            print(
+                f"{name:>12}: {statistics.median(times):8.3f} s"
+                f" (imports: {', '.join(heavy_modules) or 'none'})"
+            )
+
+            if name in LIGHTWEIGHT_COMMANDS and len(heavy_modules) > 0:
+                print(f"{name} should not import {', '.join(heavy_modules)}")
+                failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    app()
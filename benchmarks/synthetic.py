@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import Annotated, IO
+
+import csv
+import pathlib
+import random
+
+import typer
+
+from ttdlgc.events import (
+    CHAPTER,
+    CHOICE_N,
+    CHOICE_N_C,
+    CHOICE_N_G,
+    CHOICE_N_L,
+    COMPLETION_CHAOS,
+    COMPLETION_GREY,
+    COMPLETION_LAW,
+    DATE,
+    NAME,
+    ROUTE,
+)
+from ttdlgc.events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+from ttdlgc.rules import LAST_CHAPTER, ROUTE_REQUIREMENT_CHAPTER
+
+app = typer.Typer()
+
+# The CSV files have columns for at most this many choices per event
+MAX_CHOICES = 3
+
+# The in-game calendar that the event dates are spread over
+_MONTH_DAYS = [
+    (TtdMonth.September, 30),
+    (TtdMonth.October, 31),
+    (TtdMonth.November, 30),
+    (TtdMonth.December, 31),
+]
+
+
+# Shape of a synthetic event list. The defaults are close to the real event list.
+@dataclass(frozen=True)
+class SyntheticConfig:
+    chapters: int = LAST_CHAPTER
+    events_per_chapter: int = 10
+    # Relative weights of events having 0, 1, 2 and 3 choices
+    choice_weights: tuple[float, ...] = (0.6, 0.0, 0.35, 0.05)
+    # Fraction of the events after the route is picked that require a route
+    route_gated_fraction: float = 0.3
+    max_impact: int = 5
+    seed: int = 0
+
+    @property
+    def events(self) -> int:
+        return self.chapters * self.events_per_chapter
+
+    def validate(self) -> None:
+        if not 1 <= self.chapters <= LAST_CHAPTER:
+            raise ValueError(f"Chapters must be between 1 and {LAST_CHAPTER}")
+        if self.events_per_chapter < 1:
+            raise ValueError("Events per chapter must be at least 1")
+        if len(self.choice_weights) != MAX_CHOICES + 1 or sum(self.choice_weights) <= 0:
+            raise ValueError(f"Expected {MAX_CHOICES + 1} choice weights")
+        if not 0.0 <= self.route_gated_fraction <= 1.0:
+            raise ValueError("Route gated fraction must be between 0 and 1")
+        if self.max_impact < 1:
+            raise ValueError("Max impact must be at least 1")
+
+
+def generate_events(config: SyntheticConfig) -> list[Event]:
+    config.validate()
+
+    rng = random.Random(config.seed)
+    routes = list(Route)
+
+    events: list[Event] = []
+    for chapter in range(1, config.chapters + 1):
+        for i in range(config.events_per_chapter):
+            position = len(events)
+
+            required_route = None
+            if (
+                chapter > ROUTE_REQUIREMENT_CHAPTER
+                and rng.random() < config.route_gated_fraction
+            ):
+                required_route = rng.choice(routes)
+
+            number_of_choices = rng.choices(
+                range(MAX_CHOICES + 1), weights=config.choice_weights
+            )[0]
+
+            events.append(
+                Event(
+                    chapter=chapter,
+                    date=_date(position, config.events),
+                    name=f"Synthetic Event {chapter}-{i + 1}",
+                    completion=Lgc(
+                        law=rng.randint(0, 1),
+                        grey=rng.randint(0, 1),
+                        chaos=rng.randint(0, 1),
+                    ),
+                    required_route=required_route,
+                    choices=tuple(
+                        _choice(rng, j, config.max_impact)
+                        for j in range(number_of_choices)
+                    ),
+                )
+            )
+
+    return events
+
+
+def write_events_csv(events: list[Event], output_stream: IO[str]) -> None:
+    fieldnames = [
+        CHAPTER,
+        DATE,
+        NAME,
+        COMPLETION_LAW,
+        COMPLETION_GREY,
+        COMPLETION_CHAOS,
+        ROUTE,
+    ]
+    for n in range(1, MAX_CHOICES + 1):
+        fieldnames.extend([CHOICE_N(n), CHOICE_N_L(n), CHOICE_N_G(n), CHOICE_N_C(n)])
+
+    writer = csv.DictWriter(output_stream, fieldnames=fieldnames, restval="")
+
+    writer.writeheader()
+    for event in events:
+        row: dict[str, object] = {
+            CHAPTER: event.chapter,
+            DATE: f"{event.date.month.name} {event.date.day}",
+            NAME: event.name,
+            COMPLETION_LAW: event.completion.law,
+            COMPLETION_GREY: event.completion.grey,
+            COMPLETION_CHAOS: event.completion.chaos,
+            ROUTE: (
+                event.required_route.name if event.required_route is not None else ""
+            ),
+        }
+        for n, choice in enumerate(event.choices, start=1):
+            row[CHOICE_N(n)] = choice.name
+            row[CHOICE_N_L(n)] = choice.impact.law
+            row[CHOICE_N_G(n)] = choice.impact.grey
+            row[CHOICE_N_C(n)] = choice.impact.chaos
+
+        writer.writerow(row)
+
+
+def _date(position: int, events: int) -> TtdDate:
+    day = position * sum(days for _, days in _MONTH_DAYS) // events
+    for month, days in _MONTH_DAYS:
+        if day < days:
+            return TtdDate(month=month, day=day + 1)
+        day -= days
+
+    raise AssertionError("Unreachable")
+
+
+# Each choice mostly moves one alignment, like the real choices do
+def _choice(rng: random.Random, index: int, max_impact: int) -> Choice:
+    impacts = [0, 0, 0]
+    impacts[index % 3] = rng.randint(1, max_impact)
+    if rng.random() < 0.2:
+        impacts[rng.randrange(3)] += rng.randint(1, max_impact)
+
+    return Choice(
+        name=f"Option {index + 1}",
+        impact=Lgc(law=impacts[0], grey=impacts[1], chaos=impacts[2]),
+    )
+
+
+# Writes a synthetic event CSV file that the CLI can load like the real one
+@app.command()
+def main(
+    output_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to write the synthetic event CSV file to."),
+    ],
+    chapters: Annotated[
+        int, typer.Option(help=f"Number of chapters, at most {LAST_CHAPTER}.")
+    ] = LAST_CHAPTER,
+    events_per_chapter: Annotated[
+        int, typer.Option(help="Number of events in each chapter.")
+    ] = 10,
+    choice_weights: Annotated[
+        str,
+        typer.Option(
+            help="Comma separated relative weights of events having 0 to 3 choices."
+        ),
+    ] = "0.6,0,0.35,0.05",
+    route_gated_fraction: Annotated[
+        float,
+        typer.Option(help="Fraction of the late chapter events that need a route."),
+    ] = 0.3,
+    seed: Annotated[int, typer.Option(help="Seed of the random generator.")] = 0,
+) -> None:
+    config = SyntheticConfig(
+        chapters=chapters,
+        events_per_chapter=events_per_chapter,
+        choice_weights=tuple(float(weight) for weight in choice_weights.split(",")),
+        route_gated_fraction=route_gated_fraction,
+        seed=seed,
+    )
+
+    with open(output_filepath, "w", encoding="utf8", newline="") as output_stream:
+        write_events_csv(generate_events(config), output_stream)
+
+    print(f"Wrote {config.events} events to: {output_filepath}")
+
+
+if __name__ == "__main__":
+    app()
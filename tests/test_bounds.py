@@ -0,0 +1,39 @@
+import pulp
+
+from ttdlgc.bounds import precheck
+from ttdlgc.events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+from ttdlgc.milp import create_milp
+from ttdlgc.rules import Constraint, Goal
+
+
+def event(chapter: int, name: str, law: int, choice_laws: tuple[int, ...]) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=law, grey=0, chaos=0),
+        required_route=None,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=Lgc(law=choice_law, grey=0, chaos=0))
+            for o, choice_law in enumerate(choice_laws)
+        ),
+    )
+
+
+# The route requirement is checked at the end of chapter 5, the same as in the
+# model, so alignment only gained in chapter 5 counts towards it
+def test_route_requirement_reached_in_chapter_5_passes_precheck() -> None:
+    events = [
+        event(1, "a", 0, (40, 0)),
+        event(5, "b", 30, ()),
+        event(6, "c", 0, (60, 0)),
+    ]
+
+    checked = precheck(events, [Constraint.LawLv4AtEnd], Route.Law)
+    assert checked.routes == (Route.Law,), checked.reasons
+
+    problem = create_milp(events, [Constraint.LawLv4AtEnd], Goal.MaximizeLaw)
+    problem.solve(pulp.PULP_CBC_CMD(msg=False))
+
+    assert problem.status == pulp.const.LpStatusOptimal
+    assert problem.variablesDict()["law_at_chapter_7_end"].varValue == 130
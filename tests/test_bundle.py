@@ -0,0 +1,64 @@
+import array
+import io
+import pathlib
+
+import pytest
+
+from ttdlgc.bundle import bundle_csvs, read_bundle, write_bundle
+from ttdlgc.event_table import EventTable, NO_OPTION, TableSolution
+from ttdlgc.events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+
+
+def table() -> EventTable:
+    return EventTable.from_events(
+        [
+            Event(
+                chapter=1,
+                date=TtdDate(month=TtdMonth.September, day=1),
+                name="a",
+                completion=Lgc(law=0, grey=0, chaos=0),
+                required_route=None,
+                choices=(
+                    Choice(name="a 0", impact=Lgc(law=1, grey=0, chaos=0)),
+                    Choice(name="a 1", impact=Lgc(law=0, grey=1, chaos=0)),
+                ),
+            )
+        ]
+    )
+
+
+@pytest.mark.parametrize("option", [NO_OPTION, 2])
+def test_solutions_without_a_valid_option_are_not_bundled(option: int) -> None:
+    solution = TableSolution(route=Route.Law, options=array.array("i", [option]))
+
+    with pytest.raises(ValueError, match=r"[Ee]vent:? a\b"):
+        write_bundle(table(), [solution], io.BytesIO())
+
+
+def test_bundles_with_an_invalid_option_are_not_read() -> None:
+    solution = TableSolution(route=Route.Law, options=array.array("i", [1]))
+    output_stream = io.BytesIO()
+    write_bundle(table(), [solution], output_stream)
+
+    contents = bytearray(output_stream.getvalue())
+    contents[-1] = 5
+
+    with pytest.raises(ValueError, match="no option 5"):
+        list(read_bundle(table(), io.BytesIO(contents)))
+
+
+def test_failed_bundle_leaves_existing_bundle(tmp_path: pathlib.Path) -> None:
+    bundle_filepath = tmp_path / "solutions.plans"
+    bundle_filepath.write_bytes(b"existing")
+
+    solution_filepath = tmp_path / "solution.csv"
+    solution_filepath.write_text("name,choice\nRoute,Law\na,7\n", encoding="utf8")
+
+    with pytest.raises(ValueError, match="solution.csv"):
+        bundle_csvs(table(), [solution_filepath], bundle_filepath)
+
+    assert bundle_filepath.read_bytes() == b"existing"
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "solution.csv",
+        "solutions.plans",
+    ]
@@ -0,0 +1,98 @@
+import json
+import os
+import pathlib
+
+import pytest
+
+from ttdlgc.cache import STATUS_INFEASIBLE, STATUS_OPTIMAL, SolveCache, solve_key
+from ttdlgc.events import Choice, Event, Lgc, Route, Solution, TtdDate, TtdMonth
+from ttdlgc.rules import Constraint, Goal
+
+
+def event(chapter: int, name: str, options: int) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=None,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=Lgc(law=o, grey=0, chaos=0))
+            for o in range(options)
+        ),
+    )
+
+
+EVENTS = [event(1, "a", 2), event(2, "b", 3)]
+SOLUTION = Solution(choices=[(EVENTS[0], 1), (EVENTS[1], 2)], route=Route.Law)
+KEY = solve_key(EVENTS, [Constraint.LawLv4AtEnd], Goal.MaximizeLaw, "cbc")
+
+
+def test_hits_and_misses(tmp_path: pathlib.Path) -> None:
+    cache = SolveCache(tmp_path)
+    assert cache.get(KEY, EVENTS) is None
+
+    cache.put(KEY, EVENTS, STATUS_OPTIMAL, SOLUTION)
+    assert cache.get(KEY, EVENTS) == (STATUS_OPTIMAL, SOLUTION)
+
+    other_key = solve_key(EVENTS, [], Goal.MaximizeLaw, "cbc")
+    assert other_key != KEY
+    assert cache.get(other_key, EVENTS) is None
+
+    # Other events change the key
+    events_key = solve_key(
+        EVENTS[:1], [Constraint.LawLv4AtEnd], Goal.MaximizeLaw, "cbc"
+    )
+    assert events_key != KEY
+
+    cache.put(other_key, EVENTS, STATUS_INFEASIBLE, None)
+    assert cache.get(other_key, EVENTS) == (STATUS_INFEASIBLE, None)
+
+
+def test_other_statuses_are_not_stored(tmp_path: pathlib.Path) -> None:
+    cache = SolveCache(tmp_path)
+    cache.put(KEY, EVENTS, 0, SOLUTION)
+
+    assert cache.get(KEY, EVENTS) is None
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "entry",
+    [
+        "{",
+        "[]",
+        json.dumps({"status": STATUS_OPTIMAL}),
+        json.dumps({"status": 0, "route": "Law", "choices": []}),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Nowhere", "choices": []}),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Law", "choices": [[2, 0]]}),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Law", "choices": [[-1, 0]]}),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Law", "choices": [[0, 2]]}),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Law", "choices": [[0, -1]]}),
+        json.dumps(
+            {"status": STATUS_OPTIMAL, "route": "Law", "choices": [[True, False]]}
+        ),
+        json.dumps({"status": STATUS_OPTIMAL, "route": "Law", "choices": [[0]]}),
+    ],
+)
+def test_malformed_entries_are_misses(tmp_path: pathlib.Path, entry: str) -> None:
+    (tmp_path / f"{KEY}.json").write_text(entry, encoding="utf8")
+
+    assert SolveCache(tmp_path).get(KEY, EVENTS) is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path: pathlib.Path) -> None:
+    cache = SolveCache(tmp_path, max_entries=2)
+    keys = [f"{i:064x}" for i in range(3)]
+
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, EVENTS, STATUS_INFEASIBLE, None)
+        os.utime(tmp_path / f"{key}.json", (i, i))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0], EVENTS) is not None
+    cache.put(keys[2], EVENTS, STATUS_INFEASIBLE, None)
+
+    assert cache.get(keys[0], EVENTS) is not None
+    assert cache.get(keys[1], EVENTS) is None
+    assert cache.get(keys[2], EVENTS) is not None
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from ttdlgc.criticality import criticality
+from ttdlgc.events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+from ttdlgc.rules import Constraint, Goal
+
+
+def event(
+    chapter: int,
+    name: str,
+    impacts: tuple[Lgc, ...],
+    required_route: Optional[Route] = None,
+) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=required_route,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=impact)
+            for o, impact in enumerate(impacts)
+        ),
+    )
+
+
+# Only the first option of "a" reaches the Law route, which every plan has to take
+EVENTS = [
+    event(1, "a", (Lgc(60, 0, 0), Lgc(0, 0, 0))),
+    event(6, "b", (Lgc(10, 0, 0), Lgc(0, 0, 0)), Route.Law),
+    event(6, "c", (Lgc(5, 0, 0), Lgc(0, 5, 0))),
+]
+
+
+def test_forced_options_are_ranked_by_how_much_they_drop_the_optimum() -> None:
+    report = criticality(EVENTS, [], Goal.MaximizeLaw, processes=1)
+
+    assert report.objective == 75
+    assert [(event.name, drop) for event, drop in report.ranked_events()] == [
+        ("a", None),
+        ("b", 10),
+        ("c", 5),
+    ]
+
+    forced = {(f.event.name, f.option): f for f in report.options}
+    assert forced[("a", 0)].used_by_optimum
+    assert not forced[("a", 1)].feasible
+    assert forced[("b", 1)].objective == 65
+    assert forced[("c", 1)].objective == 70
+
+
+def test_infeasible_query_skips_the_forced_solves() -> None:
+    report = criticality(EVENTS, [Constraint.LawLv5AtEnd], Goal.MaximizeLaw)
+
+    assert report.objective is None
+    assert report.options == []
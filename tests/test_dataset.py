@@ -0,0 +1,102 @@
+from typing import Callable
+
+import os
+import pathlib
+
+import pytest
+
+from ttdlgc.dataset import compiled_filepath, load_event_table, load_events
+from ttdlgc.events import Route, TtdMonth
+
+HEADER = (
+    "Chapter,Date,Name,Completion L,Completion G,Completion C,Route,"
+    "Choice 1,Choice 1 L,Choice 1 G,Choice 1 C,"
+    "Choice 2,Choice 2 L,Choice 2 G,Choice 2 C,"
+    "Choice 3,Choice 3 L,Choice 3 G,Choice 3 C\n"
+)
+CSV = (
+    HEADER
+    + "1,September 6,Café,1,1,0,,Pay (L),5,0,0,Run (C),0,0,5,,,,\n"
+    + "6,November 2,Lawful,0,0,2,Law,,,,,,,,,,,,\n"
+)
+
+
+def write_csv(filepath: pathlib.Path, contents: str, mtime_ns: int) -> None:
+    filepath.write_text(contents, encoding="utf8")
+    os.utime(filepath, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture(name="csv_filepath")
+def fixture_csv_filepath(tmp_path: pathlib.Path) -> pathlib.Path:
+    filepath = tmp_path / "events.csv"
+    write_csv(filepath, CSV, 10**18)
+
+    return filepath
+
+
+def test_compiled_file_round_trip(csv_filepath: pathlib.Path) -> None:
+    parsed = load_events(csv_filepath)
+    assert compiled_filepath(csv_filepath).exists()
+
+    compiled = load_events(csv_filepath)
+    assert compiled == parsed
+    assert [event.name for event in compiled] == ["Café", "Lawful"]
+    assert compiled[1].required_route == Route.Law
+    assert compiled[1].date.month == TtdMonth.November
+    assert load_event_table(csv_filepath).to_events() == parsed
+
+
+def test_changed_csv_rebuilds_the_compiled_file(csv_filepath: pathlib.Path) -> None:
+    load_events(csv_filepath)
+
+    # The same size and contents, but a later modification time
+    write_csv(csv_filepath, CSV.replace("Pay (L),5", "Pay (L),6"), 2 * 10**18)
+    assert load_events(csv_filepath)[0].choices[0].impact.law == 6
+    assert load_events(csv_filepath)[0].choices[0].impact.law == 6
+
+
+def test_touched_csv_keeps_the_compiled_file(csv_filepath: pathlib.Path) -> None:
+    events = load_events(csv_filepath)
+    contents = compiled_filepath(csv_filepath).read_bytes()
+
+    write_csv(csv_filepath, CSV, 2 * 10**18)
+    assert load_events(csv_filepath) == events
+
+    # Only the recorded mtime changed
+    updated = compiled_filepath(csv_filepath).read_bytes()
+    assert len(updated) == len(contents) and updated != contents
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda contents: contents[:-3],
+        lambda contents: contents + b"\x00",
+        lambda contents: contents[:-12] + b"\xff" * 12,
+        # The month of the first event, after the 71 byte header and the chapters
+        lambda contents: contents[:79] + b"\x07" + contents[80:],
+    ],
+)
+def test_corrupt_compiled_file_is_rebuilt(
+    csv_filepath: pathlib.Path, corrupt: Callable[[bytes], bytes]
+) -> None:
+    events = load_events(csv_filepath)
+    compiled = compiled_filepath(csv_filepath)
+    contents = compiled.read_bytes()
+    compiled.write_bytes(corrupt(contents))
+
+    assert load_events(csv_filepath) == events
+    assert compiled.read_bytes() == contents
+    assert list(csv_filepath.parent.glob("*.tmp")) == []
+
+
+def test_failed_write_leaves_no_temporary_file(
+    csv_filepath: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fail(*_: object) -> None:
+        raise OSError("read-only")
+
+    monkeypatch.setattr(os, "replace", fail)
+
+    assert len(load_events(csv_filepath)) == 2
+    assert list(csv_filepath.parent.iterdir()) == [csv_filepath]
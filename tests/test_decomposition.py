@@ -0,0 +1,67 @@
+from typing import Optional
+
+import pulp
+import pytest
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.decomposition import solve_by_route
+from ttdlgc.events import Event, Lgc, Solution
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.milp import create_milp
+from ttdlgc.rules import CONSTRAINT_THRESHOLDS, GOAL_ALIGNMENTS, Constraint, Goal
+from ttdlgc.solvers import solve_problem
+
+EVENTS = generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9))
+
+QUERIES = [
+    [],
+    [Constraint.LawLv4AtEnd],
+    [Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv4AtEnd, Constraint.ChaosLv4AtEnd],
+    # Ruled out by the precheck
+    [Constraint.LawLv5AtEnd, Constraint.ChaosLv5AtEnd],
+    # Only ruled out by the solver
+    [Constraint.GreyLv5AtEnd, Constraint.ChaosLv5AtEnd],
+]
+
+
+# Status and objective of solving the whole model
+def reference(
+    constraints: list[Constraint], goal: Optional[Goal]
+) -> tuple[int, Optional[float]]:
+    problem = create_milp(EVENTS, constraints, goal)
+    report = solve_problem(problem)
+
+    return report.status, report.objective
+
+
+# Final alignments of the plan, checking that it can actually be played
+def check_plan(
+    events: list[Event], solution: Solution, constraints: list[Constraint]
+) -> Lgc:
+    simulation = IncrementalSimulation(events, solution)
+    assert simulation.trajectory().route_requirement_met is True
+    for constraint in constraints:
+        alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+        assert getattr(simulation.lgc, alignment) >= level
+
+    return simulation.lgc
+
+
+@pytest.mark.parametrize("constraints", QUERIES)
+@pytest.mark.parametrize("goal", [None, *Goal])
+def test_agrees_with_the_whole_model(
+    constraints: list[Constraint], goal: Optional[Goal]
+) -> None:
+    status, objective = reference(constraints, goal)
+    route_status, solution = solve_by_route(EVENTS, constraints, goal, processes=2)
+
+    assert route_status == status
+    if status != pulp.const.LpStatusOptimal:
+        assert solution is None
+        return
+
+    assert solution is not None
+    lgc = check_plan(EVENTS, solution, constraints)
+    if goal is not None:
+        assert getattr(lgc, GOAL_ALIGNMENTS[goal]) == objective
@@ -0,0 +1,62 @@
+import itertools
+import pathlib
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.enumeration import enumerate_plans
+from ttdlgc.events import Event, EventIndex, Solution
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.rules import Goal, ROUTE_REQUIREMENTS
+
+EVENTS = generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9))
+
+
+# Law of every plan that can be taken, found by trying all of them
+def all_plan_laws(events: list[Event]) -> list[int]:
+    laws = []
+    for route in ROUTE_REQUIREMENTS:
+        on_route = [
+            event
+            for event in events
+            if event.choices and event.required_route in (None, route)
+        ]
+        for options in itertools.product(
+            *(range(len(event.choices)) for event in on_route)
+        ):
+            solution = Solution(choices=list(zip(on_route, options)), route=route)
+            trajectory = IncrementalSimulation(events, solution).trajectory()
+            if trajectory.route_requirement_met:
+                laws.append(trajectory.final.lgc.law)
+
+    return sorted(laws, reverse=True)
+
+
+def read_plan(filepath: pathlib.Path) -> tuple[object, ...]:
+    with open(filepath, "r", encoding="utf8") as input_stream:
+        solution = Solution.from_csv(EventIndex(EVENTS), input_stream)
+
+    return solution.route, *((event.name, o) for event, o in solution.choices)
+
+
+def test_k_best_plans_are_distinct_and_ranked(tmp_path: pathlib.Path) -> None:
+    k = 10
+    plans = list(
+        enumerate_plans(EVENTS, [], Goal.MaximizeLaw, tmp_path, k=k, processes=2)
+    )
+
+    objectives = [round(plan.objective) for plan in plans]
+    assert objectives == all_plan_laws(EVENTS)[:k]
+    assert [plan.lgc.law for plan in plans] == objectives
+
+    contents = [read_plan(plan.solution_filepath) for plan in plans]
+    assert len(set(contents)) == k
+    assert len(list(tmp_path.iterdir())) == k
+
+
+def test_all_optimal_plans_are_enumerated(tmp_path: pathlib.Path) -> None:
+    laws = all_plan_laws(EVENTS)
+
+    plans = list(enumerate_plans(EVENTS, [], Goal.MaximizeLaw, tmp_path, processes=2))
+
+    assert len(plans) == laws.count(laws[0])
+    assert all(plan.lgc.law == laws[0] for plan in plans)
+    assert len({read_plan(plan.solution_filepath) for plan in plans}) == len(plans)
@@ -0,0 +1,92 @@
+from typing import Callable, Optional
+
+import random
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.events import Event, Lgc, Route, Solution, TtdDate
+from ttdlgc.incremental_simulation import IncrementalSimulation, Trajectory
+from ttdlgc.rules import LAST_CHAPTER, LAW_LEVEL_3
+from ttdlgc.simulation import Simulation
+
+
+# The route requirement is checked at the end of chapter 5, so alignment only gained
+# in chapter 5 counts towards it
+def test_route_requirement_met_at_end_of_chapter_5() -> None:
+    chapter_lgc = [Lgc(law=0, grey=0, chaos=0)] * 4 + [
+        Lgc(law=LAW_LEVEL_3, grey=0, chaos=0)
+    ] * 3
+
+    assert Trajectory.of(Route.Law, chapter_lgc).route_requirement_met is True
+    assert Trajectory.of(Route.Grey, chapter_lgc).route_requirement_met is False
+
+
+# Alignments from replaying the events that pass the filter from scratch
+def replay(
+    events: list[Event],
+    route: Route,
+    options: list[Optional[int]],
+    keep: Callable[[Event], bool],
+) -> Lgc:
+    kept = [event for event in events if keep(event)]
+    simulation = Simulation(kept)
+    simulation.apply_solution(
+        Solution(
+            choices=[
+                (event, option)
+                for event, option in zip(events, options)
+                if option is not None and keep(event)
+            ],
+            route=route,
+        )
+    )
+
+    return simulation.lgc
+
+
+def test_random_edits_match_a_fresh_replay() -> None:
+    events = generate_events(
+        SyntheticConfig(
+            events_per_chapter=4, max_impact=30, route_gated_fraction=0.5, seed=4
+        )
+    )
+    choice_events = [i for i, event in enumerate(events) if event.choices]
+    # Every date with an event, and the days just before and after it
+    dates = sorted(
+        {
+            TtdDate(month=event.date.month, day=event.date.day + offset)
+            for event in events
+            for offset in (-1, 0, 1)
+        },
+        key=lambda date: (date.month.value, date.day),
+    )
+
+    rng = random.Random(7)
+    simulation = IncrementalSimulation(events)
+    route = Route.Law
+    options: list[Optional[int]] = [0 if event.choices else None for event in events]
+
+    for step in range(200):
+        if rng.random() < 0.2:
+            route = rng.choice(list(Route))
+            simulation.set_route(route)
+        else:
+            i = rng.choice(choice_events)
+            options[i] = rng.randrange(len(events[i].choices))
+            simulation.choose(i, options[i])
+
+        assert simulation.lgc == replay(events, route, options, lambda event: True)
+        if step % 10 != 0:
+            continue
+
+        for chapter in range(1, LAST_CHAPTER + 1):
+            assert simulation.lgc_at_chapter(chapter) == replay(
+                events, route, options, lambda event: event.chapter <= chapter
+            )
+        for date in dates:
+            assert simulation.lgc_at_date(date) == replay(
+                events,
+                route,
+                options,
+                lambda event: (event.date.month.value, event.date.day)
+                <= (date.month.value, date.day),
+            )
@@ -0,0 +1,80 @@
+from typing import Optional
+
+import itertools
+
+import pulp
+import pytest
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.events import Route
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.lattice import ReachableAlignments
+from ttdlgc.milp import create_milp
+from ttdlgc.rules import (
+    CONSTRAINT_THRESHOLDS,
+    GOAL_ALIGNMENTS,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+    Goal,
+)
+from ttdlgc.solvers import solve_problem
+
+EVENTS = generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9))
+LATTICE = ReachableAlignments(EVENTS)
+
+QUERIES = [
+    [],
+    [Constraint.LawLv4AtEnd],
+    [Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv4AtEnd, Constraint.ChaosLv4AtEnd],
+    [Constraint.LawLv5AtEnd, Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv5AtEnd, Constraint.ChaosLv5AtEnd],
+]
+
+
+@pytest.mark.parametrize("route", list(ROUTE_REQUIREMENTS))
+def test_reachable_alignments_are_those_of_every_playable_plan(route: Route) -> None:
+    choice_events = [i for i, event in enumerate(EVENTS) if event.choices]
+
+    expected = set()
+    for options in itertools.product(
+        *(range(len(EVENTS[i].choices)) for i in choice_events)
+    ):
+        simulation = IncrementalSimulation(EVENTS)
+        simulation.set_route(route)
+        for i, option in zip(choice_events, options):
+            simulation.choose(i, option)
+
+        if simulation.trajectory().route_requirement_met:
+            lgc = simulation.lgc
+            expected.add((lgc.law, lgc.grey, lgc.chaos))
+
+    reachable = {tuple(int(v) for v in point) for point in LATTICE.reachable(route)}
+    assert reachable == expected
+
+
+@pytest.mark.parametrize("constraints", QUERIES)
+@pytest.mark.parametrize("goal", [None, *Goal])
+def test_agrees_with_the_model(
+    constraints: list[Constraint], goal: Optional[Goal]
+) -> None:
+    report = solve_problem(create_milp(EVENTS, constraints, goal))
+    solved = LATTICE.solve(constraints, goal)
+
+    if report.status != pulp.const.LpStatusOptimal:
+        assert solved is None
+        return
+
+    assert solved is not None
+    solution, lgc = solved
+
+    # The plan reaches the alignments it was picked for
+    simulation = IncrementalSimulation(EVENTS, solution)
+    assert simulation.trajectory().route_requirement_met is True
+    assert simulation.lgc == lgc
+
+    for constraint in constraints:
+        alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+        assert getattr(lgc, alignment) >= level
+    if goal is not None:
+        assert getattr(lgc, GOAL_ALIGNMENTS[goal]) == report.objective
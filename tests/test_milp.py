@@ -0,0 +1,33 @@
+import pulp
+
+from ttdlgc.events import Event, Lgc, Route, TtdDate, TtdMonth
+from ttdlgc.milp import Goal, create_milp
+
+
+def event(
+    chapter: int, name: str, law: int, required_route: Route | None = None
+) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=law, grey=0, chaos=0),
+        required_route=required_route,
+        choices=(),
+    )
+
+
+# Route gated events in the same chapter share the route variable, so their
+# completions have to add up rather than the last one replacing the others
+def test_route_gated_completions_in_one_chapter_add_up() -> None:
+    events = [
+        event(1, "Reach Law", 60),
+        event(5, "First Law", 10, Route.Law),
+        event(5, "Second Law", 20, Route.Law),
+    ]
+
+    problem = create_milp(events, [], Goal.MaximizeLaw)
+    problem.solve(pulp.PULP_CBC_CMD(msg=False))
+
+    assert problem.status == pulp.const.LpStatusOptimal
+    assert problem.variablesDict()["law_at_chapter_7_end"].varValue == 90
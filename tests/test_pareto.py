@@ -0,0 +1,71 @@
+import itertools
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.events import Lgc, Route, Solution
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.pareto import ParetoPoint, non_dominated, pareto_frontier
+from ttdlgc.rules import CONSTRAINT_THRESHOLDS, ROUTE_REQUIREMENTS, Constraint
+
+EVENTS = generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9))
+
+
+# Final alignments of every playable plan meeting the constraints
+def playable_totals(constraints: list[Constraint]) -> set[Lgc]:
+    choice_events = [i for i, event in enumerate(EVENTS) if event.choices]
+
+    totals = set()
+    for route in ROUTE_REQUIREMENTS:
+        for options in itertools.product(
+            *(range(len(EVENTS[i].choices)) for i in choice_events)
+        ):
+            simulation = IncrementalSimulation(EVENTS)
+            simulation.set_route(route)
+            for i, option in zip(choice_events, options):
+                simulation.choose(i, option)
+
+            lgc = simulation.lgc
+            if simulation.trajectory().route_requirement_met and all(
+                getattr(lgc, alignment) >= level
+                for alignment, level in (CONSTRAINT_THRESHOLDS[c] for c in constraints)
+            ):
+                totals.add(lgc)
+
+    return totals
+
+
+def test_non_dominated_keeps_only_points_nothing_beats() -> None:
+    solution = Solution(choices=[], route=Route.Law)
+    points = [
+        ParetoPoint(Lgc(*values), solution)
+        for values in [(3, 0, 0), (2, 2, 0), (2, 1, 0), (3, 0, 0), (0, 0, 1)]
+    ]
+
+    assert [point.lgc for point in non_dominated(points)] == [
+        Lgc(3, 0, 0),
+        Lgc(2, 2, 0),
+        Lgc(0, 0, 1),
+    ]
+
+
+def test_frontier_is_exactly_the_non_dominated_totals() -> None:
+    constraints = [Constraint.ChaosLv4AtEnd]
+    totals = playable_totals(constraints)
+    expected = {
+        lgc
+        for lgc in totals
+        if not any(
+            other != lgc
+            and other.law >= lgc.law
+            and other.grey >= lgc.grey
+            and other.chaos >= lgc.chaos
+            for other in totals
+        )
+    }
+
+    frontier = pareto_frontier(EVENTS, constraints, processes=2)
+
+    assert len(expected) > 1
+    assert {point.lgc for point in frontier} == expected
+    assert len(frontier) == len(expected)
+    for point in frontier:
+        assert IncrementalSimulation(EVENTS, point.solution).lgc == point.lgc
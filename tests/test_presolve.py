@@ -0,0 +1,78 @@
+from typing import Optional
+
+import pulp
+import pytest
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.events import Choice, Event, Lgc, TtdDate, TtdMonth
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.milp import create_milp, extract_solution
+from ttdlgc.presolve import presolve
+from ttdlgc.rules import CONSTRAINT_THRESHOLDS, GOAL_ALIGNMENTS, Constraint, Goal
+from ttdlgc.solvers import solve_problem
+
+EVENTS = [
+    *generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9)),
+    # Two options that are the same, so one of them can be merged away
+    Event(
+        chapter=3,
+        date=TtdDate(month=TtdMonth.October, day=30),
+        name="Duplicate options",
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=None,
+        choices=(
+            Choice(name="First", impact=Lgc(law=5, grey=0, chaos=0)),
+            Choice(name="Second", impact=Lgc(law=5, grey=0, chaos=0)),
+            Choice(name="Third", impact=Lgc(law=0, grey=3, chaos=3)),
+        ),
+    ),
+]
+
+QUERIES = [
+    [],
+    [Constraint.LawLv4AtEnd],
+    [Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv4AtEnd, Constraint.ChaosLv4AtEnd],
+    [Constraint.LawLv5AtEnd, Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv5AtEnd, Constraint.ChaosLv5AtEnd],
+]
+
+
+@pytest.mark.parametrize("constraints", QUERIES)
+@pytest.mark.parametrize("goal", [None, *Goal])
+def test_presolved_model_agrees_with_the_full_model(
+    constraints: list[Constraint], goal: Optional[Goal]
+) -> None:
+    report = solve_problem(create_milp(EVENTS, constraints, goal))
+
+    presolved = presolve(EVENTS, constraints, goal)
+    assert len(presolved.events) < len(EVENTS)
+
+    problem = create_milp(presolved.events, constraints, goal)
+    presolved_report = solve_problem(problem)
+
+    assert presolved_report.status == report.status
+    if report.status != pulp.const.LpStatusOptimal:
+        return
+
+    assert presolved_report.objective == report.objective
+
+    # The restored plan is a plan for the original events
+    solution = presolved.restore(extract_solution(presolved.events, problem))
+    simulation = IncrementalSimulation(EVENTS, solution)
+    assert simulation.trajectory().route_requirement_met is True
+    for constraint in constraints:
+        alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+        assert getattr(simulation.lgc, alignment) >= level
+    if goal is not None:
+        assert getattr(simulation.lgc, GOAL_ALIGNMENTS[goal]) == report.objective
+
+
+def test_identical_options_are_merged() -> None:
+    presolved = presolve(EVENTS, [], Goal.MaximizeLaw)
+
+    assert presolved.report.merged_options >= 1
+    assert all(
+        len({choice.impact for choice in event.choices}) == len(event.choices)
+        for event in presolved.events
+    )
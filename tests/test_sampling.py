@@ -0,0 +1,106 @@
+from typing import Optional
+
+import collections
+import io
+import itertools
+
+import numpy as np
+
+from ttdlgc.batch_simulation import ROUTES
+from ttdlgc.events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.rules import ALIGNMENTS, LAST_CHAPTER, ROUTE_REQUIREMENTS
+from ttdlgc.sampling import sample
+
+
+def event(
+    chapter: int,
+    name: str,
+    impacts: tuple[Lgc, ...],
+    completion: Lgc = Lgc(0, 0, 0),
+    required_route: Optional[Route] = None,
+) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=completion,
+        required_route=required_route,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=impact)
+            for o, impact in enumerate(impacts)
+        ),
+    )
+
+
+EVENTS = [
+    event(1, "a", (Lgc(60, 0, 0), Lgc(0, 50, 0))),
+    event(2, "b", (), completion=Lgc(1, 1, 1)),
+    event(3, "c", (Lgc(0, 0, 7), Lgc(3, 3, 0), Lgc(0, 0, 0))),
+    event(6, "d", (Lgc(20, 0, 0), Lgc(0, 0, 20)), required_route=Route.Law),
+]
+
+
+# Fractions of the plans with each alignment value at the end of each chapter, and
+# of the plans meeting each route's requirement, when every option is equally likely
+def exact_distribution() -> tuple[dict[tuple[int, int, int, int], float], list[float]]:
+    plans = list(itertools.product(range(2), range(3), range(2)))
+
+    counts: collections.Counter[tuple[int, int, int, int]] = collections.Counter()
+    eligible = [0.0] * len(ROUTES)
+    for r, route in enumerate(ROUTES):
+        for a_option, c_option, d_option in plans:
+            simulation = IncrementalSimulation(EVENTS)
+            simulation.set_route(route)
+            simulation.choose(0, a_option)
+            simulation.choose(2, c_option)
+            simulation.choose(3, d_option)
+
+            for chapter in range(1, LAST_CHAPTER + 1):
+                lgc = simulation.lgc_at_chapter(chapter)
+                for a, alignment in enumerate(ALIGNMENTS):
+                    counts[r, chapter, a, getattr(lgc, alignment)] += 1
+
+            trajectory = simulation.trajectory()
+            if route in ROUTE_REQUIREMENTS and trajectory.route_requirement_met:
+                eligible[r] += 1 / len(plans)
+
+    return {key: count / len(plans) for key, count in counts.items()}, eligible
+
+
+def test_histograms_match_the_exact_distribution() -> None:
+    samples = 40_000
+    result = sample(EVENTS, samples, seed=3, processes=2)
+    expected, eligible = exact_distribution()
+
+    assert result.samples == samples
+    for r in range(len(ROUTES)):
+        for chapter in range(1, LAST_CHAPTER + 1):
+            for a in range(len(ALIGNMENTS)):
+                histogram = result.histograms[r, chapter - 1, a]
+                assert histogram.sum() == samples
+
+                for v in np.nonzero(histogram)[0]:
+                    value = int(v) + result.lower
+                    fraction = histogram[v] / samples
+                    assert abs(fraction - expected.pop((r, chapter, a, value))) < 0.02
+
+        assert abs(result.eligible[r] / samples - eligible[r]) < 0.02
+
+    # Every value that's possible was sampled
+    assert expected == {}
+
+
+def test_sampling_is_reproducible_and_independent_of_chunking() -> None:
+    whole = sample(EVENTS, 5_000, seed=11, processes=2)
+    chunked = sample(EVENTS, 5_000, seed=11, processes=2, memory_budget=20_000)
+
+    assert (whole.histograms == chunked.histograms).all()
+    assert (whole.eligible == chunked.eligible).all()
+    assert (whole.eligible_constraints == chunked.eligible_constraints).all()
+
+    output_stream = io.StringIO()
+    whole.write_probabilities(output_stream)
+    rows = output_stream.getvalue().splitlines()
+    assert "Law,5,RouteRequirement," + str(whole.eligible[0] / 5_000) in rows
+    assert any(row.startswith("Grey,7,ChaosLv5,") for row in rows)
@@ -0,0 +1,114 @@
+from typing import Any
+
+import io
+import json
+
+from ttdlgc.events import Choice, Event, Lgc, TtdDate, TtdMonth
+from ttdlgc.server import Server
+
+
+def event(chapter: int, name: str, impacts: tuple[Lgc, ...]) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=None,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=impact)
+            for o, impact in enumerate(impacts)
+        ),
+    )
+
+
+# Each event raises two of the three alignments. Level 5 of all three at once needs
+# every event to raise chaos, but then law or grey falls short, which the precheck
+# doesn't see.
+EVENTS = [
+    event(1, name, (Lgc(60, 50, 0), Lgc(60, 0, 37), Lgc(0, 50, 37)))
+    for name in ("a", "b", "c")
+]
+
+
+def serve(requests: list[Any]) -> dict[Any, dict[str, Any]]:
+    input_stream = io.StringIO(
+        "".join(
+            (request if isinstance(request, str) else json.dumps(request)) + "\n"
+            for request in requests
+        )
+    )
+    output_stream = io.StringIO()
+    Server(EVENTS, processes=2).serve_stream(input_stream, output_stream)
+
+    responses = [json.loads(line) for line in output_stream.getvalue().splitlines()]
+    assert len(responses) == len(requests)
+
+    return {response.get("id"): response for response in responses}
+
+
+def test_solve_and_simulate() -> None:
+    responses = serve(
+        [
+            {"id": 1, "command": "solve", "goal": "MaximizeLaw"},
+            {
+                "id": 2,
+                "command": "simulate",
+                "route": "Law",
+                "choices": [["a", 0], ["b", 0], ["c", 2]],
+            },
+        ]
+    )
+
+    assert responses[1]["status"] == "Optimal"
+    assert responses[1]["route"] == "Law"
+    assert responses[1]["lgc"]["law"] == 180
+    assert responses[2] == {"id": 2, "lgc": {"law": 120, "grey": 150, "chaos": 37}}
+
+
+def test_infeasible_solve_has_no_plan() -> None:
+    responses = serve(
+        [
+            {
+                "id": 1,
+                "command": "solve",
+                "constraints": ["LawLv5AtEnd", "GreyLv5AtEnd", "ChaosLv5AtEnd"],
+                "goal": None,
+            }
+        ]
+    )
+
+    assert responses[1] == {"id": 1, "status": "Infeasible"}
+
+
+def test_invalid_requests_are_answered_with_errors() -> None:
+    # Plans that would be valid but for the option of "a"
+    def simulate(request_id: int, option: Any) -> dict[str, Any]:
+        return {
+            "id": request_id,
+            "command": "simulate",
+            "route": "Law",
+            "choices": [["a", option], ["b", 0], ["c", 0]],
+        }
+
+    responses = serve(
+        [
+            simulate(1, True),
+            simulate(2, 3),
+            simulate(3, -1),
+            simulate(4, 0.0),
+            {
+                "id": 5,
+                "command": "simulate",
+                "route": "Law",
+                "choices": [["d", 0], ["b", 0], ["c", 0]],
+            },
+            {"id": 6, "command": "optimize"},
+            {"id": 7, "command": "solve", "constraints": ["LawLv9AtEnd"]},
+            "[1, 2",
+        ]
+    )
+
+    assert set(responses) == {1, 2, 3, 4, 5, 6, 7, None}
+    for response in responses.values():
+        assert "error" in response
+        assert "lgc" not in response
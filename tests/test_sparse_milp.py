@@ -0,0 +1,72 @@
+from typing import Optional
+
+import pulp
+import pytest
+
+from benchmarks.synthetic import generate_events, SyntheticConfig
+from ttdlgc.events import EventIndex
+from ttdlgc.incremental_simulation import IncrementalSimulation
+from ttdlgc.milp import ModelSize, create_milp
+from ttdlgc.rules import CONSTRAINT_THRESHOLDS, GOAL_ALIGNMENTS, Constraint, Goal
+from ttdlgc.solvers import solve_problem
+from ttdlgc.sparse_milp import create_base_sparse_milp, create_sparse_milp
+
+EVENTS = generate_events(SyntheticConfig(events_per_chapter=2, max_impact=30, seed=9))
+
+QUERIES = [
+    [],
+    [Constraint.LawLv4AtEnd],
+    [Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv4AtEnd, Constraint.ChaosLv4AtEnd],
+    [Constraint.LawLv5AtEnd, Constraint.ChaosLv5AtEnd],
+    [Constraint.GreyLv5AtEnd, Constraint.ChaosLv5AtEnd],
+]
+
+
+@pytest.mark.parametrize("constraints", QUERIES)
+@pytest.mark.parametrize("goal", [None, *Goal])
+def test_agrees_with_the_pulp_model(
+    constraints: list[Constraint], goal: Optional[Goal]
+) -> None:
+    problem = create_milp(EVENTS, constraints, goal)
+    model = create_sparse_milp(EVENTS, constraints, goal)
+    assert model.size() == ModelSize.from_problem(problem)
+
+    report = solve_problem(problem)
+
+    sparse_report, values = model.solve()
+    assert sparse_report.status == report.status
+    if report.status != pulp.const.LpStatusOptimal:
+        return
+
+    assert sparse_report.objective == report.objective
+
+    simulation = IncrementalSimulation(EVENTS, model.extract_solution(EVENTS, values))
+    assert simulation.trajectory().route_requirement_met is True
+    for constraint in constraints:
+        alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+        assert getattr(simulation.lgc, alignment) >= level
+    if goal is not None:
+        assert getattr(simulation.lgc, GOAL_ALIGNMENTS[goal]) == report.objective
+
+
+# Queries are added to copies, so one base model can answer them all
+def test_queries_leave_the_base_model_unchanged() -> None:
+    base = create_base_sparse_milp(EVENTS)
+    size = base.size()
+    index = EventIndex(EVENTS)
+
+    for goal in Goal:
+        for constraints in QUERIES:
+            model = base.with_query(constraints, goal)
+            report, values = model.solve()
+            expected = create_sparse_milp(EVENTS, constraints, goal).solve()[0]
+
+            assert (report.status, report.objective) == (
+                expected.status,
+                expected.objective,
+            )
+            if report.has_solution:
+                IncrementalSimulation(EVENTS, model.extract_solution(index, values))
+
+    assert base.size() == size
@@ -0,0 +1,46 @@
+import pathlib
+
+from ttdlgc.event_table import EventTable
+from ttdlgc.events import Choice, Event, Lgc, TtdDate, TtdMonth
+from ttdlgc.rules import LAW_LEVEL_3
+from ttdlgc.validation import check_solutions
+
+
+def event(chapter: int, name: str, choice_laws: tuple[int, ...]) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=None,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=Lgc(law=choice_law, grey=0, chaos=0))
+            for o, choice_law in enumerate(choice_laws)
+        ),
+    )
+
+
+def test_solutions_off_their_route_or_with_unknown_events_are_invalid(
+    tmp_path: pathlib.Path,
+) -> None:
+    table = EventTable.from_events([event(1, "a", (LAW_LEVEL_3, 0))])
+
+    contents = {
+        "law.csv": "name,choice\nRoute,Law\na,0\n",
+        "unmet.csv": "name,choice\nRoute,Law\na,1\n",
+        "unknown.csv": "name,choice\nRoute,Law\na,0\nb,0\n",
+    }
+    for filename, content in contents.items():
+        (tmp_path / filename).write_text(content, encoding="utf8")
+
+    checks = {
+        check.filepath.name: check
+        for check in check_solutions(
+            table, sorted(tmp_path / filename for filename in contents), processes=1
+        )
+    }
+
+    assert checks["law.csv"].valid
+    assert not checks["unmet.csv"].valid
+    assert not checks["unknown.csv"].valid
+    assert checks["unknown.csv"].unknown_events == ("b",)
@@ -0,0 +1,75 @@
+from typing import Optional
+
+import pulp
+
+from ttdlgc.events import Choice, Event, Lgc, Route, Solution, TtdDate, TtdMonth
+from ttdlgc.rules import Goal
+from ttdlgc.simulation import Simulation
+from ttdlgc.what_if import Edits, WhatIf
+
+
+def event(
+    chapter: int,
+    name: str,
+    impacts: tuple[Lgc, ...],
+    required_route: Optional[Route] = None,
+) -> Event:
+    return Event(
+        chapter=chapter,
+        date=TtdDate(month=TtdMonth.September, day=chapter),
+        name=name,
+        completion=Lgc(law=0, grey=0, chaos=0),
+        required_route=required_route,
+        choices=tuple(
+            Choice(name=f"{name} {o}", impact=impact)
+            for o, impact in enumerate(impacts)
+        ),
+    )
+
+
+# Only the first option of "a" reaches the Law route, which every plan has to take
+A = event(1, "a", (Lgc(60, 0, 0), Lgc(0, 0, 0)))
+B = event(6, "b", (Lgc(10, 0, 0), Lgc(0, 0, 0)), Route.Law)
+C = event(6, "c", (Lgc(5, 0, 0), Lgc(0, 5, 0)))
+EVENTS = [A, B, C]
+
+OPTIMUM = Solution(choices=[(A, 0), (B, 0), (C, 0)], route=Route.Law)
+
+
+def final_lgc(solution: Solution) -> Lgc:
+    simulation = Simulation(EVENTS)
+    simulation.apply_solution(solution)
+
+    return simulation.lgc
+
+
+def test_pinned_choice_is_kept_and_the_rest_reoptimized() -> None:
+    status, solution, delta = WhatIf(EVENTS, [], Goal.MaximizeLaw).resolve(
+        OPTIMUM, Edits(pinned_choices=[(B, 1)])
+    )
+
+    assert status == pulp.const.LpStatusOptimal
+    assert final_lgc(solution) == Lgc(65, 0, 0)
+    assert delta.route is None
+    assert delta.choices == [(B, 0, 1)]
+
+
+def test_without_a_goal_as_much_of_the_plan_as_possible_is_kept() -> None:
+    _, solution, delta = WhatIf(EVENTS, [], None).resolve(
+        OPTIMUM, Edits(forbidden_choices=[(C, 0)])
+    )
+
+    assert delta.choices == [(C, 0, 1)]
+    assert final_lgc(solution) == Lgc(70, 5, 0)
+
+
+def test_edits_are_undone_between_resolves() -> None:
+    what_if = WhatIf(EVENTS, [], Goal.MaximizeLaw)
+
+    status, _, _ = what_if.resolve(OPTIMUM, Edits(pinned_route=Route.Grey))
+    assert status == pulp.const.LpStatusInfeasible
+
+    status, solution, delta = what_if.resolve(OPTIMUM, Edits())
+    assert status == pulp.const.LpStatusOptimal
+    assert delta.route is None and delta.choices == []
+    assert final_lgc(solution) == Lgc(75, 0, 0)
@@ -1 +1,12 @@
-from .main import main_without_args as main_without_args
+from typing import Any
+
+
+# The CLI is only imported when it's used, so that importing the library modules
+# doesn't also import typer
+def __getattr__(name: str) -> Any:
+    if name == "main_without_args":
+        from .main import main_without_args
+
+        return main_without_args
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,195 @@
+from dataclasses import dataclass
+from typing import IO, Iterable, Optional
+
+import concurrent.futures
+import csv
+import itertools
+import pathlib
+
+import pulp
+
+from .bounds import precheck
+from .events import Event, Lgc
+from .milp import create_milp, extract_solution
+from .rules import Constraint, Goal
+from .simulation import Simulation
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+from .workers import shared, worker_pool
+
+Combination = tuple[tuple[Constraint, ...], Optional[Goal]]
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    constraints: tuple[Constraint, ...]
+    goal: Optional[Goal]
+    status: int
+    # Whether the solution is proven optimal, or only feasible
+    solution_status: int
+    # Bound on the goal's objective proven by the solver
+    bound: Optional[float]
+    lgc: Optional[Lgc]
+    solution_filepath: Optional[pathlib.Path]
+
+    @property
+    def feasible(self) -> bool:
+        return bool(self.status == pulp.const.LpStatusOptimal)
+
+
+def parse_constraint_set(string: str) -> tuple[Constraint, ...]:
+    constraints = []
+    for part in string.split(","):
+        name = part.strip()
+        if not name:
+            continue
+
+        try:
+            constraints.append(Constraint(name))
+        except ValueError:
+            choices = ", ".join(f"'{c.value}'" for c in Constraint)
+            raise ValueError(f"'{name}' is not one of {choices}.") from None
+
+    return tuple(constraints)
+
+
+def all_constraint_sets() -> list[tuple[Constraint, ...]]:
+    return [
+        constraints
+        for n in range(0, len(Constraint) + 1)
+        for constraints in itertools.combinations(Constraint, n)
+    ]
+
+
+def combinations(
+    constraint_sets: Iterable[tuple[Constraint, ...]],
+    goals: Iterable[Optional[Goal]],
+) -> list[Combination]:
+    return list(itertools.product(constraint_sets, goals))
+
+
+def combination_name(constraints: tuple[Constraint, ...], goal: Optional[Goal]) -> str:
+    constraints_name = (
+        "+".join(c.value for c in constraints)
+        if len(constraints) > 0
+        else "NoConstraints"
+    )
+    goal_name = goal.value if goal is not None else "NoGoal"
+
+    return f"{constraints_name}__{goal_name}"
+
+
+def solve_batch(
+    events: list[Event],
+    batch: Iterable[Combination],
+    output_directory: pathlib.Path,
+    processes: Optional[int] = None,
+    settings: SolverSettings = SolverSettings(),
+) -> list[BatchResult]:
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    with worker_pool(events, processes) as executor:
+        # Combinations that the precheck proves infeasible are never sent to a
+        # solver
+        results: list[BatchResult | concurrent.futures.Future[BatchResult]] = []
+        for constraints, goal in batch:
+            if not precheck(events, constraints).feasible:
+                results.append(
+                    BatchResult(
+                        constraints,
+                        goal,
+                        pulp.const.LpStatusInfeasible,
+                        pulp.const.LpSolutionInfeasible,
+                        None,
+                        None,
+                        None,
+                    )
+                )
+            else:
+                results.append(
+                    executor.submit(
+                        _solve_combination,
+                        constraints,
+                        goal,
+                        output_directory,
+                        settings,
+                    )
+                )
+
+        return [
+            result if isinstance(result, BatchResult) else result.result()
+            for result in results
+        ]
+
+
+def write_summary(results: Iterable[BatchResult], output_stream: IO[str]) -> None:
+    writer = csv.DictWriter(
+        output_stream,
+        fieldnames=[
+            "constraints",
+            "goal",
+            "feasible",
+            "solution_status",
+            "bound",
+            "law",
+            "grey",
+            "chaos",
+            "solution_filepath",
+        ],
+    )
+
+    writer.writeheader()
+    for result in results:
+        writer.writerow(
+            {
+                "constraints": ",".join(c.value for c in result.constraints),
+                "goal": result.goal.value if result.goal is not None else "",
+                "feasible": result.feasible,
+                "solution_status": pulp.const.LpSolution[result.solution_status],
+                "bound": result.bound if result.bound is not None else "",
+                "law": result.lgc.law if result.lgc is not None else "",
+                "grey": result.lgc.grey if result.lgc is not None else "",
+                "chaos": result.lgc.chaos if result.lgc is not None else "",
+                "solution_filepath": (
+                    result.solution_filepath
+                    if result.solution_filepath is not None
+                    else ""
+                ),
+            }
+        )
+
+
+def _solve_combination(
+    constraints: tuple[Constraint, ...],
+    goal: Optional[Goal],
+    output_directory: pathlib.Path,
+    settings: SolverSettings,
+) -> BatchResult:
+    events: list[Event] = shared()
+
+    problem = create_milp(events, constraints, goal)
+    report = solve_problem(problem, settings)
+
+    if problem.status != pulp.const.LpStatusOptimal:
+        return BatchResult(
+            constraints, goal, report.status, report.solution_status, None, None, None
+        )
+
+    solution = extract_solution(events, problem)
+
+    solution_filepath = output_directory / f"{combination_name(constraints, goal)}.csv"
+    with open(solution_filepath, "w", encoding="utf8") as output_stream:
+        solution.write_csv(output_stream)
+
+    simulation = Simulation(events)
+    simulation.apply_solution(solution)
+
+    return BatchResult(
+        constraints,
+        goal,
+        report.status,
+        report.solution_status,
+        report.bound,
+        simulation.lgc,
+        solution_filepath,
+    )
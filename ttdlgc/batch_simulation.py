@@ -0,0 +1,164 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import numpy.typing as npt
+
+from .events import Event, EventIndex, Route, Solution
+from .rules import LAST_CHAPTER
+
+ROUTES = list(Route)
+
+
+@dataclass(frozen=True)
+class BatchSimulationResult:
+    # (solutions, chapters, 3) array of the (law, grey, chaos) totals at the end of
+    # each chapter
+    chapter_lgc: npt.NDArray[np.int64]
+
+    @property
+    def final_lgc(self) -> npt.NDArray[np.int64]:
+        return self.chapter_lgc[:, -1, :]
+
+
+# Simulates many solutions at once. The events are compiled into a matrix of option
+# impacts, so that simulating a batch of solutions is gathering the impacts of their
+# chosen options and summing them per chapter.
+class BatchSimulation:
+    def __init__(self, events: list[Event]) -> None:
+        self.events = events
+
+        # Events with choices, and the column of the first option of each
+        self.choice_events = [i for i, event in enumerate(events) if event.choices]
+        self.option_offsets = np.zeros(len(self.choice_events), dtype=np.int64)
+        self.option_counts = np.zeros(len(self.choice_events), dtype=np.int64)
+        self.num_options = 0
+        for j, i in enumerate(self.choice_events):
+            self.option_offsets[j] = self.num_options
+            self.option_counts[j] = len(events[i].choices)
+            self.num_options += len(events[i].choices)
+
+        self.index = EventIndex(events)
+        self.choice_columns = {i: j for j, i in enumerate(self.choice_events)}
+
+        # Completion impacts per route and chapter
+        self.completions = np.zeros((len(ROUTES), LAST_CHAPTER, 3), dtype=np.int64)
+        # Law, grey and chaos impacts of each option, with a last column of zeros for
+        # events that aren't taken
+        self.option_impacts = np.zeros((3, self.num_options + 1), dtype=np.int32)
+        # Columns of the events with choices ordered by chapter, so that the impacts
+        # of each chapter can be summed as one slice. chapter_starts is where each of
+        # the chapters in impact_chapters starts.
+        self.chapter_order = np.array(
+            sorted(
+                (
+                    j
+                    for j, i in enumerate(self.choice_events)
+                    if 1 <= events[i].chapter <= LAST_CHAPTER
+                ),
+                key=lambda j: events[self.choice_events[j]].chapter,
+            ),
+            dtype=np.int64,
+        )
+        self.impact_chapters, self.chapter_starts = np.unique(
+            np.array(
+                [events[self.choice_events[j]].chapter - 1 for j in self.chapter_order],
+                dtype=np.int64,
+            ),
+            return_index=True,
+        )
+        # Whether each event with choices is taken on each route
+        self.event_routes = np.zeros(
+            (len(ROUTES), len(self.choice_events)), dtype=np.bool_
+        )
+
+        column = 0
+        for i, event in enumerate(events):
+            routes = [
+                r
+                for r, route in enumerate(ROUTES)
+                if event.required_route is None or event.required_route == route
+            ]
+
+            if 1 <= event.chapter <= LAST_CHAPTER:
+                self.completions[routes, event.chapter - 1, :] += [
+                    event.completion.law,
+                    event.completion.grey,
+                    event.completion.chaos,
+                ]
+
+            if i in self.choice_columns:
+                self.event_routes[routes, self.choice_columns[i]] = True
+
+            for choice in event.choices:
+                self.option_impacts[:, column] = [
+                    choice.impact.law,
+                    choice.impact.grey,
+                    choice.impact.chaos,
+                ]
+                column += 1
+
+    # Roughly how much memory simulate_encoded uses per solution: the masks, the
+    # columns of the chosen options and their impacts on one alignment, and the
+    # totals per chapter
+    @property
+    def bytes_per_solution(self) -> int:
+        return len(self.choice_events) * (3 + 3 * 8 + 4) + 3 * LAST_CHAPTER * 3 * 8
+
+    # Encodes solutions as a (solutions, events with choices) array of option
+    # indices, with -1 for events not taken on the solution's route, and an array of
+    # indices into ROUTES
+    def encode(
+        self, solutions: Iterable[Solution]
+    ) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        solutions = list(solutions)
+
+        options = np.full((len(solutions), len(self.choice_events)), -1, np.int64)
+        routes = np.zeros(len(solutions), dtype=np.int64)
+        for s, solution in enumerate(solutions):
+            routes[s] = ROUTES.index(solution.route)
+
+            for event, choice_index in solution.choices:
+                j = self.choice_columns[self.index.position(event)]
+                options[s, j] = choice_index
+
+        return options, routes
+
+    def simulate(self, solutions: Iterable[Solution]) -> BatchSimulationResult:
+        return self.simulate_encoded(*self.encode(solutions))
+
+    def simulate_encoded(
+        self, options: npt.NDArray[np.int64], routes: npt.NDArray[np.int64]
+    ) -> BatchSimulationResult:
+        reachable = self.event_routes[routes]
+        missing = (options < 0) & reachable
+        if missing.any():
+            s, j = np.argwhere(missing)[0]
+            raise ValueError(
+                f"Failed to find event in solution {s}: {self.events[self.choice_events[j]]}"
+            )
+
+        # An option past the event's last one would land in the next event's columns
+        invalid = (options < -1) | (options >= self.option_counts)
+        if invalid.any():
+            s, j = np.argwhere(invalid)[0]
+            raise ValueError(
+                f"Option {options[s, j]} in solution {s} is out of range for event with {self.option_counts[j]} choices: {self.events[self.choice_events[j]]}"
+            )
+
+        # Column of each chosen option, or the column of zeros for events not taken
+        columns = np.where(
+            (options >= 0) & reachable, self.option_offsets + options, self.num_options
+        )[:, self.chapter_order]
+
+        chapter_deltas = self.completions[routes]
+        if len(self.chapter_order) > 0:
+            for a in range(3):
+                chapter_deltas[:, self.impact_chapters, a] += np.add.reduceat(
+                    self.option_impacts[a][columns],
+                    self.chapter_starts,
+                    axis=1,
+                    dtype=np.int64,
+                )
+
+        return BatchSimulationResult(chapter_lgc=np.cumsum(chapter_deltas, axis=1))
@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import itertools
+
+from .event_table import EventTable
+from .events import Event, Route
+from .rules import (
+    ALIGNMENTS,
+    CONSTRAINT_THRESHOLDS,
+    LAST_CHAPTER,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+)
+
+# Lowest and highest value of each alignment at the end of each chapter
+ChapterBounds = dict[str, list[tuple[int, int]]]
+
+
+# A lower bound that a plan has to reach on an alignment by the end of a chapter
+@dataclass(frozen=True)
+class Target:
+    name: str
+    alignment: str
+    chapter: int
+    threshold: int
+
+
+@dataclass(frozen=True)
+class Precheck:
+    # Routes that weren't proven to be infeasible
+    routes: tuple[Route, ...]
+    # Why each of the other routes is infeasible
+    reasons: tuple[str, ...]
+
+    @property
+    def feasible(self) -> bool:
+        return len(self.routes) > 0
+
+
+# Bounds on the alignments at the end of each chapter, from picking the lowest or
+# highest option of every event independently. Without a route, the bounds cover
+# all of the routes.
+def chapter_bounds(
+    events: list[Event] | EventTable, route: Optional[Route] = None
+) -> ChapterBounds:
+    table = EventTable.of(events)
+    routes = [route] if route is not None else list(Route)
+
+    lowest: dict[str, list[int]] = {}
+    highest: dict[str, list[int]] = {}
+    for candidate in routes:
+        route_lowest, route_highest = _chapter_deltas(table, candidate)
+        for alignment in ALIGNMENTS:
+            low = list(itertools.accumulate(route_lowest[alignment]))
+            high = list(itertools.accumulate(route_highest[alignment]))
+            if alignment not in lowest:
+                lowest[alignment] = low
+                highest[alignment] = high
+            else:
+                lowest[alignment] = list(map(min, lowest[alignment], low))
+                highest[alignment] = list(map(max, highest[alignment], high))
+
+    return {
+        alignment: list(zip(lowest[alignment], highest[alignment]))
+        for alignment in ALIGNMENTS
+    }
+
+
+# Checks each route against the constraints and its own requirement at the end of
+# chapter 5, without solving. Alignments are bounded separately and then in sums of
+# several targets, since choices that raise one alignment usually don't raise the
+# others. Passing the precheck doesn't guarantee that a route is feasible.
+def precheck(
+    events: list[Event] | EventTable,
+    constraints: Iterable[Constraint],
+    route: Optional[Route] = None,
+) -> Precheck:
+    table = EventTable.of(events)
+
+    # Only the highest threshold on each alignment matters
+    end_targets: dict[str, Target] = {}
+    for constraint in constraints:
+        alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+        if alignment not in end_targets or level > end_targets[alignment].threshold:
+            end_targets[alignment] = Target(
+                constraint.value, alignment, LAST_CHAPTER, level
+            )
+
+    routes = []
+    reasons = []
+    for candidate in [route] if route is not None else list(Route):
+        if candidate not in ROUTE_REQUIREMENTS:
+            reasons.append(f"{candidate.name} route: not modelled")
+            continue
+
+        alignment, level = ROUTE_REQUIREMENTS[candidate]
+        targets = [
+            Target(
+                f"{candidate.name} route requirement",
+                alignment,
+                ROUTE_REQUIREMENT_CHAPTER,
+                level,
+            ),
+            *end_targets.values(),
+        ]
+
+        reason = _unreachable_targets(table, candidate, targets)
+        if reason is None:
+            routes.append(candidate)
+        else:
+            reasons.append(f"{candidate.name} route: {reason}")
+
+    return Precheck(routes=tuple(routes), reasons=tuple(reasons))
+
+
+def _applies(table: EventTable, i: int, route: Route) -> bool:
+    return table.applies(i, route) and 1 <= table.chapters[i] <= LAST_CHAPTER
+
+
+def _chapter_deltas(
+    table: EventTable, route: Route
+) -> tuple[dict[str, list[int]], dict[str, list[int]]]:
+    lowest = {alignment: [0] * LAST_CHAPTER for alignment in ALIGNMENTS}
+    highest = {alignment: [0] * LAST_CHAPTER for alignment in ALIGNMENTS}
+
+    for i in range(len(table)):
+        if not _applies(table, i, route):
+            continue
+
+        chapter = table.chapters[i]
+        choices = range(table.choice_starts[i], table.choice_starts[i + 1])
+        for a, alignment in enumerate(ALIGNMENTS):
+            impacts = [table.impacts[3 * c + a] for c in choices]
+            completion = table.completions[3 * i + a]
+
+            lowest[alignment][chapter - 1] += completion + min(impacts, default=0)
+            highest[alignment][chapter - 1] += completion + max(impacts, default=0)
+
+    return lowest, highest
+
+
+# Finds the smallest set of targets whose thresholds add up to more than the most
+# that their alignments can add up to, and explains it
+def _unreachable_targets(
+    table: EventTable, route: Route, targets: list[Target]
+) -> Optional[str]:
+    # Events without choices always add the same, so only sum them up once
+    constants = {alignment: [0] * LAST_CHAPTER for alignment in ALIGNMENTS}
+    choice_events = []
+    for i in range(len(table)):
+        if not _applies(table, i, route):
+            continue
+
+        if table.choice_count(i) == 0:
+            for a, alignment in enumerate(ALIGNMENTS):
+                constants[alignment][table.chapters[i] - 1] += table.completions[
+                    3 * i + a
+                ]
+        else:
+            choice_events.append(i)
+
+    offsets = {alignment: a for a, alignment in enumerate(ALIGNMENTS)}
+
+    for size in range(1, len(targets) + 1):
+        for subset in itertools.combinations(targets, size):
+            reachable = sum(
+                sum(constants[target.alignment][: target.chapter]) for target in subset
+            )
+            for i in choice_events:
+                counted = [
+                    offsets[target.alignment]
+                    for target in subset
+                    if table.chapters[i] <= target.chapter
+                ]
+                if len(counted) == 0:
+                    continue
+
+                reachable += sum(table.completions[3 * i + a] for a in counted)
+                reachable += max(
+                    sum(table.impacts[3 * c + a] for a in counted)
+                    for c in range(table.choice_starts[i], table.choice_starts[i + 1])
+                )
+
+            needed = sum(target.threshold for target in subset)
+            if reachable < needed:
+                return _explain(subset, needed, reachable)
+
+    return None
+
+
+def _explain(targets: tuple[Target, ...], needed: int, reachable: int) -> str:
+    names = " and ".join(target.name for target in targets)
+
+    chapters = {target.chapter for target in targets}
+    if len(chapters) == 1:
+        total = " + ".join(target.alignment for target in targets)
+        total += f" at the end of chapter {chapters.pop()}"
+    else:
+        total = " + ".join(
+            f"{target.alignment} at the end of chapter {target.chapter}"
+            for target in targets
+        )
+
+    verb = "needs" if len(targets) == 1 else "need"
+
+    return f"{names} {verb} {total} >= {needed}, but at most {reachable} is reachable"
@@ -0,0 +1,201 @@
+from typing import BinaryIO, Iterable, Iterator
+
+import array
+import os
+import pathlib
+import struct
+import tempfile
+
+from .event_table import EventTable, NO_OPTION, TableSolution
+from .events import Route, Solution
+
+# Many solutions for the same events stored in a single file, as a fixed size record
+# per solution, so that plans don't need a file each and are read without looking
+# up any event names. The file is tied to the events it was written for by their
+# digest, as the records are only meaningful for the same events in the same order.
+#
+# Layout:
+#   header: magic, version, events digest, number of events with choices
+#   records: route value, then the picked option of each event with choices in the
+#            order of the events (int8, NO_OPTION when not on the route)
+#
+# Every event with choices on a solution's route must have one of its options picked,
+# both when writing and when reading, so a bundle only ever holds whole solutions.
+MAGIC = b"TTDPLN\x00"
+VERSION = 1
+
+_HEADER = struct.Struct("<7sI32sI")
+
+# Options are stored as int8
+_MAX_OPTION = 127
+
+_ROUTES_BY_VALUE = {route.value: route for route in Route}
+
+
+# Writes solutions to a bundle one at a time, so that they can be written as they're
+# produced
+class BundleWriter:
+    def __init__(self, table: EventTable, output_stream: BinaryIO) -> None:
+        self.table = table
+        self.output_stream = output_stream
+        self.choice_events = _choice_events(table)
+        self.positions: dict[Route, dict[str, int]] = {}
+        self.count = 0
+
+        output_stream.write(
+            _HEADER.pack(MAGIC, VERSION, table.digest(), len(self.choice_events))
+        )
+
+    def write(self, solution: Solution | TableSolution) -> None:
+        if isinstance(solution, Solution):
+            solution = self.__to_table_solution(solution)
+
+        record = array.array("b", [solution.route.value])
+        for i in self.choice_events:
+            if not self.table.applies(i, solution.route):
+                record.append(NO_OPTION)
+                continue
+
+            option = solution.options[i]
+            _check_option(self.table, i, option)
+            if option > _MAX_OPTION:
+                raise ValueError(
+                    f"Option {option} of event {self.table.names[i]} doesn't fit in a bundle"
+                )
+            record.append(option)
+
+        self.output_stream.write(record.tobytes())
+        self.count += 1
+
+    def __to_table_solution(self, solution: Solution) -> TableSolution:
+        positions = self.positions.get(solution.route)
+        if positions is None:
+            positions = self.positions[solution.route] = self.table.positions(
+                solution.route
+            )
+
+        options = array.array("i", [NO_OPTION]) * len(self.table)
+        for event, option in solution.choices:
+            i = positions.get(event.name)
+            if i is None:
+                raise ValueError(
+                    f"Event {event.name} isn't on the {solution.route.name} route"
+                )
+            options[i] = option
+
+        return TableSolution(route=solution.route, options=options)
+
+
+# Reads the solutions in a bundle one at a time, so that large bundles are never
+# loaded into memory at once
+def read_bundle(table: EventTable, input_stream: BinaryIO) -> Iterator[TableSolution]:
+    header = input_stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise ValueError("File is too short to be a bundle")
+
+    magic, version, digest, num_choice_events = _HEADER.unpack(header)
+    if (magic, version) != (MAGIC, VERSION):
+        raise ValueError("File isn't a bundle of a supported version")
+
+    choice_events = _choice_events(table)
+    if digest != table.digest() or num_choice_events != len(choice_events):
+        raise ValueError("Bundle was written for different events")
+
+    record_size = 1 + num_choice_events
+    while True:
+        record = input_stream.read(record_size)
+        if len(record) == 0:
+            return
+        if len(record) < record_size:
+            raise ValueError("Bundle ends with a partially written solution")
+
+        values = array.array("b", record)
+        route = _ROUTES_BY_VALUE.get(values[0])
+        if route is None:
+            raise ValueError(f"Unknown route value in bundle: {values[0]}")
+
+        options = array.array("i", [NO_OPTION]) * len(table)
+        for i, option in zip(choice_events, values[1:]):
+            if not table.applies(i, route):
+                if option != NO_OPTION:
+                    raise ValueError(
+                        f"Bundle picks option {option} of event {table.names[i]}, which isn't on the {route.name} route"
+                    )
+                continue
+
+            _check_option(table, i, option)
+            options[i] = option
+
+        yield TableSolution(route=route, options=options)
+
+
+def write_bundle(
+    table: EventTable,
+    solutions: Iterable[Solution | TableSolution],
+    output_stream: BinaryIO,
+) -> int:
+    writer = BundleWriter(table, output_stream)
+    for solution in solutions:
+        writer.write(solution)
+
+    return writer.count
+
+
+# Converts solution CSV files into a bundle. The bundle is written to a temporary
+# file next to it first, so that a failure never leaves a partial bundle behind.
+def bundle_csvs(
+    table: EventTable, filepaths: Iterable[pathlib.Path], output_filepath: pathlib.Path
+) -> int:
+    descriptor, temporary_filepath = tempfile.mkstemp(
+        dir=output_filepath.parent, suffix=".tmp"
+    )
+    try:
+        with open(descriptor, "wb") as output_stream:
+            writer = BundleWriter(table, output_stream)
+            for filepath in filepaths:
+                try:
+                    with open(filepath, "r", encoding="utf8") as input_stream:
+                        writer.write(TableSolution.from_csv(table, input_stream))
+                except ValueError as e:
+                    raise ValueError(f"{filepath}: {e}") from e
+
+        os.replace(temporary_filepath, output_filepath)
+    except BaseException:
+        os.unlink(temporary_filepath)
+        raise
+
+    return writer.count
+
+
+# Converts a bundle back into a solution CSV file per solution, named by their
+# position in the bundle
+def unbundle_csvs(
+    table: EventTable,
+    input_stream: BinaryIO,
+    output_directory: pathlib.Path,
+) -> list[pathlib.Path]:
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    filepaths = []
+    for n, solution in enumerate(read_bundle(table, input_stream), start=1):
+        filepath = output_directory / f"solution_{n:06d}.csv"
+        with open(filepath, "w", encoding="utf8") as output_stream:
+            solution.write_csv(table, output_stream)
+        filepaths.append(filepath)
+
+    return filepaths
+
+
+def _choice_events(table: EventTable) -> list[int]:
+    return [i for i in range(len(table)) if table.choice_count(i) > 0]
+
+
+def _check_option(table: EventTable, i: int, option: int) -> None:
+    if option == NO_OPTION:
+        raise ValueError(f"Failed to find event: {table.names[i]}")
+
+    count = table.choice_count(i)
+    if not 0 <= option < count:
+        raise ValueError(
+            f"Event {table.names[i]} has no option {option}, it has {count}"
+        )
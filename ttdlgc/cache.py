@@ -0,0 +1,167 @@
+from typing import Iterable, Optional
+
+import hashlib
+import json
+import os
+import pathlib
+import tempfile
+
+from .events import Event, EventIndex, Route, Solution
+from .rules import Constraint, Goal
+
+DEFAULT_MAX_ENTRIES = 1000
+
+# pulp's LpStatusOptimal and LpStatusInfeasible, which are the only outcomes that
+# are worth caching. pulp isn't imported so that the cache stays cheap to import.
+STATUS_OPTIMAL = 1
+STATUS_INFEASIBLE = -1
+
+
+def default_cache_directory() -> pathlib.Path:
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home is None:
+        return pathlib.Path.home() / ".cache" / "ttdlgc"
+
+    return pathlib.Path(cache_home) / "ttdlgc"
+
+
+def events_hash(events: list[Event]) -> str:
+    canonical = [
+        [
+            event.chapter,
+            event.date.month.value,
+            event.date.day,
+            event.name,
+            [event.completion.law, event.completion.grey, event.completion.chaos],
+            event.required_route.name if event.required_route is not None else None,
+            [
+                [
+                    choice.name,
+                    choice.impact.law,
+                    choice.impact.grey,
+                    choice.impact.chaos,
+                ]
+                for choice in event.choices
+            ],
+        ]
+        for event in events
+    ]
+
+    return hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()
+
+
+def solve_key(
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    settings: str,
+) -> str:
+    key = json.dumps(
+        [
+            events_hash(events),
+            sorted(constraint.value for constraint in constraints),
+            goal.value if goal is not None else None,
+            settings,
+        ]
+    )
+
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+# Solutions and solver statuses stored on disk as one JSON file per key. Only
+# optimal solutions and proven infeasibility are stored, since any other result may
+# change on another run. Reading an entry refreshes its modification time, and the
+# least recently used entries are removed once there are more than max_entries.
+class SolveCache:
+    def __init__(
+        self, directory: pathlib.Path, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.directory = directory
+        self.max_entries = max_entries
+
+    # The status and, unless it's infeasible, the solution. Unreadable or malformed
+    # entries are treated as misses.
+    def get(
+        self, key: str, events: list[Event]
+    ) -> Optional[tuple[int, Optional[Solution]]]:
+        filepath = self.__filepath(key)
+
+        try:
+            with open(filepath, "r", encoding="utf8") as input_stream:
+                entry = json.load(input_stream)
+            os.utime(filepath)
+        except (OSError, ValueError):
+            return None
+
+        try:
+            status = entry["status"]
+            if status == STATUS_INFEASIBLE:
+                return status, None
+            if status != STATUS_OPTIMAL:
+                return None
+
+            choices = []
+            for i, option in entry["choices"]:
+                # An entry for other events, for example after a hash collision or
+                # a hand edit, mustn't index past them or wrap around
+                if not (
+                    type(i) is int
+                    and type(option) is int
+                    and 0 <= i < len(events)
+                    and 0 <= option < len(events[i].choices)
+                ):
+                    return None
+                choices.append((events[i], option))
+
+            solution = Solution(choices=choices, route=Route[entry["route"]])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        return status, solution
+
+    def put(
+        self,
+        key: str,
+        events: list[Event],
+        status: int,
+        solution: Optional[Solution],
+    ) -> None:
+        entry: dict[str, object] = {"status": status}
+        if status == STATUS_OPTIMAL and solution is not None:
+            index = EventIndex(events)
+            entry["route"] = solution.route.name
+            entry["choices"] = [
+                [index.position(event), option] for event, option in solution.choices
+            ]
+        elif status != STATUS_INFEASIBLE:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file first so concurrent readers never see a
+        # partially written entry
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf8", dir=self.directory, suffix=".tmp", delete=False
+        ) as output_stream:
+            json.dump(entry, output_stream)
+        os.replace(output_stream.name, self.__filepath(key))
+
+        self.__evict()
+
+    def __filepath(self, key: str) -> pathlib.Path:
+        return self.directory / f"{key}.json"
+
+    def __evict(self) -> None:
+        entries = []
+        for filepath in self.directory.glob("*.json"):
+            try:
+                entries.append((filepath.stat().st_mtime, filepath))
+            except OSError:
+                continue
+
+        entries.sort()
+        for _, filepath in entries[: max(len(entries) - self.max_entries, 0)]:
+            try:
+                filepath.unlink()
+            except OSError:
+                continue
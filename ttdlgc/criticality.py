@@ -0,0 +1,254 @@
+from dataclasses import dataclass, replace
+from typing import IO, Iterable, Optional
+
+import csv
+
+import pulp
+
+from .events import Event, EventIndex, Solution
+from .milp import create_milp, extract_solution
+from .rules import GOAL_ALIGNMENTS, LAST_CHAPTER, Constraint, Goal
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+from .what_if import set_initial_values
+from .workers import shared, worker_pool
+
+
+# Built in each worker process, so that the base model is only built once per worker
+@dataclass(frozen=True)
+class _WorkerState:
+    index: EventIndex
+    problem: pulp.LpProblem
+    goal: Optional[Goal]
+    optimum: Solution
+    settings: SolverSettings
+
+
+@dataclass(frozen=True)
+class ForcedOption:
+    event: Event
+    option: int
+    status: int
+    # Best objective with the option forced, or None if it's infeasible
+    objective: Optional[int]
+    used_by_optimum: bool
+
+    @property
+    def feasible(self) -> bool:
+        return bool(self.status == pulp.const.LpStatusOptimal)
+
+
+@dataclass(frozen=True)
+class CriticalityReport:
+    status: int
+    # Objective of the optimum without any forced options. Without a goal the
+    # objective is always 0, so only feasibility is compared.
+    objective: Optional[int]
+    options: list[ForcedOption]
+
+    def drop(self, forced: ForcedOption) -> Optional[int]:
+        if self.objective is None or forced.objective is None:
+            return None
+
+        return self.objective - forced.objective
+
+    # Events ordered by how much forcing their worst option drops the optimum, with
+    # options that make the constraints infeasible first
+    def ranked_events(self) -> list[tuple[Event, Optional[int]]]:
+        worst: dict[Event, Optional[int]] = {}
+        for forced in self.options:
+            drop = self.drop(forced)
+            if forced.event not in worst:
+                worst[forced.event] = drop
+            elif drop is None:
+                worst[forced.event] = None
+            elif worst[forced.event] is not None:
+                worst[forced.event] = max(drop, worst[forced.event] or 0)
+
+        # Sorting is stable, so ties stay in event order
+        return sorted(
+            worst.items(), key=lambda item: (item[1] is not None, -(item[1] or 0))
+        )
+
+    def write_csv(self, output_stream: IO[str]) -> None:
+        writer = csv.DictWriter(
+            output_stream,
+            fieldnames=[
+                "rank",
+                "event",
+                "route",
+                "choice",
+                "option",
+                "status",
+                "objective",
+                "drop",
+                "used_by_optimum",
+            ],
+        )
+
+        options_by_event: dict[Event, list[ForcedOption]] = {}
+        for forced in self.options:
+            options_by_event.setdefault(forced.event, []).append(forced)
+
+        writer.writeheader()
+        for rank, (event, _) in enumerate(self.ranked_events(), start=1):
+            for forced in options_by_event[event]:
+                drop = self.drop(forced)
+                writer.writerow(
+                    {
+                        "rank": rank,
+                        "event": event.name,
+                        "route": (
+                            event.required_route.name
+                            if event.required_route is not None
+                            else ""
+                        ),
+                        "choice": event.choices[forced.option].name,
+                        "option": forced.option,
+                        "status": pulp.const.LpStatus[forced.status],
+                        "objective": (
+                            forced.objective if forced.objective is not None else ""
+                        ),
+                        "drop": drop if drop is not None else "",
+                        "used_by_optimum": forced.used_by_optimum,
+                    }
+                )
+
+
+def criticality(
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    processes: Optional[int] = None,
+    settings: SolverSettings = SolverSettings(),
+) -> CriticalityReport:
+    constraints = tuple(constraints)
+    index = EventIndex(events)
+
+    problem = create_milp(events, constraints, goal)
+    solve_problem(problem, settings)
+
+    # Forcing options only adds to the constraints, so if the query is infeasible
+    # every forced solve would be too
+    status = problem.status
+    if status != pulp.const.LpStatusOptimal:
+        return CriticalityReport(status, None, [])
+
+    optimum = extract_solution(index, problem)
+    objective = _objective(problem, goal)
+
+    # Options the optimum already takes can be forced without changing anything
+    used = {(index.position(event), option) for event, option in optimum.choices}
+
+    jobs = [
+        (i, [o for o in range(0, len(event.choices)) if (i, o) not in used])
+        for i, event in enumerate(events)
+        if len(event.choices) > 0
+    ]
+
+    with worker_pool(
+        (events, constraints, goal, optimum, settings),
+        processes,
+        setup=_set_up_worker,
+    ) as executor:
+        futures = {
+            i: executor.submit(_force_options, i, options)
+            for i, options in jobs
+            if len(options) > 0
+        }
+
+        forced_results = {
+            (i, o): result
+            for i, future in futures.items()
+            for o, result in future.result()
+        }
+
+    forced_options = []
+    for i, _ in jobs:
+        event = events[i]
+        for o in range(0, len(event.choices)):
+            if (i, o) in used:
+                forced_options.append(
+                    ForcedOption(event, o, status, objective, used_by_optimum=True)
+                )
+            else:
+                forced_status, forced_objective = forced_results[(i, o)]
+                forced_options.append(
+                    ForcedOption(
+                        event, o, forced_status, forced_objective, used_by_optimum=False
+                    )
+                )
+
+    return CriticalityReport(status, objective, forced_options)
+
+
+def _objective(problem: pulp.LpProblem, goal: Optional[Goal]) -> int:
+    if goal is None:
+        return 0
+
+    variable = problem.variablesDict()[
+        f"{GOAL_ALIGNMENTS[goal]}_at_chapter_{LAST_CHAPTER}_end"
+    ]
+    return int(round(variable.varValue))
+
+
+def _set_up_worker(
+    query: tuple[
+        list[Event],
+        tuple[Constraint, ...],
+        Optional[Goal],
+        Solution,
+        SolverSettings,
+    ],
+) -> _WorkerState:
+    events, constraints, goal, optimum, settings = query
+    return _WorkerState(
+        EventIndex(events),
+        create_milp(events, constraints, goal),
+        goal,
+        optimum,
+        settings,
+    )
+
+
+def _force_options(
+    i: int, options: list[int]
+) -> list[tuple[int, tuple[int, Optional[int]]]]:
+    state: _WorkerState = shared()
+    index = state.index
+    problem = state.problem
+
+    event = index.events[i]
+    variables = problem.variablesDict()
+
+    route_variable = None
+    if event.required_route is not None:
+        route_variable = variables[
+            f"chapter_5_route_{event.required_route.name.lower()}"
+        ]
+
+    settings = replace(state.settings, warm_start=True)
+
+    results = []
+    for o in options:
+        option_variable = variables[f"event_{i}_option_{o}"]
+
+        # Choosing the option also means taking the route the event happens on
+        option_variable.lowBound = 1
+        if route_variable is not None:
+            route_variable.lowBound = 1
+
+        # Each solve starts from the unconstrained optimum
+        set_initial_values(index, problem, state.optimum)
+        solve_problem(problem, settings)
+
+        objective = None
+        if problem.status == pulp.const.LpStatusOptimal:
+            objective = _objective(problem, state.goal)
+        results.append((o, (problem.status, objective)))
+
+        option_variable.lowBound = 0
+        if route_variable is not None:
+            route_variable.lowBound = 0
+
+    return results
@@ -0,0 +1,248 @@
+from typing import Optional
+
+import array
+import hashlib
+import io
+import itertools
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+
+from .event_table import date_ordinal, EventTable, NO_ROUTE, split_date_ordinal
+from .events import Event, Route, TtdMonth
+
+# Parsed events are compiled into a binary file next to the CSV file, so that later
+# loads are a single read instead of parsing the CSV again. The file is rebuilt
+# whenever the CSV file's contents change.
+#
+# Layout (little endian):
+#   header: magic, version, CSV size, CSV mtime, CSV SHA-256, counts
+#   int32 arrays: chapter, month, day, route, completion (3 per event),
+#                 number of choices, choice impacts (3 per choice)
+#   UTF-8 names of the events and then of the choices, separated by NUL
+MAGIC = b"TTDLGC\x00"
+VERSION = 1
+COMPILED_SUFFIX = ".bin"
+
+_HEADER = struct.Struct("<7sIQQ32sIII")
+
+
+def compiled_filepath(filepath: pathlib.Path) -> pathlib.Path:
+    return filepath.with_name(filepath.name + COMPILED_SUFFIX)
+
+
+def load_events(filepath: pathlib.Path) -> list[Event]:
+    loaded = _load(filepath)
+    if isinstance(loaded, EventTable):
+        return loaded.to_events()
+
+    return loaded
+
+
+# Loads the events as columns, which avoids creating any objects per event when the
+# compiled file is up to date
+def load_event_table(filepath: pathlib.Path) -> EventTable:
+    loaded = _load(filepath)
+    if isinstance(loaded, EventTable):
+        return loaded
+
+    return EventTable.from_events(loaded)
+
+
+# Either the table decoded from the compiled file, or the events parsed from the CSV
+# file
+def _load(filepath: pathlib.Path) -> EventTable | list[Event]:
+    stat = os.stat(filepath)
+
+    compiled = compiled_filepath(filepath)
+    compiled_contents = _read_compiled(compiled)
+    # A compiled file that can't be decoded is rebuilt like a stale one
+    table = _decode(compiled_contents) if compiled_contents is not None else None
+    if compiled_contents is not None and table is not None:
+        header = _HEADER.unpack_from(compiled_contents)
+        if (header[2], header[3]) == (stat.st_size, stat.st_mtime_ns):
+            return table
+
+    with open(filepath, "rb") as input_stream:
+        contents = input_stream.read()
+    digest = hashlib.sha256(contents).digest()
+
+    # The CSV file may have only been touched, so check its contents as well. The
+    # compiled file then gets the new size and mtime, so later loads don't have to
+    # hash the CSV file again.
+    if compiled_contents is not None and table is not None and header[4] == digest:
+        try:
+            _replace_file(
+                compiled,
+                _HEADER.pack(
+                    MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, digest, *header[5:]
+                )
+                + compiled_contents[_HEADER.size :],
+            )
+        except OSError:
+            pass
+
+        return table
+
+    events = Event.multiple_from_csv(
+        io.StringIO(contents.decode("utf-8"), newline=None)
+    )
+
+    try:
+        _write_compiled(
+            compiled,
+            EventTable.from_events(events),
+            stat.st_size,
+            stat.st_mtime_ns,
+            digest,
+        )
+    except OSError:
+        # Not being able to write the compiled file only makes the next load slower
+        pass
+
+    return events
+
+
+def _int32_array(values: list[int]) -> bytes:
+    data = array.array("i", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+
+    return data.tobytes()
+
+
+def _write_compiled(
+    filepath: pathlib.Path,
+    table: EventTable,
+    size: int,
+    mtime_ns: int,
+    digest: bytes,
+) -> None:
+    names = "\x00".join(table.names + table.choice_names).encode("utf-8")
+
+    body = b"".join(
+        [
+            _int32_array(table.chapters.tolist()),
+            _int32_array([split_date_ordinal(date)[0] for date in table.dates]),
+            _int32_array([split_date_ordinal(date)[1] for date in table.dates]),
+            _int32_array(table.routes.tolist()),
+            _int32_array(table.completions.tolist()),
+            _int32_array(
+                [
+                    end - start
+                    for start, end in zip(table.choice_starts, table.choice_starts[1:])
+                ]
+            ),
+            _int32_array(table.impacts.tolist()),
+            names,
+        ]
+    )
+    header = _HEADER.pack(
+        MAGIC,
+        VERSION,
+        size,
+        mtime_ns,
+        digest,
+        len(table),
+        len(table.choice_names),
+        len(names),
+    )
+
+    _replace_file(filepath, header + body)
+
+
+# Writes to a temporary file first so concurrent readers never see a partially
+# written file
+def _replace_file(filepath: pathlib.Path, contents: bytes) -> None:
+    descriptor, temporary_filepath = tempfile.mkstemp(
+        dir=filepath.parent, suffix=".tmp"
+    )
+    try:
+        with open(descriptor, "wb") as output_stream:
+            output_stream.write(contents)
+        os.replace(temporary_filepath, filepath)
+    except BaseException:
+        os.unlink(temporary_filepath)
+        raise
+
+
+def _read_compiled(filepath: pathlib.Path) -> Optional[bytes]:
+    try:
+        with open(filepath, "rb") as input_stream:
+            contents = input_stream.read()
+    except OSError:
+        return None
+
+    if len(contents) < _HEADER.size:
+        return None
+
+    magic, version = _HEADER.unpack_from(contents)[:2]
+    if (magic, version) != (MAGIC, VERSION):
+        return None
+
+    return contents
+
+
+# The table, or None if the body is truncated or corrupt
+def _decode(contents: bytes) -> Optional[EventTable]:
+    num_events, num_choices, names_length = _HEADER.unpack_from(contents)[5:]
+    if len(contents) != (
+        _HEADER.size + 4 * (8 * num_events + 3 * num_choices) + names_length
+    ):
+        return None
+
+    offset = _HEADER.size
+
+    def read_int32s(count: int) -> "array.array[int]":
+        nonlocal offset
+
+        data = array.array("i")
+        data.frombytes(contents[offset : offset + 4 * count])
+        if sys.byteorder != "little":
+            data.byteswap()
+
+        offset += 4 * count
+        return data
+
+    chapters = read_int32s(num_events)
+    months = read_int32s(num_events)
+    days = read_int32s(num_events)
+    routes = read_int32s(num_events)
+    completions = read_int32s(3 * num_events)
+    choice_counts = read_int32s(num_events)
+    impacts = read_int32s(3 * num_choices)
+
+    month_values = {month.value for month in TtdMonth}
+    route_values = {NO_ROUTE} | {route.value for route in Route}
+    if (
+        any(count < 0 for count in choice_counts)
+        or sum(choice_counts) != num_choices
+        or not set(months) <= month_values
+        or any(not 0 <= day < 100 for day in days)
+        or not set(routes) <= route_values
+    ):
+        return None
+
+    names = []
+    if num_events + num_choices > 0:
+        try:
+            names = (
+                contents[offset : offset + names_length].decode("utf-8").split("\x00")
+            )
+        except UnicodeDecodeError:
+            return None
+    if len(names) != num_events + num_choices:
+        return None
+
+    return EventTable(
+        chapters=chapters,
+        dates=array.array("i", map(date_ordinal, months, days)),
+        routes=routes,
+        completions=completions,
+        choice_starts=array.array("i", itertools.accumulate(choice_counts, initial=0)),
+        impacts=impacts,
+        names=names[:num_events],
+        choice_names=names[num_events:],
+    )
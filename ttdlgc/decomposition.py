@@ -0,0 +1,68 @@
+from typing import Iterable, Optional
+
+import concurrent.futures
+
+import pulp
+
+from .bounds import precheck
+from .events import Event, Route, Solution
+from .milp import create_milp, extract_solution
+from .rules import Constraint, Goal, ROUTE_REQUIREMENTS
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+
+
+def solve_route(
+    events: list[Event],
+    constraints: list[Constraint],
+    goal: Optional[Goal],
+    route: Route,
+    settings: SolverSettings = SolverSettings(),
+) -> tuple[int, Optional[float], Optional[Solution]]:
+    if not precheck(events, constraints, route).feasible:
+        return pulp.const.LpStatusInfeasible, None, None
+
+    problem = create_milp(events, constraints, goal, route=route)
+    solve_problem(problem, settings)
+
+    if problem.status != pulp.const.LpStatusOptimal:
+        return problem.status, None, None
+
+    objective = pulp.value(problem.objective) if goal is not None else 0.0
+
+    return problem.status, objective, extract_solution(events, problem)
+
+
+def solve_by_route(
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    processes: Optional[int] = None,
+    settings: SolverSettings = SolverSettings(),
+) -> tuple[int, Optional[Solution]]:
+    constraints = list(constraints)
+
+    # Routes without a modelled requirement are infeasible by construction, so they
+    # aren't worth a worker
+    routes = [route for route in Route if route in ROUTE_REQUIREMENTS]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(solve_route, events, constraints, goal, route, settings)
+            for route in routes
+        ]
+        results = [future.result() for future in futures]
+
+    best_status = min(status for status, _, _ in results)
+    best_objective = None
+    best_solution = None
+    for status, objective, solution in results:
+        if solution is None or objective is None:
+            continue
+
+        if best_objective is None or objective > best_objective:
+            best_status = status
+            best_objective = objective
+            best_solution = solution
+
+    return best_status, best_solution
@@ -0,0 +1,413 @@
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator, Optional
+
+import concurrent.futures
+import csv
+import heapq
+import multiprocessing
+import multiprocessing.synchronize
+import pathlib
+import queue
+
+import pulp
+
+from .decomposition import solve_route
+from .events import Event, EventIndex, Lgc, Route, Solution
+from .milp import create_milp, extract_solution
+from .rules import Constraint, Goal, ROUTE_REQUIREMENTS
+from .simulation import Simulation
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+from .workers import shared, worker_pool
+
+
+@dataclass(frozen=True)
+class Plan:
+    # Value of the goal's objective, which is always 0 without a goal
+    objective: float
+    lgc: Lgc
+    route: Route
+    solution_filepath: pathlib.Path
+
+
+# A part of the plans that one worker enumerates: the plans on a route, optionally
+# split further by the option picked for one of the route's events
+@dataclass(frozen=True)
+class Branch:
+    route: Route
+    pinned: Optional[tuple[int, int]]
+
+    @property
+    def name(self) -> str:
+        if self.pinned is None:
+            return self.route.name.lower()
+
+        event, option = self.pinned
+        return f"{self.route.name.lower()}_{event}_{option}"
+
+
+# A plan found by a worker, which the worker sends over as soon as it's found
+@dataclass(frozen=True)
+class _FoundPlan:
+    objective: float
+    lgc: Lgc
+    branch: Branch
+    # Position of the branch among the branches that are enumerated
+    position: int
+    # Position of the plan among its branch's plans, from 1
+    number: int
+    # Picked option of each event by its position in the events
+    choices: tuple[tuple[int, int], ...]
+
+    @property
+    def filename(self) -> str:
+        return f"plan_{self.branch.name}_{self.number:06d}.csv"
+
+    # Plans are ranked by objective, with ties in the order of the branches and then
+    # of the plans within each branch. Objectives are integers, so allow for
+    # rounding in the solver.
+    @property
+    def key(self) -> tuple[int, int, int]:
+        return -round(self.objective), self.position, self.number
+
+
+# Built in each worker process from the events and the channels back to the main
+# process
+@dataclass(frozen=True)
+class _WorkerState:
+    events: list[Event]
+    # Takes (branch position, plan) as plans are found, and (branch position, None)
+    # once a branch has no more plans
+    found: "multiprocessing.Queue[tuple[int, Optional[_FoundPlan]]]"
+    # Set once enough plans have been found, to stop the branches early
+    stop: multiprocessing.synchronize.Event
+
+
+# Enumerates distinct plans by repeatedly re-solving with no-good cuts that rule out
+# the plans already found. Without k, all optimal plans are enumerated, otherwise
+# the k best plans.
+#
+# The plans are yielded best first as they're found, with their solutions already
+# written to the output directory. Each branch finds its plans best first, so a plan
+# is yielded once every branch that is still running has found a plan ranked after
+# it. Only plans that are waiting on another branch are kept in memory.
+def enumerate_plans(
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    output_directory: pathlib.Path,
+    k: Optional[int] = None,
+    max_plans: int = 1000,
+    processes: Optional[int] = None,
+    settings: SolverSettings = SolverSettings(),
+) -> Iterator[Plan]:
+    constraints = list(constraints)
+    limit = min(k, max_plans) if k is not None else max_plans
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+
+    found: "multiprocessing.Queue[tuple[int, Optional[_FoundPlan]]]" = (
+        multiprocessing.Queue()
+    )
+    stop = multiprocessing.Event()
+
+    with worker_pool(
+        (events, found, stop), processes, setup=_set_up_worker
+    ) as executor:
+        # Routes without a modelled requirement can't be taken, so they aren't worth
+        # a solve
+        route_futures = {
+            route: executor.submit(_route_optimum, constraints, goal, route, settings)
+            for route in ROUTE_REQUIREMENTS
+        }
+        optima = {
+            route: objective
+            for route, future in route_futures.items()
+            if (objective := future.result()) is not None
+        }
+        if len(optima) == 0:
+            return
+
+        # Only the routes that reach the optimum have optimal plans
+        threshold = None
+        if k is None:
+            threshold = max(optima.values())
+            optima = {
+                route: objective
+                for route, objective in optima.items()
+                if objective >= threshold
+            }
+
+        futures = [
+            executor.submit(
+                _enumerate_branch,
+                constraints,
+                goal,
+                branch,
+                position,
+                threshold,
+                limit,
+                settings,
+            )
+            for position, branch in enumerate(
+                branch for route in optima for branch in branches(events, route)
+            )
+        ]
+
+        running = set(range(len(futures)))
+        try:
+            yield from _merge_found(
+                events,
+                _receive(found, futures, running),
+                len(futures),
+                limit,
+                output_directory,
+            )
+        finally:
+            stop.set()
+
+            # A worker only exits once everything it put on the queue has been read
+            for _ in _receive(found, futures, running):
+                pass
+
+        # Surface any errors from the branches
+        for future in futures:
+            future.result()
+
+
+# Plans as the branches find them, as (branch position, plan), or (branch position,
+# None) once a branch has no more plans. Stops once no branch is running.
+def _receive(
+    found: "multiprocessing.Queue[tuple[int, Optional[_FoundPlan]]]",
+    futures: list[concurrent.futures.Future[None]],
+    running: set[int],
+) -> Iterator[tuple[int, Optional[_FoundPlan]]]:
+    while len(running) > 0:
+        try:
+            position, plan = found.get(timeout=0.1)
+        except queue.Empty:
+            # A worker that dies never says that its branch is done
+            if any(future.done() and future.exception() for future in futures):
+                return
+            continue
+
+        if plan is None:
+            running.discard(position)
+
+        yield position, plan
+
+
+def _merge_found(
+    events: list[Event],
+    messages: Iterator[tuple[int, Optional[_FoundPlan]]],
+    num_branches: int,
+    limit: int,
+    output_directory: pathlib.Path,
+) -> Iterator[Plan]:
+    # Lowest key that each running branch may still find a plan with, or None until
+    # the branch has found its first plan
+    next_keys: dict[int, Optional[tuple[int, int, int]]] = {
+        position: None for position in range(num_branches)
+    }
+    waiting: list[tuple[tuple[int, int, int], _FoundPlan]] = []
+
+    count = 0
+    while count < limit:
+        # The best waiting plan is ranked next once no running branch can still find
+        # a better one
+        if len(waiting) > 0 and all(
+            next_key is not None and waiting[0][0] < next_key
+            for position, next_key in next_keys.items()
+            if position != waiting[0][1].position
+        ):
+            _, plan = heapq.heappop(waiting)
+            count += 1
+            yield _write_plan(events, plan, output_directory)
+            continue
+
+        message = next(messages, None)
+        if message is None:
+            return
+
+        position, found_plan = message
+        if found_plan is None:
+            next_keys.pop(position, None)
+        else:
+            heapq.heappush(waiting, (found_plan.key, found_plan))
+            next_keys[position] = (
+                -round(found_plan.objective),
+                position,
+                found_plan.number + 1,
+            )
+
+
+def _write_plan(
+    events: list[Event], plan: _FoundPlan, output_directory: pathlib.Path
+) -> Plan:
+    solution = Solution(
+        choices=[(events[i], option) for i, option in plan.choices],
+        route=plan.branch.route,
+    )
+
+    solution_filepath = output_directory / plan.filename
+    with open(solution_filepath, "w", encoding="utf8") as output_stream:
+        solution.write_csv(output_stream)
+
+    return Plan(plan.objective, plan.lgc, plan.branch.route, solution_filepath)
+
+
+# Splits a route's plans by the option picked for the route's first event that has
+# a choice, so that more workers can enumerate them
+def branches(events: list[Event], route: Route) -> list[Branch]:
+    for i, event in enumerate(events):
+        if event.required_route not in (None, route) or len(event.choices) < 2:
+            continue
+
+        return [Branch(route, (i, o)) for o in range(len(event.choices))]
+
+    return [Branch(route, None)]
+
+
+# Writes one row per plan, flushing after each so that the plans can be followed
+# while they're enumerated
+class PlanWriter:
+    def __init__(self, output_stream: IO[str]) -> None:
+        self.output_stream = output_stream
+        self.count = 0
+        self.writer = csv.DictWriter(
+            output_stream,
+            fieldnames=[
+                "rank",
+                "objective",
+                "law",
+                "grey",
+                "chaos",
+                "route",
+                "solution_filepath",
+            ],
+        )
+
+        self.writer.writeheader()
+
+    def write(self, plan: Plan) -> None:
+        self.count += 1
+        self.writer.writerow(
+            {
+                "rank": self.count,
+                "objective": plan.objective,
+                "law": plan.lgc.law,
+                "grey": plan.lgc.grey,
+                "chaos": plan.lgc.chaos,
+                "route": plan.route.name,
+                "solution_filepath": plan.solution_filepath,
+            }
+        )
+        self.output_stream.flush()
+
+
+def _set_up_worker(
+    value: tuple[
+        list[Event],
+        "multiprocessing.Queue[tuple[int, Optional[_FoundPlan]]]",
+        multiprocessing.synchronize.Event,
+    ],
+) -> _WorkerState:
+    return _WorkerState(*value)
+
+
+def _route_optimum(
+    constraints: list[Constraint],
+    goal: Optional[Goal],
+    route: Route,
+    settings: SolverSettings,
+) -> Optional[float]:
+    state: _WorkerState = shared()
+    _, objective, _ = solve_route(state.events, constraints, goal, route, settings)
+    return objective
+
+
+def _enumerate_branch(
+    constraints: list[Constraint],
+    goal: Optional[Goal],
+    branch: Branch,
+    position: int,
+    threshold: Optional[float],
+    limit: int,
+    settings: SolverSettings,
+) -> None:
+    state: _WorkerState = shared()
+    try:
+        _find_plans(
+            state, constraints, goal, branch, position, threshold, limit, settings
+        )
+    finally:
+        state.found.put((position, None))
+
+
+def _find_plans(
+    state: _WorkerState,
+    constraints: list[Constraint],
+    goal: Optional[Goal],
+    branch: Branch,
+    position: int,
+    threshold: Optional[float],
+    limit: int,
+    settings: SolverSettings,
+) -> None:
+    index = EventIndex.of(state.events)
+
+    problem = create_milp(index.events, constraints, goal, route=branch.route)
+    variables = problem.variablesDict()
+    options = [
+        variable for name, variable in variables.items() if name.startswith("event_")
+    ]
+
+    if branch.pinned is not None:
+        event, option = branch.pinned
+        variables[f"event_{event}_option_{option}"].lowBound = 1
+
+    # Objectives are integers, so allow for rounding in the solver
+    if goal is not None and threshold is not None:
+        problem += problem.objective >= threshold - 0.5, "enumeration_optimum"
+
+    for number in range(1, limit + 1):
+        if state.stop.is_set():
+            break
+
+        solve_problem(problem, settings)
+        if problem.status != pulp.const.LpStatusOptimal:
+            break
+
+        solution = extract_solution(index, problem)
+
+        simulation = Simulation(index)
+        simulation.apply_solution(solution)
+
+        objective = pulp.value(problem.objective) if goal is not None else 0.0
+        state.found.put(
+            (
+                position,
+                _FoundPlan(
+                    objective,
+                    simulation.lgc,
+                    branch,
+                    position,
+                    number,
+                    tuple(
+                        (index.position(event), option)
+                        for event, option in solution.choices
+                    ),
+                ),
+            )
+        )
+
+        # Every event has exactly one option picked, so a plan differs from this
+        # one exactly when at least one of its picked options isn't picked
+        picked = [variable for variable in options if variable.varValue > 0.5]
+        if len(picked) == 0:
+            break
+
+        problem += (
+            pulp.lpSum(picked) <= len(picked) - 1,
+            f"no_good_{number}",
+        )
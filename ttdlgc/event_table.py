@@ -0,0 +1,329 @@
+from dataclasses import dataclass, field
+from typing import IO, Iterator, Optional
+
+import array
+import csv
+import hashlib
+import sys
+
+from .events import Choice, Event, Lgc, Route, TtdDate, TtdMonth
+
+NO_ROUTE = 0
+NO_OPTION = -1
+
+_ROUTES_BY_VALUE = {route.value: route for route in Route}
+
+
+def _int32s() -> "array.array[int]":
+    return array.array("i")
+
+
+# Dates are stored as month * 100 + day, which orders like the dates
+def date_ordinal(month: int, day: int) -> int:
+    return month * 100 + day
+
+
+def split_date_ordinal(ordinal: int) -> tuple[int, int]:
+    month, day = divmod(ordinal, 100)
+    return month, day
+
+
+# Events stored column by column in typed arrays, so that a large event list takes a
+# few bytes per value rather than an object per event, choice and impact. The
+# choices of all of the events are stored one after another, with the choices of
+# event i from choice_starts[i] up to choice_starts[i + 1].
+@dataclass(slots=True)
+class EventTable:
+    chapters: "array.array[int]" = field(default_factory=_int32s)
+    dates: "array.array[int]" = field(default_factory=_int32s)
+    # Value of the required route, or NO_ROUTE
+    routes: "array.array[int]" = field(default_factory=_int32s)
+    # Law, grey and chaos of each event's completion
+    completions: "array.array[int]" = field(default_factory=_int32s)
+    choice_starts: "array.array[int]" = field(
+        default_factory=lambda: array.array("i", [0])
+    )
+    # Law, grey and chaos of each choice's impact
+    impacts: "array.array[int]" = field(default_factory=_int32s)
+    names: list[str] = field(default_factory=lambda: [])
+    choice_names: list[str] = field(default_factory=lambda: [])
+
+    @staticmethod
+    def from_events(events: list[Event]) -> "EventTable":
+        table = EventTable()
+        for event in events:
+            table.append(event)
+
+        return table
+
+    @staticmethod
+    def of(events: "list[Event] | EventTable") -> "EventTable":
+        if isinstance(events, EventTable):
+            return events
+
+        return EventTable.from_events(events)
+
+    def append(self, event: Event) -> None:
+        self.chapters.append(event.chapter)
+        self.dates.append(date_ordinal(event.date.month.value, event.date.day))
+        self.routes.append(
+            event.required_route.value if event.required_route is not None else NO_ROUTE
+        )
+        self.completions.extend(
+            (event.completion.law, event.completion.grey, event.completion.chaos)
+        )
+        for choice in event.choices:
+            self.impacts.extend(
+                (choice.impact.law, choice.impact.grey, choice.impact.chaos)
+            )
+            self.choice_names.append(choice.name)
+        self.choice_starts.append(len(self.choice_names))
+        self.names.append(event.name)
+
+    def __len__(self) -> int:
+        return len(self.chapters)
+
+    def __iter__(self) -> Iterator["EventView"]:
+        return (EventView(self, i) for i in range(len(self)))
+
+    def view(self, i: int) -> "EventView":
+        return EventView(self, i)
+
+    def choice_count(self, i: int) -> int:
+        return self.choice_starts[i + 1] - self.choice_starts[i]
+
+    def applies(self, i: int, route: Route) -> bool:
+        return self.routes[i] == NO_ROUTE or self.routes[i] == route.value
+
+    # Position of each event on the route by its name, which solutions refer to
+    # events by
+    def positions(self, route: Route) -> dict[str, int]:
+        positions: dict[str, int] = {}
+        for i, name in enumerate(self.names):
+            if self.applies(i, route):
+                positions.setdefault(name, i)
+
+        return positions
+
+    # Events as regular Event objects, for code that needs them. Most impacts and
+    # dates repeat, so identical values share a single instance.
+    def to_events(self) -> list[Event]:
+        lgcs: dict[tuple[int, int, int], Lgc] = {}
+        dates: dict[int, TtdDate] = {}
+
+        def lgc(values: tuple[int, int, int]) -> Lgc:
+            value = lgcs.get(values)
+            if value is None:
+                value = lgcs[values] = Lgc(*values)
+
+            return value
+
+        def date(ordinal: int) -> TtdDate:
+            value = dates.get(ordinal)
+            if value is None:
+                month, day = split_date_ordinal(ordinal)
+                value = dates[ordinal] = TtdDate(month=TtdMonth(month), day=day)
+
+            return value
+
+        impacts = self.impacts
+        completions = self.completions
+
+        events = []
+        for i in range(len(self)):
+            start, end = self.choice_starts[i], self.choice_starts[i + 1]
+            events.append(
+                Event(
+                    chapter=self.chapters[i],
+                    date=date(self.dates[i]),
+                    name=self.names[i],
+                    completion=lgc(
+                        (
+                            completions[3 * i],
+                            completions[3 * i + 1],
+                            completions[3 * i + 2],
+                        )
+                    ),
+                    required_route=_ROUTES_BY_VALUE.get(self.routes[i]),
+                    choices=tuple(
+                        Choice(
+                            name=self.choice_names[c],
+                            impact=lgc(
+                                (impacts[3 * c], impacts[3 * c + 1], impacts[3 * c + 2])
+                            ),
+                        )
+                        for c in range(start, end)
+                    ),
+                )
+            )
+
+        return events
+
+    # SHA-256 of the events' contents, which stays the same when only the formatting
+    # of the CSV file changes
+    def digest(self) -> bytes:
+        hasher = hashlib.sha256()
+        for column in (
+            self.chapters,
+            self.dates,
+            self.routes,
+            self.completions,
+            self.choice_starts,
+            self.impacts,
+        ):
+            data = array.array("i", column)
+            if sys.byteorder != "little":
+                data.byteswap()
+            hasher.update(len(data).to_bytes(4, "little"))
+            hasher.update(data.tobytes())
+        hasher.update("\x00".join(self.names + self.choice_names).encode("utf-8"))
+
+        return hasher.digest()
+
+    # Final alignments of picking the given option of each event, without creating
+    # any objects per event. Events without choices, or not on the route, have
+    # NO_OPTION.
+    def final_lgc(self, route: Route, options: "array.array[int] | list[int]") -> Lgc:
+        completions = self.completions
+        impacts = self.impacts
+
+        law = grey = chaos = 0
+        for i in range(len(self)):
+            if not self.applies(i, route):
+                continue
+
+            law += completions[3 * i]
+            grey += completions[3 * i + 1]
+            chaos += completions[3 * i + 2]
+
+            start = self.choice_starts[i]
+            count = self.choice_starts[i + 1] - start
+            if count == 0:
+                continue
+
+            option = options[i]
+            if option == NO_OPTION:
+                raise ValueError(f"Failed to find event: {self.names[i]}")
+            if not 0 <= option < count:
+                raise ValueError(
+                    f"Event {self.names[i]} has no option {option}, it has {count}"
+                )
+
+            c = start + option
+            law += impacts[3 * c]
+            grey += impacts[3 * c + 1]
+            chaos += impacts[3 * c + 2]
+
+        return Lgc(law=law, grey=grey, chaos=chaos)
+
+
+# A read only view of one event in a table, with the same attributes as Event. The
+# attributes are only built when they are read.
+class EventView:
+    __slots__ = ("table", "index")
+
+    def __init__(self, table: EventTable, index: int) -> None:
+        self.table = table
+        self.index = index
+
+    @property
+    def chapter(self) -> int:
+        return self.table.chapters[self.index]
+
+    @property
+    def date(self) -> TtdDate:
+        month, day = split_date_ordinal(self.table.dates[self.index])
+        return TtdDate(month=TtdMonth(month), day=day)
+
+    @property
+    def name(self) -> str:
+        return self.table.names[self.index]
+
+    @property
+    def completion(self) -> Lgc:
+        completions = self.table.completions
+        i = 3 * self.index
+        return Lgc(completions[i], completions[i + 1], completions[i + 2])
+
+    @property
+    def required_route(self) -> Optional[Route]:
+        return _ROUTES_BY_VALUE.get(self.table.routes[self.index])
+
+    @property
+    def choices(self) -> tuple[Choice, ...]:
+        table = self.table
+        impacts = table.impacts
+        return tuple(
+            Choice(
+                name=table.choice_names[c],
+                impact=Lgc(impacts[3 * c], impacts[3 * c + 1], impacts[3 * c + 2]),
+            )
+            for c in range(
+                table.choice_starts[self.index], table.choice_starts[self.index + 1]
+            )
+        )
+
+    def to_event(self) -> Event:
+        return Event(
+            chapter=self.chapter,
+            date=self.date,
+            name=self.name,
+            completion=self.completion,
+            required_route=self.required_route,
+            choices=self.choices,
+        )
+
+
+# A solution as the picked option of each event in a table, in the same CSV format
+# as Solution
+@dataclass(slots=True)
+class TableSolution:
+    route: Route
+    # Picked option per event, or NO_OPTION
+    options: "array.array[int]"
+
+    @staticmethod
+    def from_csv(table: EventTable, input_stream: IO[str]) -> "TableSolution":
+        route = None
+        positions: dict[str, int] = {}
+        options = array.array("i", [NO_OPTION]) * len(table)
+
+        for row in csv.DictReader(input_stream):
+            name = row.get("name")
+            choice = row.get("choice")
+            if name is None or choice is None:
+                raise ValueError(f"Expected name and choice columns, got row: {row}")
+
+            if name == "Route":
+                if choice not in Route.__members__:
+                    raise ValueError(f"Unknown route in row: {row}")
+
+                route = Route[choice]
+                positions = table.positions(route)
+                continue
+
+            if route is None:
+                raise ValueError(f"Choice before the route row: {row}")
+            if name not in positions:
+                raise ValueError(f"Unknown event on the {route.name} route: {row}")
+            if not choice.isdigit():
+                raise ValueError(f"Choice isn't an option number: {row}")
+
+            options[positions[name]] = int(choice)
+
+        if route is None:
+            raise ValueError("Solution has no route row")
+
+        return TableSolution(route=route, options=options)
+
+    def write_csv(self, table: EventTable, output_stream: IO[str]) -> None:
+        writer = csv.writer(output_stream)
+
+        writer.writerow(["name", "choice"])
+        writer.writerow(["Route", self.route.name])
+        for i, option in enumerate(self.options):
+            if option != NO_OPTION:
+                writer.writerow([table.names[i], option])
+
+    def final_lgc(self, table: EventTable) -> Lgc:
+        return table.final_lgc(self.route, self.options)
@@ -17,7 +17,7 @@ CHOICE_N_G: Callable[[int], str] = lambda n: f"Choice {n} G"
 CHOICE_N_C: Callable[[int], str] = lambda n: f"Choice {n} C"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Lgc:
     law: int
     grey: int
@@ -34,7 +34,7 @@ class Lgc:
         return f"Lgc({self.law}, {self.grey}, {self.chaos})"
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Choice:
     name: str
     impact: Lgc
@@ -51,7 +51,7 @@ class TtdMonth(enum.Enum):
         return TtdMonth[string]
 
 
-@dataclass(frozen=True, order=True)
+@dataclass(frozen=True, order=True, slots=True)
 class TtdDate:
     month: TtdMonth
     day: int
@@ -75,14 +75,14 @@ class Route(enum.Enum):
         return Route[string]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Event:
     chapter: int
     date: TtdDate
     name: str
     completion: Lgc
     required_route: Optional[Route]
-    choices: list[Choice]
+    choices: tuple[Choice, ...]
 
     @staticmethod
     def multiple_from_csv(input_stream: IO[str]) -> list["Event"]:
@@ -126,13 +126,48 @@ class Event:
                     name=name,
                     completion=completion,
                     required_route=required_route,
-                    choices=choices,
+                    choices=tuple(choices),
                 )
             )
 
         return events
 
 
+# Looks up events by their position in the event list, or by the name and Chapter 5
+# route that solutions refer to them with
+class EventIndex:
+    def __init__(self, events: list[Event]) -> None:
+        self.events = events
+
+        self.positions: dict[Event, int] = {}
+        self.by_name_and_route: dict[tuple[str, Route], int] = {}
+        for i, event in enumerate(events):
+            self.positions.setdefault(event, i)
+
+            for route in Route:
+                if event.required_route is not None and event.required_route != route:
+                    continue
+
+                self.by_name_and_route.setdefault((event.name, route), i)
+
+    @staticmethod
+    def of(events: "list[Event] | EventIndex") -> "EventIndex":
+        if isinstance(events, EventIndex):
+            return events
+
+        return EventIndex(events)
+
+    def position(self, event: Event) -> int:
+        return self.positions[event]
+
+    def find(self, name: str, route: Route) -> Optional[Event]:
+        i = self.by_name_and_route.get((name, route))
+        if i is None:
+            return None
+
+        return self.events[i]
+
+
 @dataclass
 class Solution:
     choices: list[tuple[Event, int]]
@@ -147,7 +182,11 @@ class Solution:
             writer.writerow({"name": event.name, "choice": choice_index})
 
     @staticmethod
-    def from_csv(events: list[Event], input_stream: IO[str]) -> "Solution":
+    def from_csv(
+        events: "list[Event] | EventIndex", input_stream: IO[str]
+    ) -> "Solution":
+        index = EventIndex.of(events)
+
         route = None
         choices = []
         for row in csv.DictReader(input_stream):
@@ -163,15 +202,7 @@ class Solution:
 
             assert route is not None
 
-            event = None
-            for e in events:
-                if e.name == name:
-                    if e.required_route is not None and e.required_route != route:
-                        continue
-
-                    event = e
-                    break
-
+            event = index.find(name, route)
             assert event is not None
 
             choices.append((event, int(choice)))
@@ -0,0 +1,279 @@
+from dataclasses import dataclass
+from typing import IO, Any, Optional, Sequence
+
+import array
+import bisect
+import csv
+
+from .event_table import date_ordinal, EventTable, NO_OPTION, TableSolution
+from .events import Event, Lgc, Route, Solution, TtdDate
+from .rules import (
+    ALIGNMENTS,
+    LAST_CHAPTER,
+    LEVEL_THRESHOLDS,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class ChapterPoint:
+    chapter: int
+    # Alignments at the end of the chapter
+    lgc: Lgc
+
+    # Highest level reached on the alignment, if any
+    def level(self, alignment: str) -> Optional[int]:
+        value = getattr(self.lgc, alignment)
+
+        reached = None
+        for level, threshold in LEVEL_THRESHOLDS[alignment].items():
+            if value >= threshold:
+                reached = level
+
+        return reached
+
+    def meets(self, alignment: str, level: int) -> bool:
+        return bool(getattr(self.lgc, alignment) >= LEVEL_THRESHOLDS[alignment][level])
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    route: Route
+    chapters: tuple[ChapterPoint, ...]
+    # Whether the alignments at the end of chapter 5 allow taking the route, or None
+    # for routes without a modelled requirement
+    route_requirement_met: Optional[bool]
+
+    @staticmethod
+    def of(route: Route, chapter_lgc: Sequence[Lgc]) -> "Trajectory":
+        route_requirement_met = None
+        if route in ROUTE_REQUIREMENTS:
+            alignment, level = ROUTE_REQUIREMENTS[route]
+            lgc = chapter_lgc[ROUTE_REQUIREMENT_CHAPTER - 1]
+            route_requirement_met = getattr(lgc, alignment) >= level
+
+        return Trajectory(
+            route,
+            tuple(ChapterPoint(c + 1, lgc) for c, lgc in enumerate(chapter_lgc)),
+            route_requirement_met,
+        )
+
+    @property
+    def final(self) -> ChapterPoint:
+        return self.chapters[-1]
+
+    def at_chapter(self, chapter: int) -> ChapterPoint:
+        return self.chapters[chapter - 1]
+
+    def first_chapter_meeting(self, alignment: str, level: int) -> Optional[int]:
+        for point in self.chapters:
+            if point.meets(alignment, level):
+                return point.chapter
+
+        return None
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "route": self.route.name,
+            "route_requirement_met": self.route_requirement_met,
+            "chapters": [
+                {
+                    "chapter": point.chapter,
+                    **{
+                        alignment: getattr(point.lgc, alignment)
+                        for alignment in ALIGNMENTS
+                    },
+                    **{
+                        f"{alignment}_level": point.level(alignment)
+                        for alignment in ALIGNMENTS
+                    },
+                }
+                for point in self.chapters
+            ],
+        }
+
+    def write_csv(self, output_stream: IO[str]) -> None:
+        writer = csv.DictWriter(
+            output_stream,
+            fieldnames=[
+                "chapter",
+                *ALIGNMENTS,
+                *(f"{alignment}_level" for alignment in ALIGNMENTS),
+            ],
+        )
+
+        writer.writeheader()
+        for point in self.chapters:
+            writer.writerow(
+                {
+                    "chapter": point.chapter,
+                    **{
+                        alignment: getattr(point.lgc, alignment)
+                        for alignment in ALIGNMENTS
+                    },
+                    **{
+                        f"{alignment}_level": point.level(alignment) or ""
+                        for alignment in ALIGNMENTS
+                    },
+                }
+            )
+
+
+# Simulates a plan and keeps it up to date as single choices or the route change,
+# rather than replaying every event. The totals at the end of each chapter are kept
+# as prefix sums for every route at once, so changing a choice only updates the
+# chapters from the event's onwards, and changing the route updates nothing. Totals
+# by date are kept in a Fenwick tree per route, so changing a choice updates them in
+# a logarithmic number of steps.
+#
+# Every event with choices starts with its first option picked.
+class IncrementalSimulation:
+    def __init__(
+        self,
+        events: list[Event] | EventTable,
+        solution: Optional[Solution | TableSolution] = None,
+    ) -> None:
+        table = EventTable.of(events)
+        self.table = table
+
+        if any(chapter < 1 for chapter in table.chapters):
+            raise ValueError("Events must be in chapter 1 or later")
+        self.num_chapters = max(LAST_CHAPTER, max(table.chapters, default=0))
+
+        self.dates = sorted(set(table.dates))
+        date_positions = {date: d for d, date in enumerate(self.dates)}
+        self.event_dates = array.array("i", [date_positions[d] for d in table.dates])
+
+        self.options = array.array("i", [NO_OPTION]) * len(table)
+        for i in range(len(table)):
+            if table.choice_count(i) > 0:
+                self.options[i] = 0
+
+        self.route = Route.Law
+
+        # Per route, the law, grey and chaos at the end of each chapter, one after
+        # another
+        self.chapter_totals = {route: [0] * (3 * self.num_chapters) for route in Route}
+        # Per route, a Fenwick tree of the law, grey and chaos added on each date,
+        # one after another
+        self.date_trees = {route: [0] * (3 * len(self.dates)) for route in Route}
+
+        for i in range(len(table)):
+            self.__add(i, self.__contribution(i, self.options[i]), chapters=False)
+
+        # The chapter totals are only summed up once all of the events are added
+        for totals in self.chapter_totals.values():
+            for c in range(3, len(totals)):
+                totals[c] += totals[c - 3]
+
+        if solution is not None:
+            self.apply_solution(solution)
+
+    def apply_solution(self, solution: Solution | TableSolution) -> None:
+        if isinstance(solution, Solution):
+            positions = self.table.positions(solution.route)
+            self.route = solution.route
+            for event, option in solution.choices:
+                self.choose(positions[event.name], option)
+        else:
+            self.route = solution.route
+            for i, option in enumerate(solution.options):
+                if option != NO_OPTION:
+                    self.choose(i, option)
+
+    def set_route(self, route: Route) -> None:
+        self.route = route
+
+    def choose(self, event: int, option: int) -> None:
+        choice_count = self.table.choice_count(event)
+        if not 0 <= option < choice_count:
+            raise ValueError(
+                f"Event {self.table.names[event]} has no option {option}, it has {choice_count}"
+            )
+
+        previous = self.options[event]
+        if option == previous:
+            return
+
+        old = self.__contribution(event, previous)
+        new = self.__contribution(event, option)
+        self.__add(event, tuple(n - o for n, o in zip(new, old)), chapters=True)
+
+        self.options[event] = option
+
+    def table_solution(self) -> TableSolution:
+        options = array.array("i", self.options)
+        for i in range(len(self.table)):
+            if not self.table.applies(i, self.route):
+                options[i] = NO_OPTION
+
+        return TableSolution(route=self.route, options=options)
+
+    @property
+    def lgc(self) -> Lgc:
+        return self.lgc_at_chapter(self.num_chapters)
+
+    def lgc_at_chapter(self, chapter: int) -> Lgc:
+        totals = self.chapter_totals[self.route]
+        c = 3 * (chapter - 1)
+        return Lgc(law=totals[c], grey=totals[c + 1], chaos=totals[c + 2])
+
+    # Alignments after all of the events on or before the date
+    def lgc_at_date(self, date: TtdDate) -> Lgc:
+        d = bisect.bisect_right(self.dates, date_ordinal(date.month.value, date.day))
+
+        tree = self.date_trees[self.route]
+        law = grey = chaos = 0
+        while d > 0:
+            law += tree[3 * (d - 1)]
+            grey += tree[3 * (d - 1) + 1]
+            chaos += tree[3 * (d - 1) + 2]
+            d &= d - 1
+
+        return Lgc(law=law, grey=grey, chaos=chaos)
+
+    def trajectory(self) -> Trajectory:
+        return Trajectory.of(
+            self.route,
+            [
+                self.lgc_at_chapter(chapter)
+                for chapter in range(1, self.num_chapters + 1)
+            ],
+        )
+
+    # Law, grey and chaos that the event adds with the option picked
+    def __contribution(self, event: int, option: int) -> tuple[int, int, int]:
+        completions = self.table.completions
+        law, grey, chaos = (completions[3 * event + a] for a in range(3))
+
+        if option != NO_OPTION:
+            impacts = self.table.impacts
+            c = self.table.choice_starts[event] + option
+            law += impacts[3 * c]
+            grey += impacts[3 * c + 1]
+            chaos += impacts[3 * c + 2]
+
+        return law, grey, chaos
+
+    def __add(self, event: int, delta: tuple[int, ...], chapters: bool) -> None:
+        first_chapter = self.table.chapters[event] - 1
+        date = self.event_dates[event]
+
+        for route in Route:
+            if not self.table.applies(event, route):
+                continue
+
+            # Every chapter from the event's onwards includes it
+            totals = self.chapter_totals[route]
+            last_chapter = self.num_chapters if chapters else first_chapter + 1
+            for c in range(first_chapter, last_chapter):
+                for a in range(3):
+                    totals[3 * c + a] += delta[a]
+
+            tree = self.date_trees[route]
+            d = date + 1
+            while d <= len(self.dates):
+                for a in range(3):
+                    tree[3 * (d - 1) + a] += delta[a]
+                d += d & -d
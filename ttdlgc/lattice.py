@@ -0,0 +1,202 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from .events import Event, Lgc, Route, Solution
+from .rules import (
+    ALIGNMENTS,
+    CONSTRAINT_THRESHOLDS,
+    GOAL_ALIGNMENTS,
+    LAST_CHAPTER,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+    Goal,
+)
+
+Points = npt.NDArray[np.int64]
+
+
+@dataclass(frozen=True)
+class _Step:
+    event_index: int
+    offsets: Points
+    # Sorted reachable points after the step and the option used to reach each
+    # of them. Events without choices only shift every point, so they don't
+    # need any backpointers.
+    points: Optional[Points]
+    options: Optional[npt.NDArray[np.int8]]
+
+
+# Exact sets of reachable (law, grey, chaos) totals at the end of each chapter, for
+# each Chapter 5 route. Each set is a sorted array of points flattened into single
+# integers, so applying an event is a shift of the array per option and a union.
+class ReachableAlignments:
+    def __init__(self, events: list[Event]) -> None:
+        self.events = events
+
+        lower = [0, 0, 0]
+        upper = [0, 0, 0]
+        for event in events:
+            for a, (low, high) in enumerate(zip(*_event_range(event))):
+                lower[a] += min(low, 0)
+                upper[a] += max(high, 0)
+
+        self.lower = np.array(lower, dtype=np.int64)
+        self.shape = np.array(upper, dtype=np.int64) - self.lower + 1
+        self.strides = np.array(
+            [self.shape[1] * self.shape[2], self.shape[2], 1], dtype=np.int64
+        )
+
+        self.steps: dict[Route, list[_Step]] = {}
+        self.chapter_points: dict[Route, dict[int, Points]] = {}
+        for route in Route:
+            self.__build_route(route)
+
+    def __build_route(self, route: Route) -> None:
+        steps = []
+        chapter_points = {}
+
+        points = np.array([self.flatten(Lgc(0, 0, 0))], dtype=np.int64)
+        for chapter in range(1, LAST_CHAPTER + 1):
+            for i, event in enumerate(self.events):
+                if event.chapter != chapter:
+                    continue
+
+                if event.required_route is not None and event.required_route != route:
+                    continue
+
+                impacts = [choice.impact for choice in event.choices]
+                if len(impacts) == 0:
+                    impacts = [Lgc(0, 0, 0)]
+
+                offsets = np.array(
+                    [self.__offset(event.completion + impact) for impact in impacts],
+                    dtype=np.int64,
+                )
+
+                if len(event.choices) == 0:
+                    points = points + offsets[0]
+                    steps.append(_Step(i, offsets, None, None))
+                    continue
+
+                candidates = (points[np.newaxis, :] + offsets[:, np.newaxis]).ravel()
+                options = np.repeat(np.arange(len(offsets), dtype=np.int8), len(points))
+
+                points, first = np.unique(candidates, return_index=True)
+                steps.append(_Step(i, offsets, points, options[first]))
+
+            if chapter == ROUTE_REQUIREMENT_CHAPTER and route in ROUTE_REQUIREMENTS:
+                alignment, level = ROUTE_REQUIREMENTS[route]
+                a = ALIGNMENTS.index(alignment)
+                points = points[self.unflatten(points)[:, a] >= level]
+
+            chapter_points[chapter] = points
+
+        self.steps[route] = steps
+        self.chapter_points[route] = chapter_points
+
+    def __offset(self, lgc: Lgc) -> int:
+        return int(
+            lgc.law * self.strides[0]
+            + lgc.grey * self.strides[1]
+            + lgc.chaos * self.strides[2]
+        )
+
+    def flatten(self, lgc: Lgc) -> int:
+        return self.__offset(lgc) - self.__offset(
+            Lgc(int(self.lower[0]), int(self.lower[1]), int(self.lower[2]))
+        )
+
+    def unflatten(self, points: Points) -> Points:
+        coordinates = (points[:, np.newaxis] // self.strides) % self.shape
+
+        result: Points = coordinates + self.lower
+        return result
+
+    def reachable(self, route: Route, chapter: int = LAST_CHAPTER) -> Points:
+        return self.unflatten(self.chapter_points[route][chapter])
+
+    def is_reachable(self, route: Route, chapter: int, lgc: Lgc) -> bool:
+        points = self.chapter_points[route][chapter]
+        flat = self.flatten(lgc)
+
+        j = int(np.searchsorted(points, flat))
+        return j < len(points) and int(points[j]) == flat
+
+    def solution_for(self, route: Route, lgc: Lgc) -> Solution:
+        assert self.is_reachable(route, LAST_CHAPTER, lgc)
+
+        point = self.flatten(lgc)
+        chosen = {}
+        for step in reversed(self.steps[route]):
+            if step.points is None or step.options is None:
+                point -= int(step.offsets[0])
+                continue
+
+            option = int(step.options[np.searchsorted(step.points, point)])
+            chosen[step.event_index] = option
+            point -= int(step.offsets[option])
+
+        choices = [(self.events[i], chosen[i]) for i in sorted(chosen)]
+
+        return Solution(choices=choices, route=route)
+
+    def solve(
+        self, constraints: Iterable[Constraint], goal: Optional[Goal]
+    ) -> Optional[tuple[Solution, Lgc]]:
+        constraints = list(constraints)
+
+        best: Optional[tuple[Route, Lgc]] = None
+        for route in Route:
+            # TODO: actually model the fourth route constraint instead
+            if route == Route.Fourth:
+                continue
+
+            totals = self.reachable(route)
+            for constraint in constraints:
+                alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+                totals = totals[totals[:, ALIGNMENTS.index(alignment)] >= level]
+
+            if len(totals) == 0:
+                continue
+
+            j = 0
+            if goal is not None:
+                j = int(np.argmax(totals[:, ALIGNMENTS.index(GOAL_ALIGNMENTS[goal])]))
+
+            lgc = Lgc(int(totals[j, 0]), int(totals[j, 1]), int(totals[j, 2]))
+            if (
+                best is None
+                or goal is not None
+                and getattr(lgc, GOAL_ALIGNMENTS[goal])
+                > getattr(best[1], GOAL_ALIGNMENTS[goal])
+            ):
+                best = (route, lgc)
+
+        if best is None:
+            return None
+
+        route, lgc = best
+        return self.solution_for(route, lgc), lgc
+
+
+def _event_range(event: Event) -> tuple[list[int], list[int]]:
+    impacts = [choice.impact for choice in event.choices]
+    if len(impacts) == 0:
+        impacts = [Lgc(0, 0, 0)]
+
+    totals = [event.completion + impact for impact in impacts]
+
+    return (
+        [
+            min(getattr(total, alignment) for total in totals)
+            for alignment in ALIGNMENTS
+        ],
+        [
+            max(getattr(total, alignment) for total in totals)
+            for alignment in ALIGNMENTS
+        ],
+    )
@@ -1,15 +1,28 @@
-from typing import Annotated, Any, Optional
+from typing import Annotated, Any, Optional, TYPE_CHECKING
 
+import enum
 import logging
 import pathlib
 import sys
 
-import pulp
 import typer
 
-from .events import Event, Solution
-from .milp import create_milp, extract_solution, Constraint, Goal
+from .cache import default_cache_directory, solve_key, SolveCache
+from .dataset import load_event_table, load_events
+from .event_table import TableSolution
+from .events import Event, EventIndex, Route, Solution
+from .incremental_simulation import IncrementalSimulation
+from .profiling import Profiler
+from .rules import Constraint, Goal, ROUTE_REQUIREMENT_CHAPTER, ROUTE_REQUIREMENTS
 from .simulation import Simulation
+from .solver_settings import SolverBackend, SolverSettings
+
+if TYPE_CHECKING:
+    from .milp import ModelSize
+    from .solvers import SolveReport
+
+# Modules that need pulp or numpy are imported by the commands that use them, so
+# that lightweight commands like simulate start quickly
 
 SUCCESS = 0
 _FAILURE = 1
@@ -17,6 +30,42 @@ _FAILURE = 1
 app = typer.Typer()
 
 
+class SolveMethod(enum.Enum):
+    Milp = "milp"
+    Routes = "routes"
+    Lattice = "lattice"
+    Sparse = "sparse"
+
+
+# Options of every command that solves, which make up its SolverSettings
+SolverOption = Annotated[
+    SolverBackend,
+    typer.Option(help="Solver to use for the MILP."),
+]
+ThreadsOption = Annotated[
+    Optional[int],
+    typer.Option(help="Number of threads the solver may use."),
+]
+TimeLimitOption = Annotated[
+    Optional[float],
+    typer.Option(
+        help="Wall-clock limit in seconds for each solve, after which the best solution found so far is used."
+    ),
+]
+GapRelOption = Annotated[
+    Optional[float],
+    typer.Option(help="Stop once the solution is within this relative gap."),
+]
+GapAbsOption = Annotated[
+    Optional[float],
+    typer.Option(help="Stop once the solution is within this absolute gap."),
+]
+WarmStartOption = Annotated[
+    bool,
+    typer.Option(help="Pass initial variable values to the solver."),
+]
+
+
 @app.command()
 def solve(
     events_filepath: Annotated[
@@ -35,30 +84,113 @@ def solve(
         Optional[Goal],
         typer.Option(help="Goal/preference to have the solver optimize towards."),
     ] = None,
+    method: Annotated[
+        SolveMethod,
+        typer.Option(help="How to search for a solution."),
+    ] = SolveMethod.Milp,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel solving."),
+    ] = None,
+    presolve: Annotated[
+        bool,
+        typer.Option(
+            help="Fold constant events and drop options that can't improve the goal or constraints before solving."
+        ),
+    ] = False,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    warm_start: WarmStartOption = False,
+    cache: Annotated[
+        bool,
+        typer.Option(help="Reuse solutions of identical previous solves."),
+    ] = True,
+    cache_directory: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(help="Directory to store cached solutions in."),
+    ] = None,
+    profile: Annotated[
+        bool,
+        typer.Option(help="Log the wall time of each phase."),
+    ] = False,
+    profile_memory: Annotated[
+        bool,
+        typer.Option(
+            help="Also trace the peak memory of each phase when profiling, which makes the phases slower."
+        ),
+    ] = False,
+    metrics_json: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(
+            help="Filepath to write the phase timings and metrics to as JSON."
+        ),
+    ] = None,
     verbose: bool = False,
 ) -> None:
     failed = False
 
     logger = create_logger(verbose)
+    profiler = Profiler(
+        enabled=profile or metrics_json is not None, trace_memory=profile_memory
+    )
 
-    with open(events_filepath, "r", encoding="utf-8") as input_stream:
-        events = Event.multiple_from_csv(input_stream)
+    with profiler.phase("load_events"):
+        events = load_events(events_filepath)
+    profiler.record("events", len(events))
 
     if constraint is None:
         constraint = []
 
-    problem = create_milp(events, constraint, goal)
-    logger.debug(problem)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+        warm_start=warm_start,
+    )
 
-    solver = pulp.PULP_CBC_CMD(msg=0)
+    solve_cache = SolveCache(cache_directory or default_cache_directory())
+    key = solve_key(
+        events,
+        constraint,
+        goal,
+        f"method={method.value};presolve={presolve};{settings.key()}",
+    )
 
-    problem.solve(solver)
-    logger.debug("==============")
-    logger.debug("Solution:")
-    for vairable in problem.variables():
-        logger.debug(f"{vairable} = {vairable.varValue}")
+    cached = solve_cache.get(key, events) if cache else None
+    profiler.record("cache_hit", cached is not None)
+    if cached is not None:
+        logger.info("Loaded result from cache.")
+        status, found_solution = cached
+        if found_solution is None:
+            logger.error("Failed to create a solution that satisfies all constraints.")
+            logger.error("The cached result is infeasible, use --no-cache to re-solve.")
+    else:
+        status, found_solution, proven = find_solution(
+            events,
+            constraint,
+            goal,
+            method,
+            processes,
+            presolve,
+            settings,
+            logger,
+            profiler,
+        )
+        if cache and proven:
+            solve_cache.put(key, events, status, found_solution)
+
+    if found_solution is None:
+        write_profile(profiler, profile, metrics_json, logger)
+        sys.exit(1)
+
+    solution = found_solution
 
-    if problem.status < 0:
+    if status < 0:
         logger.error("Failed to create a solution that satisfies all constraints.")
         logger.error("The following is the solver's best attempt solution.")
 
@@ -66,7 +198,6 @@ def solve(
     else:
         logger.info("Generated a valid solution.")
 
-    solution = extract_solution(events, problem)
     logger.info("===============")
     logger.info("Choices:")
     logger.info(f"\tChapter 5 Route: {solution.route}")
@@ -80,15 +211,386 @@ def solve(
             solution.write_csv(output_stream)
         logger.info(f"Wrote generated solution to: {output_solution_filepath}")
 
-    simulation = Simulation(events)
-    simulation.apply_solution(solution)
+    with profiler.phase("apply_solution"):
+        simulation = Simulation(events)
+        simulation.apply_solution(solution)
 
     logger.info(f"Final LGC = {simulation.lgc}")
 
+    write_profile(profiler, profile, metrics_json, logger)
+
     if failed:
         sys.exit(1)
 
 
+@app.command()
+def solve_batch(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    output_directory: Annotated[
+        pathlib.Path,
+        typer.Option(help="Directory to write the solutions and summary to."),
+    ],
+    constraint_set: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            help="Comma separated set of constraints to solve with. Can be given multiple times, an empty string means no constraints."
+        ),
+    ] = None,
+    goal: Annotated[
+        Optional[list[Goal]],
+        typer.Option(help="Goal to solve with. Can be given multiple times."),
+    ] = None,
+    all_combinations: Annotated[
+        bool,
+        typer.Option(
+            help="Solve every combination of constraints with every goal, and with no goal."
+        ),
+    ] = False,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel solving."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    warm_start: WarmStartOption = False,
+    verbose: bool = False,
+) -> None:
+    from . import batch
+
+    logger = create_logger(verbose)
+
+    events = load_events(events_filepath)
+
+    if all_combinations:
+        combinations = batch.combinations(batch.all_constraint_sets(), [None, *Goal])
+    else:
+        try:
+            constraint_sets = [
+                batch.parse_constraint_set(string) for string in constraint_set or [""]
+            ]
+        except ValueError as e:
+            raise typer.BadParameter(str(e), param_hint="'--constraint-set'")
+        goals: list[Optional[Goal]] = list(goal) if goal else [None]
+
+        combinations = batch.combinations(constraint_sets, goals)
+
+    logger.info(f"Solving {len(combinations)} combinations of constraints and goals")
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+        warm_start=warm_start,
+    )
+    check_solver(settings, logger)
+
+    results = batch.solve_batch(
+        events, combinations, output_directory, processes, settings
+    )
+
+    summary_filepath = output_directory / "summary.csv"
+    with open(summary_filepath, "w", encoding="utf8") as output_stream:
+        batch.write_summary(results, output_stream)
+
+    num_feasible = sum(1 for result in results if result.feasible)
+    logger.info(f"Found solutions for {num_feasible} of {len(results)} combinations")
+    logger.info(f"Wrote summary to: {summary_filepath}")
+
+
+@app.command()
+def pareto(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    output_directory: Annotated[
+        pathlib.Path,
+        typer.Option(help="Directory to write the frontier solutions to."),
+    ],
+    constraint: Annotated[
+        Optional[list[Constraint]],
+        typer.Option(help="Hard constraints to add to the MILP."),
+    ] = None,
+    chaos_step: Annotated[
+        int,
+        typer.Option(
+            help="Step between the chaos lower bounds that are swept. Values above 1 are faster but may miss points."
+        ),
+    ] = 1,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel solving."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    verbose: bool = False,
+) -> None:
+    from .pareto import pareto_frontier, write_frontier
+
+    logger = create_logger(verbose)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+    )
+    check_solver(settings, logger)
+
+    events = load_events(events_filepath)
+
+    if constraint is None:
+        constraint = []
+
+    points = pareto_frontier(events, constraint, chaos_step, processes, settings)
+    if len(points) == 0:
+        logger.error("Failed to create a solution that satisfies all constraints.")
+        sys.exit(1)
+
+    output_directory.mkdir(parents=True, exist_ok=True)
+    frontier_filepath = output_directory / "frontier.csv"
+    with open(frontier_filepath, "w", encoding="utf8") as output_stream:
+        write_frontier(points, output_directory, output_stream)
+
+    logger.info(f"Found {len(points)} Pareto optimal LGC totals:")
+    for point in points:
+        logger.info(f"\t{point.lgc.simple_str()} ({point.solution.route.name} route)")
+    logger.info(f"Wrote frontier to: {frontier_filepath}")
+
+
+@app.command()
+def criticality(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    output_report_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to write the report to as a CSV."),
+    ],
+    constraint: Annotated[
+        Optional[list[Constraint]],
+        typer.Option(help="Hard constraints to add to the MILP."),
+    ] = None,
+    goal: Annotated[
+        Optional[Goal],
+        typer.Option(help="Goal/preference to have the solver optimize towards."),
+    ] = None,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel solving."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    verbose: bool = False,
+) -> None:
+    from .criticality import criticality as event_criticality
+
+    logger = create_logger(verbose)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+    )
+    check_solver(settings, logger)
+
+    events = load_events(events_filepath)
+
+    report = event_criticality(events, constraint or [], goal, processes, settings)
+    if report.objective is None:
+        logger.error("Failed to create a solution that satisfies all constraints.")
+        sys.exit(1)
+
+    with open(output_report_filepath, "w", encoding="utf8") as output_stream:
+        report.write_csv(output_stream)
+
+    logger.info(f"Optimum without forced choices: {report.objective}")
+    logger.info("Events where a choice lowers the optimum the most:")
+    for event, drop in report.ranked_events()[:10]:
+        if drop == 0:
+            break
+
+        name = event.name
+        if event.required_route is not None:
+            name += f" ({event.required_route.name} route)"
+        logger.info(f"\t{name}: {'infeasible' if drop is None else f'-{drop}'}")
+    logger.info(f"Wrote report to: {output_report_filepath}")
+
+
+@app.command()
+def enumerate_plans(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    output_directory: Annotated[
+        pathlib.Path,
+        typer.Option(help="Directory to write the plans to."),
+    ],
+    constraint: Annotated[
+        Optional[list[Constraint]],
+        typer.Option(help="Hard constraints to add to the MILP."),
+    ] = None,
+    goal: Annotated[
+        Optional[Goal],
+        typer.Option(help="Goal/preference to have the solver optimize towards."),
+    ] = None,
+    k_best: Annotated[
+        Optional[int],
+        typer.Option(
+            help="Find the k best plans instead of all of the optimal plans.", min=1
+        ),
+    ] = None,
+    max_plans: Annotated[
+        int,
+        typer.Option(help="Most plans to find.", min=1),
+    ] = 1000,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel solving."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    verbose: bool = False,
+) -> None:
+    from .enumeration import enumerate_plans as find_plans, PlanWriter
+
+    logger = create_logger(verbose)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+    )
+    check_solver(settings, logger)
+
+    events = load_events(events_filepath)
+
+    plans = find_plans(
+        events,
+        constraint or [],
+        goal,
+        output_directory,
+        k_best,
+        max_plans,
+        processes,
+        settings,
+    )
+
+    # Plans are written out as they're found, so that a long run can be followed
+    output_directory.mkdir(parents=True, exist_ok=True)
+    plans_filepath = output_directory / "plans.csv"
+    with open(plans_filepath, "w", encoding="utf8") as output_stream:
+        writer = PlanWriter(output_stream)
+        for plan in plans:
+            writer.write(plan)
+            if writer.count <= 10:
+                logger.info(
+                    f"\tPlan {writer.count}: {plan.lgc.simple_str()} ({plan.route.name} route)"
+                )
+
+    if writer.count == 0:
+        plans_filepath.unlink()
+        logger.error("Failed to create a solution that satisfies all constraints.")
+        sys.exit(1)
+
+    logger.info(f"Found {writer.count} plans")
+    logger.info(f"Wrote plans to: {plans_filepath}")
+
+
+@app.command()
+def sample(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    samples: Annotated[
+        int,
+        typer.Option(help="Number of random playthroughs to sample.", min=1),
+    ] = 1_000_000,
+    law_weight: Annotated[
+        float,
+        typer.Option(help="How much more likely options are picked per Law point."),
+    ] = 0.0,
+    grey_weight: Annotated[
+        float,
+        typer.Option(help="How much more likely options are picked per Grey point."),
+    ] = 0.0,
+    chaos_weight: Annotated[
+        float,
+        typer.Option(help="How much more likely options are picked per Chaos point."),
+    ] = 0.0,
+    seed: Annotated[
+        Optional[int],
+        typer.Option(help="Seed for the random number generators."),
+    ] = None,
+    output_histograms_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(help="Filepath to write the alignment histograms to."),
+    ] = None,
+    output_probabilities_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(help="Filepath to write the threshold probabilities to."),
+    ] = None,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to sample with."),
+    ] = None,
+    verbose: bool = False,
+) -> None:
+    from .batch_simulation import ROUTES
+    from .sampling import sample as sample_playthroughs, Policy
+
+    logger = create_logger(verbose)
+
+    events = load_events(events_filepath)
+
+    policy = Policy(
+        law_weight=law_weight, grey_weight=grey_weight, chaos_weight=chaos_weight
+    )
+    result = sample_playthroughs(
+        events, samples, policy=policy, seed=seed, processes=processes
+    )
+
+    logger.info(f"Sampled {result.samples} playthroughs")
+    for r, route in enumerate(ROUTES):
+        if route not in ROUTE_REQUIREMENTS:
+            continue
+
+        logger.info(
+            f"\t{route.name} route requirement met: {result.eligible[r] / result.samples:.4f}"
+        )
+
+    if output_histograms_filepath is not None:
+        with open(output_histograms_filepath, "w", encoding="utf8") as output_stream:
+            result.write_histograms(output_stream)
+        logger.info(f"Wrote histograms to: {output_histograms_filepath}")
+
+    if output_probabilities_filepath is not None:
+        with open(output_probabilities_filepath, "w", encoding="utf8") as output_stream:
+            result.write_probabilities(output_stream)
+        logger.info(f"Wrote probabilities to: {output_probabilities_filepath}")
+
+
 @app.command()
 def simulate(
     events_filepath: Annotated[
@@ -99,26 +601,558 @@ def simulate(
         pathlib.Path,
         typer.Option(help="Filepath to CSV file of choices to load as input."),
     ],
+    profile: Annotated[
+        bool,
+        typer.Option(help="Log the wall time of each phase."),
+    ] = False,
+    profile_memory: Annotated[
+        bool,
+        typer.Option(
+            help="Also trace the peak memory of each phase when profiling, which makes the phases slower."
+        ),
+    ] = False,
+    metrics_json: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(
+            help="Filepath to write the phase timings and metrics to as JSON."
+        ),
+    ] = None,
+    output_trajectory_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(
+            help="Filepath to write the alignments and levels at the end of each chapter to as a CSV."
+        ),
+    ] = None,
     verbose: bool = False,
 ) -> None:
     logger = create_logger(verbose)
+    profiler = Profiler(
+        enabled=profile or metrics_json is not None, trace_memory=profile_memory
+    )
+
+    # The events are only read column by column, so don't create objects for them
+    with profiler.phase("load_events"):
+        table = load_event_table(events_filepath)
+    profiler.record("events", len(table))
+
+    try:
+        with profiler.phase("load_solution"):
+            with open(input_solution_filepath, "r", encoding="utf8") as input_stream:
+                solution = TableSolution.from_csv(table, input_stream)
+        logger.info(f"Loaded solution from: {input_solution_filepath}")
+
+        with profiler.phase("apply_solution"):
+            lgc = solution.final_lgc(table)
+    except ValueError as e:
+        logger.error(f"Invalid solution: {e}")
+        sys.exit(1)
+
+    logger.info(f"Final LGC = {lgc}")
+
+    if output_trajectory_filepath is not None:
+        with profiler.phase("trajectory"):
+            trajectory = IncrementalSimulation(table, solution).trajectory()
+
+        with open(output_trajectory_filepath, "w", encoding="utf8") as output_stream:
+            trajectory.write_csv(output_stream)
+        logger.info(f"Wrote trajectory to: {output_trajectory_filepath}")
 
-    with open(events_filepath, "r", encoding="utf-8") as input_stream:
-        events = Event.multiple_from_csv(input_stream)
+        if trajectory.route_requirement_met is False:
+            logger.warning(
+                f"Alignments at the end of chapter {ROUTE_REQUIREMENT_CHAPTER} don't meet the {solution.route.name} route requirement"
+            )
+
+    write_profile(profiler, profile, metrics_json, logger)
+
+
+@app.command()
+def simulate_batch(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    solutions: Annotated[
+        list[str],
+        typer.Option(
+            help="Solution CSV file, directory of solution CSV files, or glob pattern of solution CSV files. Can be given multiple times."
+        ),
+    ],
+    output_results_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(
+            help="Filepath to write the results to as a CSV, instead of to stdout."
+        ),
+    ] = None,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of worker processes to use for parallel simulation."),
+    ] = None,
+    verbose: bool = False,
+) -> None:
+    from . import validation
+
+    logger = create_logger(verbose)
+
+    try:
+        filepaths = validation.solution_filepaths(solutions)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    table = load_event_table(events_filepath)
+    logger.info(f"Simulating {len(filepaths)} solutions")
+
+    num_invalid = 0
+    output_stream = (
+        open(output_results_filepath, "w", encoding="utf8")
+        if output_results_filepath is not None
+        else sys.stdout
+    )
+    try:
+        writer = validation.CheckWriter(output_stream, validation.num_chapters(table))
+        for check in validation.check_solutions(table, filepaths, processes):
+            writer.write(check)
+            if not check.valid:
+                num_invalid += 1
+                logger.warning(f"Invalid solution: {check.filepath}")
+    finally:
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+    logger.info(
+        f"{len(filepaths) - num_invalid} of {len(filepaths)} solutions are valid"
+    )
+    if output_results_filepath is not None:
+        logger.info(f"Wrote results to: {output_results_filepath}")
+
+    if num_invalid > 0:
+        sys.exit(1)
+
+
+@app.command()
+def bundle(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    solutions: Annotated[
+        list[str],
+        typer.Option(
+            help="Solution CSV file, directory of solution CSV files, or glob pattern of solution CSV files. Can be given multiple times."
+        ),
+    ],
+    output_bundle_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to write the bundle of solutions to."),
+    ],
+    verbose: bool = False,
+) -> None:
+    from .bundle import bundle_csvs
+    from .validation import solution_filepaths
+
+    logger = create_logger(verbose)
+
+    try:
+        filepaths = solution_filepaths(solutions)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    table = load_event_table(events_filepath)
+
+    try:
+        count = bundle_csvs(table, filepaths, output_bundle_filepath)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to write bundle: {e}")
+        sys.exit(1)
+
+    logger.info(f"Wrote {count} solutions to: {output_bundle_filepath}")
+
+
+@app.command()
+def unbundle(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(
+            help="Filepath to CSV file containing the event information that the bundle was written for."
+        ),
+    ],
+    input_bundle_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to the bundle of solutions to read."),
+    ],
+    output_directory: Annotated[
+        pathlib.Path,
+        typer.Option(help="Directory to write a CSV file per solution to."),
+    ],
+    verbose: bool = False,
+) -> None:
+    from .bundle import unbundle_csvs
+
+    logger = create_logger(verbose)
+
+    table = load_event_table(events_filepath)
+
+    try:
+        with open(input_bundle_filepath, "rb") as input_stream:
+            filepaths = unbundle_csvs(table, input_stream, output_directory)
+    except ValueError as e:
+        logger.error(f"Failed to read bundle: {e}")
+        sys.exit(1)
+
+    logger.info(f"Wrote {len(filepaths)} solutions to: {output_directory}")
+
+
+@app.command()
+def what_if(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    input_solution_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file of the plan to change."),
+    ],
+    output_solution_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(help="Filepath to write the changed solution to as a CSV."),
+    ] = None,
+    pin: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            help="Force a choice, as <event name>=<option>. Can be given multiple times."
+        ),
+    ] = None,
+    forbid: Annotated[
+        Optional[list[str]],
+        typer.Option(
+            help="Forbid a choice, as <event name>=<option>. Can be given multiple times."
+        ),
+    ] = None,
+    pin_route: Annotated[
+        Optional[str],
+        typer.Option(help="Force the chapter 5 route."),
+    ] = None,
+    forbid_route: Annotated[
+        Optional[list[str]],
+        typer.Option(help="Forbid a chapter 5 route. Can be given multiple times."),
+    ] = None,
+    constraint: Annotated[
+        Optional[list[Constraint]],
+        typer.Option(help="Constraint to apply to the solution."),
+    ] = None,
+    goal: Annotated[
+        Optional[Goal],
+        typer.Option(help="Goal/preference to have the solver optimize towards."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    verbose: bool = False,
+) -> None:
+    from .what_if import Edits, parse_choice, resolve
+
+    logger = create_logger(verbose)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+    )
+    check_solver(settings, logger)
+
+    events = load_events(events_filepath)
+    index = EventIndex(events)
 
     with open(input_solution_filepath, "r", encoding="utf8") as input_stream:
-        solution = Solution.from_csv(events, input_stream)
+        original = Solution.from_csv(index, input_stream)
     logger.info(f"Loaded solution from: {input_solution_filepath}")
 
-    simulation = Simulation(events)
+    try:
+        edits = Edits(
+            pinned_route=Route.from_str(pin_route) if pin_route is not None else None,
+            forbidden_routes=[Route.from_str(route) for route in forbid_route or []],
+        )
+
+        # Look events up on the route the plan will most likely end up on first
+        routes = [edits.pinned_route or original.route, *Route]
+        edits.pinned_choices = [
+            parse_choice(index, string, routes) for string in pin or []
+        ]
+        edits.forbidden_choices = [
+            parse_choice(index, string, routes) for string in forbid or []
+        ]
+
+        status, solution, delta = resolve(
+            events, original, edits, constraint or [], goal, settings
+        )
+    except (KeyError, ValueError) as error:
+        logger.error(f"Invalid edit: {error}")
+        sys.exit(1)
+
+    if status < 0:
+        logger.error("Failed to create a solution that satisfies all constraints.")
+        logger.error("The following is the solver's best attempt solution.")
+    else:
+        logger.info("Generated a valid solution.")
+
+    logger.info("===============")
+    logger.info("Changes:")
+    if delta.route is not None:
+        logger.info(f"\tChapter 5 Route: {delta.route[0]} -> {delta.route[1]}")
+    for event, before, after in delta.choices:
+        logger.info(f"\t{event.name}: {before} -> {after}")
+
+    if output_solution_filepath is not None:
+        with open(output_solution_filepath, "w", encoding="utf8") as output_stream:
+            solution.write_csv(output_stream)
+        logger.info(f"Wrote generated solution to: {output_solution_filepath}")
+
+    simulation = Simulation(index)
     simulation.apply_solution(solution)
 
     logger.info(f"Final LGC = {simulation.lgc}")
 
+    if status < 0:
+        sys.exit(1)
+
+
+@app.command()
+def serve(
+    events_filepath: Annotated[
+        pathlib.Path,
+        typer.Option(help="Filepath to CSV file containing event information."),
+    ],
+    socket_filepath: Annotated[
+        Optional[pathlib.Path],
+        typer.Option(
+            help="Unix socket to listen on for requests. Reads requests from stdin if not given."
+        ),
+    ] = None,
+    processes: Annotated[
+        Optional[int],
+        typer.Option(help="Number of requests to answer concurrently."),
+    ] = None,
+    solver: SolverOption = SolverBackend.Cbc,
+    threads: ThreadsOption = None,
+    time_limit: TimeLimitOption = None,
+    gap_rel: GapRelOption = None,
+    gap_abs: GapAbsOption = None,
+    verbose: bool = False,
+) -> None:
+    from .server import Server
+
+    logger = create_logger(verbose)
+    settings = SolverSettings(
+        backend=solver,
+        threads=threads,
+        time_limit=time_limit,
+        gap_rel=gap_rel,
+        gap_abs=gap_abs,
+    )
+
+    events = load_events(events_filepath)
+    try:
+        server = Server(events, processes, settings)
+    except ValueError as error:
+        logger.error(str(error))
+        sys.exit(1)
+    logger.info(f"Model size: {server.base_model.size().simple_str()}")
+
+    if socket_filepath is None:
+        logger.info("Reading requests from stdin")
+        server.serve_stream(sys.stdin, sys.stdout)
+    else:
+        logger.info(f"Listening for requests on: {socket_filepath}")
+        server.serve_socket(socket_filepath)
+
+
+def find_solution(
+    events: list[Event],
+    constraint: list[Constraint],
+    goal: Optional[Goal],
+    method: SolveMethod,
+    processes: Optional[int],
+    presolve: bool,
+    settings: SolverSettings,
+    logger: logging.Logger,
+    profiler: Profiler = Profiler(),
+) -> tuple[int, Optional[Solution], bool]:
+    import pulp
+
+    from .bounds import precheck
+    from .decomposition import solve_by_route
+    from .milp import create_milp, extract_solution, ModelSize
+    from .presolve import presolve as presolve_events
+    from .solvers import create_solver, solve_problem
+
+    try:
+        if method == SolveMethod.Sparse:
+            settings.cbc_arguments()
+        else:
+            create_solver(settings)
+    except ValueError as error:
+        logger.error(str(error))
+        return pulp.const.LpStatusNotSolved, None, False
+
+    with profiler.phase("precheck"):
+        checked = precheck(events, constraint)
+    if not checked.feasible:
+        profiler.record("status", pulp.const.LpStatus[pulp.const.LpStatusInfeasible])
+        logger.error("Failed to create a solution that satisfies all constraints.")
+        logger.error("None of the Chapter 5 routes can reach the constraints:")
+        for reason in checked.reasons:
+            logger.error(f"\t{reason}")
+        return pulp.const.LpStatusInfeasible, None, True
+
+    presolved = None
+    model_events = events
+    if presolve:
+        with profiler.phase("presolve"):
+            presolved = presolve_events(events, constraint, goal)
+        model_events = presolved.events
+        logger.info(f"Presolve: {presolved.report.simple_str()}")
+
+    profiler.record("method", method.value)
+
+    if method == SolveMethod.Lattice:
+        from .lattice import ReachableAlignments
+
+        with profiler.phase("solve"):
+            lattice_result = ReachableAlignments(model_events).solve(constraint, goal)
+        if lattice_result is None:
+            logger.error("Failed to create a solution that satisfies all constraints.")
+            logger.error("No reachable alignment totals satisfy the constraints.")
+            return pulp.const.LpStatusInfeasible, None, True
+
+        status = pulp.const.LpStatusOptimal
+        proven = True
+        solution, _ = lattice_result
+    elif method == SolveMethod.Routes:
+        with profiler.phase("solve"):
+            status, route_solution = solve_by_route(
+                model_events, constraint, goal, processes, settings
+            )
+        profiler.record("status", pulp.const.LpStatus[status])
+        if route_solution is None:
+            logger.error("Failed to create a solution that satisfies all constraints.")
+            logger.error("None of the Chapter 5 routes has a feasible solution.")
+            return status, None, status == pulp.const.LpStatusInfeasible
+
+        # The route solves don't report whether they stopped early, so only runs
+        # without limits count as proven
+        proven = status == pulp.const.LpStatusOptimal and (
+            settings.time_limit,
+            settings.gap_rel,
+            settings.gap_abs,
+        ) == (None, None, None)
+        solution = route_solution
+    elif method == SolveMethod.Sparse:
+        from .sparse_milp import create_sparse_milp
+
+        with profiler.phase("build_model"):
+            model = create_sparse_milp(model_events, constraint, goal)
+        model_size = model.size()
+        logger.info(f"Model size: {model_size.simple_str()}")
+
+        with profiler.phase("solve"):
+            report, values = model.solve(settings)
+        logger.info(f"Solver: {report.simple_str()}")
+        record_solve(profiler, model_size, report)
+        if report.status == pulp.const.LpStatusNotSolved:
+            logger.error("The solver didn't find a solution.")
+            return report.status, None, False
+
+        status = report.status
+        proven = report.solution_status == pulp.const.LpSolutionOptimal or (
+            report.status == pulp.const.LpStatusInfeasible
+        )
+        with profiler.phase("extract_solution"):
+            solution = model.extract_solution(model_events, values)
+    else:
+        with profiler.phase("build_model"):
+            problem = create_milp(model_events, constraint, goal)
+        logger.debug(problem)
+        model_size = ModelSize.from_problem(problem)
+        logger.info(f"Model size: {model_size.simple_str()}")
+
+        with profiler.phase("solve"):
+            report = solve_problem(problem, settings)
+        logger.info(f"Solver: {report.simple_str()}")
+        record_solve(profiler, model_size, report)
+
+        # Only build the per variable messages when they would be shown
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("==============")
+            logger.debug("Solution:")
+            for vairable in problem.variables():
+                logger.debug(f"{vairable} = {vairable.varValue}")
+
+        if report.status == pulp.const.LpStatusNotSolved:
+            logger.error("The solver didn't find a solution.")
+            return report.status, None, False
+
+        status = report.status
+        proven = report.solution_status == pulp.const.LpSolutionOptimal or (
+            report.status == pulp.const.LpStatusInfeasible
+        )
+        with profiler.phase("extract_solution"):
+            solution = extract_solution(model_events, problem)
+
+    if presolved is not None:
+        solution = presolved.restore(solution)
+
+    return status, solution, proven
+
+
+# Exits if the solver backend can't be used, before any solving starts
+def check_solver(settings: SolverSettings, logger: logging.Logger) -> None:
+    from .solvers import create_solver
+
+    try:
+        create_solver(settings)
+    except ValueError as error:
+        logger.error(str(error))
+        sys.exit(1)
+
+
+def record_solve(
+    profiler: Profiler, model_size: "ModelSize", report: "SolveReport"
+) -> None:
+    import pulp
+
+    profiler.record("variables", model_size.variables)
+    profiler.record("constraints", model_size.constraints)
+    profiler.record("nonzeros", model_size.nonzeros)
+    profiler.record("status", pulp.const.LpStatus[report.status])
+    profiler.record("solution_status", pulp.const.LpSolution[report.solution_status])
+    profiler.record("objective", report.objective)
+    profiler.record("bound", report.bound)
+
+
+def write_profile(
+    profiler: Profiler,
+    profile: bool,
+    metrics_json: Optional[pathlib.Path],
+    logger: logging.Logger,
+) -> None:
+    if profile:
+        logger.info("Profile:")
+        for line in profiler.summary_lines():
+            logger.info(f"\t{line}")
+
+    if metrics_json is not None:
+        with open(metrics_json, "w", encoding="utf8") as output_stream:
+            profiler.write_json(output_stream)
+        logger.info(f"Wrote metrics to: {metrics_json}")
+
 
 def create_logger(verbose: bool) -> logging.Logger:
     logger = logging.getLogger("ttdlgc_model")
-    logger.setLevel(logging.DEBUG)
+    logger.setLevel(logging.DEBUG if verbose else logging.INFO)
 
     logger.propagate = False
 
@@ -1,52 +1,55 @@
+from dataclasses import dataclass
 from typing import Iterable, Optional
 
 import collections
-import enum
 
 import pulp
 
-from .events import Event, Route, Solution
-
-
-LAST_CHAPTER = 7
-
-LAW_LEVEL_3 = 60
-GREY_LEVEL_3 = 50
-CHAOS_LEVEL_3 = 30
-
-LAW_LEVEL_4 = 90
-GREY_LEVEL_4 = 75
-CHAOS_LEVEL_4 = 45
-
-LAW_LEVEL_5 = 120
-GREY_LEVEL_5 = 100
-CHAOS_LEVEL_5 = 75
-
-ImpactsDict = dict[
-    int,
-    list[
-        tuple[Optional[pulp.LpVariable], int]
-        | tuple[Optional[pulp.LpVariable], pulp.LpVariable, int]
-    ],
-]
-
-
-class Constraint(enum.Enum):
-    LawLv4AtEnd = "LawLv4AtEnd"
-    GreyLv4AtEnd = "GreyLv4AtEnd"
-    ChaosLv4AtEnd = "ChaosLv4AtEnd"
-    LawLv5AtEnd = "LawLv5AtEnd"
-    GreyLv5AtEnd = "GreyLv5AtEnd"
-    ChaosLv5AtEnd = "ChaosLv5AtEnd"
-
-
-class Goal(enum.Enum):
-    MaximizeLaw = "MaximizeLaw"
-    MaximizeGrey = "MaximizeGrey"
-    MaximizeChaos = "MaximizeChaos"
-
-
-def extract_solution(events: list[Event], problem: pulp.LpProblem) -> Solution:
+from .bounds import chapter_bounds
+from .events import Event, EventIndex, Route, Solution
+from .rules import (
+    ALIGNMENTS,
+    CHAOS_LEVEL_3,
+    CHAOS_LEVEL_4,
+    CHAOS_LEVEL_5,
+    Constraint,
+    GREY_LEVEL_3,
+    GREY_LEVEL_4,
+    GREY_LEVEL_5,
+    Goal,
+    LAST_CHAPTER,
+    LAW_LEVEL_3,
+    LAW_LEVEL_4,
+    LAW_LEVEL_5,
+    ROUTE_REQUIREMENT_CHAPTER,
+)
+
+
+DeltasDict = dict[int, list[tuple[Optional[pulp.LpVariable], int]]]
+
+
+@dataclass(frozen=True)
+class ModelSize:
+    variables: int
+    constraints: int
+    nonzeros: int
+
+    @staticmethod
+    def from_problem(problem: pulp.LpProblem) -> "ModelSize":
+        return ModelSize(
+            variables=problem.numVariables(),
+            constraints=problem.numConstraints(),
+            nonzeros=sum(len(c) for c in problem.constraints.values()),
+        )
+
+    def simple_str(self) -> str:
+        return f"{self.variables} variables, {self.constraints} constraints, {self.nonzeros} nonzeros"
+
+
+def extract_solution(
+    events: list[Event] | EventIndex, problem: pulp.LpProblem
+) -> Solution:
+    index = EventIndex.of(events)
     variables = problem.variablesDict()
 
     route = None
@@ -61,44 +64,56 @@ def extract_solution(events: list[Event], problem: pulp.LpProblem) -> Solution:
 
     assert route is not None
 
+    # Find the chosen options in a single pass over the variables, rather than
+    # looking up the variable of every option by name
+    chosen: dict[int, int] = {}
+    for name, variable in variables.items():
+        if not name.startswith("event_") or not variable.varValue:
+            continue
+
+        _, i, _, o = name.split("_")
+        if variable.varValue > 0 and int(o) < chosen.get(int(i), int(o) + 1):
+            chosen[int(i)] = int(o)
+
     choices = []
-    for i, event in enumerate(events):
+    for i, event in enumerate(index.events):
         if event.required_route is not None and event.required_route != route:
             continue
 
-        if len(event.choices) > 0:
-            for o in range(0, len(event.choices)):
-
-                value = variables[f"event_{i}_option_{o}"]
-                if value.varValue > 0:
-                    choices.append((event, o))
-                    break
+        if len(event.choices) > 0 and i in chosen:
+            choices.append((event, chosen[i]))
 
     return Solution(choices=choices, route=route)
 
 
 def create_milp(
-    events: list[Event], constraints: Iterable[Constraint], goal: Optional[Goal]
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    route: Optional[Route] = None,
 ) -> pulp.LpProblem:
     problem = pulp.LpProblem("LGC_Alignment", pulp.LpMaximize)
 
-    # Create alignment variables
-    law_chapter_variables = [
-        pulp.LpVariable(f"law_at_chapter_{chapter}_end", cat=pulp.const.LpInteger)
-        for chapter in range(1, LAST_CHAPTER + 1)
-    ]
-    grey_chapter_variables = [
-        pulp.LpVariable(f"grey_at_chapter_{chapter}_end", cat=pulp.const.LpInteger)
-        for chapter in range(1, LAST_CHAPTER + 1)
-    ]
-    chaos_chapter_variables = [
-        pulp.LpVariable(f"chaos_at_chapter_{chapter}_end", cat=pulp.const.LpInteger)
-        for chapter in range(1, LAST_CHAPTER + 1)
-    ]
-
-    law_chapter_impacts: ImpactsDict = collections.defaultdict(lambda: [])
-    grey_chapter_impacts: ImpactsDict = collections.defaultdict(lambda: [])
-    chaos_chapter_impacts: ImpactsDict = collections.defaultdict(lambda: [])
+    # Create alignment variables, bounded by what the events can add up to so that
+    # the solver starts from a tighter relaxation
+    bounds = chapter_bounds(events, route)
+    law_chapter_variables, grey_chapter_variables, chaos_chapter_variables = (
+        [
+            pulp.LpVariable(
+                f"{alignment}_at_chapter_{chapter}_end",
+                *bounds[alignment][chapter - 1],
+                cat=pulp.const.LpInteger,
+            )
+            for chapter in range(1, LAST_CHAPTER + 1)
+        ]
+        for alignment in ALIGNMENTS
+    )
+
+    # Only the impacts of events within each chapter are recorded, the chapter
+    # variables then carry over the totals from the previous chapter
+    law_chapter_deltas: DeltasDict = collections.defaultdict(lambda: [])
+    grey_chapter_deltas: DeltasDict = collections.defaultdict(lambda: [])
+    chaos_chapter_deltas: DeltasDict = collections.defaultdict(lambda: [])
 
     # Objective function
     if goal is None:
@@ -121,23 +136,33 @@ def create_milp(
         "Must do one and only one route during chapter 5",
     )
 
+    route_variables = {
+        Route.Law: law_route,
+        Route.Grey: grey_route,
+        Route.Chaos: chaos_route,
+        Route.Fourth: fourth_route,
+    }
+
+    if route is not None:
+        problem += route_variables[route] == 1, "Fixed chapter 5 route"
+
     # Encode event choices
-    event_choices = {}
     for i, event in enumerate(events):
         route_variable = None
-        if event.required_route == Route.Law:
-            route_variable = law_route
-        elif event.required_route == Route.Grey:
-            route_variable = grey_route
-        elif event.required_route == Route.Chaos:
-            route_variable = chaos_route
-        elif event.required_route == Route.Fourth:
-            route_variable = fourth_route
-
-        for j in range(event.chapter, LAST_CHAPTER + 1):
-            law_chapter_impacts[j].append((route_variable, event.completion.law))
-            grey_chapter_impacts[j].append((route_variable, event.completion.grey))
-            chaos_chapter_impacts[j].append((route_variable, event.completion.chaos))
+        if event.required_route is not None:
+            if route is None:
+                route_variable = route_variables[event.required_route]
+            elif event.required_route != route:
+                # Event can never happen on the fixed route
+                continue
+
+        law_chapter_deltas[event.chapter].append((route_variable, event.completion.law))
+        grey_chapter_deltas[event.chapter].append(
+            (route_variable, event.completion.grey)
+        )
+        chaos_chapter_deltas[event.chapter].append(
+            (route_variable, event.completion.chaos)
+        )
 
         if len(event.choices) > 0:
             option_variables = []
@@ -151,35 +176,50 @@ def create_milp(
                 problem.addVariable(option)
                 option_variables.append(option)
 
-            event_choices[i] = option_variables
-
             problem += sum(option_variables) == 1, f"Pick one option for event {i}"
 
-            for j in range(event.chapter, LAST_CHAPTER + 1):
-                for o, option in enumerate(option_variables):
-                    law_chapter_impacts[j].append(
-                        (route_variable, option, event.choices[o].impact.law)
-                    )
-                    grey_chapter_impacts[j].append(
-                        (route_variable, option, event.choices[o].impact.grey)
-                    )
-                    chaos_chapter_impacts[j].append(
-                        (route_variable, option, event.choices[o].impact.chaos)
+            for o, option in enumerate(option_variables):
+                impact_variable = option
+                if route_variable is not None:
+                    # Would be `route_variable * option`, but we need to keep it linear
+                    # https://or.stackexchange.com/questions/37/how-to-linearize-the-product-of-two-binary-variables
+                    #
+                    # The product is shared by all three alignments
+                    impact_variable = pulp.LpVariable(
+                        f"route_and_event_{i}_option_{o}",
+                        cat=pulp.const.LpBinary,
                     )
+                    problem.addVariable(impact_variable)
+
+                    problem += impact_variable <= route_variable
+                    problem += impact_variable <= option
+                    problem += impact_variable >= route_variable + option - 1
+
+                law_chapter_deltas[event.chapter].append(
+                    (impact_variable, event.choices[o].impact.law)
+                )
+                grey_chapter_deltas[event.chapter].append(
+                    (impact_variable, event.choices[o].impact.grey)
+                )
+                chaos_chapter_deltas[event.chapter].append(
+                    (impact_variable, event.choices[o].impact.chaos)
+                )
 
     # Encode requirements to start routes at chapter 5
     # TODO: Model fourth route requirement
     # TODO: Account for default route if alignment score is too low?
     problem += (
-        law_route * LAW_LEVEL_3 <= law_chapter_variables[4],
+        law_route * LAW_LEVEL_3 <= law_chapter_variables[ROUTE_REQUIREMENT_CHAPTER - 1],
         "Law route alignment requirement",
     )
     problem += (
-        grey_route * GREY_LEVEL_3 <= grey_chapter_variables[4],
+        grey_route * GREY_LEVEL_3
+        <= grey_chapter_variables[ROUTE_REQUIREMENT_CHAPTER - 1],
         "Grey route alignment requirement",
     )
     problem += (
-        chaos_route * CHAOS_LEVEL_3 <= chaos_chapter_variables[4],
+        chaos_route * CHAOS_LEVEL_3
+        <= chaos_chapter_variables[ROUTE_REQUIREMENT_CHAPTER - 1],
         "Chaos route alignment requirement",
     )
 
@@ -187,43 +227,31 @@ def create_milp(
     problem += fourth_route == 0, "Not modelling the fourth route for now..."
 
     # Encode alignment impacts
-    for alignment_name, variables, impact_set in [
-        ("Law", law_chapter_variables, law_chapter_impacts),
-        ("Grey", grey_chapter_variables, grey_chapter_impacts),
-        ("Chaos", chaos_chapter_variables, chaos_chapter_impacts),
+    for alignment_name, variables, deltas in [
+        ("Law", law_chapter_variables, law_chapter_deltas),
+        ("Grey", grey_chapter_variables, grey_chapter_deltas),
+        ("Chaos", chaos_chapter_variables, chaos_chapter_deltas),
     ]:
-        for chapter, impacts in impact_set.items():
+        for chapter in range(1, LAST_CHAPTER + 1):
             variable = variables[chapter - 1]
 
-            expression = 0
-            for j, impact in enumerate(impacts):
-                if len(impact) == 2:
-                    required_route, effect = impact
-
-                    if required_route is None:
-                        expression += effect
-                    else:
-                        expression += required_route * effect
-                elif len(impact) == 3:
-                    required_route, option, effect = impact
-
-                    if required_route is None:
-                        expression += option * effect
-                    else:
-                        # Would be `required_route * option * effect`, but we need to keep it linear
-                        # https://or.stackexchange.com/questions/37/how-to-linearize-the-product-of-two-binary-variables
-                        variable_both = pulp.LpVariable(
-                            f"route_and_option_{alignment_name}_{chapter}_{j}",
-                            cat=pulp.const.LpBinary,
-                        )
-                        problem.addVariable(variable_both)
-
-                        problem += variable_both <= required_route
-                        problem += variable_both <= option
-                        problem += variable_both >= required_route + option - 1
-
-                        expression += variable_both * effect
+            # Route variables are shared by events, so sum up their coefficients
+            # rather than letting later terms replace earlier ones
+            constant = 0
+            terms: dict[pulp.LpVariable, int] = {}
+            for delta_variable, effect in deltas[chapter]:
+                if effect == 0:
+                    continue
+
+                if delta_variable is None:
+                    constant += effect
+                else:
+                    terms[delta_variable] = terms.get(delta_variable, 0) + effect
+
+            if chapter > 1:
+                terms[variables[chapter - 2]] = 1
 
+            expression = pulp.LpAffineExpression(terms, constant=constant)
             problem += (
                 variable == expression,
                 f"{alignment_name} value at end of chapter {chapter}",
@@ -0,0 +1,188 @@
+from dataclasses import dataclass, replace
+from typing import IO, Iterable, Optional
+
+import csv
+import pathlib
+
+import pulp
+
+from .events import Event, Lgc, Solution
+from .milp import create_milp, extract_solution
+from .rules import ALIGNMENTS, LAST_CHAPTER, Constraint, Goal
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+from .workers import shared, worker_pool
+
+
+@dataclass(frozen=True)
+class ParetoPoint:
+    lgc: Lgc
+    solution: Solution
+
+    def dominates(self, other: "ParetoPoint") -> bool:
+        return (
+            self.lgc.law >= other.lgc.law
+            and self.lgc.grey >= other.lgc.grey
+            and self.lgc.chaos >= other.lgc.chaos
+            and self.lgc != other.lgc
+        )
+
+
+# Epsilon-constraint sweeps: each slice fixes a lower bound on chaos and repeatedly
+# maximizes law (then grey, then chaos) while raising the lower bound on grey past
+# the previous point. A chaos step above 1 skips slices, so it may miss points.
+def pareto_frontier(
+    events: list[Event],
+    constraints: Iterable[Constraint],
+    chaos_step: int = 1,
+    processes: Optional[int] = None,
+    settings: SolverSettings = SolverSettings(),
+) -> list[ParetoPoint]:
+    constraints = tuple(constraints)
+
+    chaos_range = _chaos_range(events, constraints, settings)
+    if chaos_range is None:
+        return []
+
+    lowest_chaos, highest_chaos = chaos_range
+    chaos_bounds = list(range(lowest_chaos, highest_chaos + 1, chaos_step))
+    if chaos_bounds[-1] != highest_chaos:
+        chaos_bounds.append(highest_chaos)
+
+    with worker_pool(events, processes) as executor:
+        futures = [
+            executor.submit(_sweep_slice, constraints, chaos_bound, settings)
+            for chaos_bound in chaos_bounds
+        ]
+
+        points = [point for future in futures for point in future.result()]
+
+    return non_dominated(points)
+
+
+def non_dominated(points: Iterable[ParetoPoint]) -> list[ParetoPoint]:
+    unique: dict[Lgc, ParetoPoint] = {}
+    for point in points:
+        unique.setdefault(point.lgc, point)
+
+    frontier = [
+        point
+        for point in unique.values()
+        if not any(other.dominates(point) for other in unique.values())
+    ]
+
+    return sorted(
+        frontier,
+        key=lambda point: (-point.lgc.law, -point.lgc.grey, -point.lgc.chaos),
+    )
+
+
+def write_frontier(
+    points: Iterable[ParetoPoint],
+    output_directory: pathlib.Path,
+    output_stream: IO[str],
+) -> None:
+    writer = csv.DictWriter(
+        output_stream,
+        fieldnames=["law", "grey", "chaos", "route", "solution_filepath"],
+    )
+
+    writer.writeheader()
+    for point in points:
+        solution_filepath = (
+            output_directory
+            / f"pareto_{point.lgc.law}_{point.lgc.grey}_{point.lgc.chaos}.csv"
+        )
+        with open(solution_filepath, "w", encoding="utf8") as solution_stream:
+            point.solution.write_csv(solution_stream)
+
+        writer.writerow(
+            {
+                "law": point.lgc.law,
+                "grey": point.lgc.grey,
+                "chaos": point.lgc.chaos,
+                "route": point.solution.route.name,
+                "solution_filepath": solution_filepath,
+            }
+        )
+
+
+def _chaos_range(
+    events: list[Event], constraints: tuple[Constraint, ...], settings: SolverSettings
+) -> Optional[tuple[int, int]]:
+    problem = create_milp(events, constraints, Goal.MaximizeChaos)
+    chaos = _final_variables(problem)[2]
+
+    solve_problem(problem, settings)
+    if problem.status != pulp.const.LpStatusOptimal:
+        return None
+
+    highest_chaos = round(chaos.varValue)
+
+    problem.setObjective(-chaos)
+    solve_problem(problem, settings)
+
+    lowest_chaos = round(chaos.varValue)
+
+    return lowest_chaos, highest_chaos
+
+
+def _final_variables(
+    problem: pulp.LpProblem,
+) -> tuple[pulp.LpVariable, pulp.LpVariable, pulp.LpVariable]:
+    variables = problem.variablesDict()
+
+    law, grey, chaos = (
+        variables[f"{alignment}_at_chapter_{LAST_CHAPTER}_end"]
+        for alignment in ALIGNMENTS
+    )
+    return law, grey, chaos
+
+
+def _span(events: list[Event], alignment: str) -> int:
+    span = 1
+    for event in events:
+        impacts = [getattr(choice.impact, alignment) for choice in event.choices]
+        completion = getattr(event.completion, alignment)
+
+        span += completion + max(impacts, default=0) - min(0, completion)
+        span -= min(0, min(impacts, default=0))
+
+    return span
+
+
+def _sweep_slice(
+    constraints: tuple[Constraint, ...], chaos_bound: int, settings: SolverSettings
+) -> list[ParetoPoint]:
+    events: list[Event] = shared()
+
+    problem = create_milp(events, constraints, None)
+    law, grey, chaos = _final_variables(problem)
+
+    # Lexicographically maximize law, then grey, then chaos
+    grey_span = _span(events, "grey")
+    chaos_span = _span(events, "chaos")
+    problem.setObjective(law * grey_span * chaos_span + grey * chaos_span + chaos)
+
+    problem += chaos >= chaos_bound, "pareto_chaos_bound"
+    problem += grey >= -grey_span, "pareto_grey_bound"
+
+    # Each solve starts from the previous point, which is kept in the variable values
+    settings = replace(settings, warm_start=True)
+
+    points = []
+    while True:
+        solve_problem(problem, settings)
+        if problem.status != pulp.const.LpStatusOptimal:
+            break
+
+        lgc = Lgc(
+            law=round(law.varValue),
+            grey=round(grey.varValue),
+            chaos=round(chaos.varValue),
+        )
+        points.append(ParetoPoint(lgc, extract_solution(events, problem)))
+
+        problem.constraints["pareto_grey_bound"].changeRHS(lgc.grey + 1)
+
+    return points
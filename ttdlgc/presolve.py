@@ -0,0 +1,227 @@
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+import collections
+
+from .events import Event, EventIndex, Lgc, Route, Solution
+from .rules import (
+    ALIGNMENTS,
+    CONSTRAINT_THRESHOLDS,
+    GOAL_ALIGNMENTS,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+    Goal,
+)
+
+
+@dataclass(frozen=True)
+class PresolveReport:
+    folded_events: int
+    merged_options: int
+    dominated_options: int
+    removed_variables: int
+    removed_constraints: int
+
+    def simple_str(self) -> str:
+        return (
+            f"folded {self.folded_events} events, merged {self.merged_options} options, "
+            f"dropped {self.dominated_options} dominated options, "
+            f"removed {self.removed_variables} variables and {self.removed_constraints} constraints"
+        )
+
+
+@dataclass
+class PresolvedEvents:
+    original_events: list[Event]
+    # Reduced events to build the model from. Constant contributions are folded
+    # into one event without choices per chapter and route.
+    events: list[Event]
+    # For each reduced event with choices, its index in the original events and
+    # the original index of each of its remaining options
+    event_indices: dict[int, int]
+    option_indices: dict[int, list[int]]
+    # Original event index -> original option index, for events that were folded
+    # because only one option was worth picking
+    fixed_choices: dict[int, int]
+    report: PresolveReport
+
+    def restore(self, solution: Solution) -> Solution:
+        reduced_index = EventIndex(self.events)
+
+        chosen = dict(self.fixed_choices)
+        for event, option in solution.choices:
+            r = reduced_index.position(event)
+            chosen[self.event_indices[r]] = self.option_indices[r][option]
+
+        choices = []
+        for i, event in enumerate(self.original_events):
+            if (
+                event.required_route is not None
+                and event.required_route != solution.route
+            ):
+                continue
+
+            if i in chosen:
+                choices.append((event, chosen[i]))
+
+        return Solution(choices=choices, route=solution.route)
+
+
+def presolve(
+    events: list[Event], constraints: Iterable[Constraint], goal: Optional[Goal]
+) -> PresolvedEvents:
+    # Every constraint is a lower bound on a final alignment and every goal
+    # maximizes one, so an option can only be worse than another if it gives less
+    # of an alignment that is constrained or optimized. Up to the chapter where
+    # the route requirements are checked, those alignments matter as well.
+    end_alignments = {CONSTRAINT_THRESHOLDS[c][0] for c in constraints}
+    if goal is not None:
+        end_alignments.add(GOAL_ALIGNMENTS[goal])
+
+    route_alignments = end_alignments | {
+        alignment for alignment, _ in ROUTE_REQUIREMENTS.values()
+    }
+
+    constants: dict[tuple[int, Optional[Route]], list[Event]] = collections.defaultdict(
+        lambda: []
+    )
+    choice_events: list[tuple[int, list[int]]] = []
+    fixed_choices = {}
+    merged_options = 0
+    dominated_options = 0
+    for i, event in enumerate(events):
+        if len(event.choices) == 0:
+            constants[(event.chapter, event.required_route)].append(event)
+            continue
+
+        relevant = (
+            route_alignments
+            if event.chapter <= ROUTE_REQUIREMENT_CHAPTER
+            else end_alignments
+        )
+        options, merged, dominated = _useful_options(event, relevant)
+        merged_options += merged
+        dominated_options += dominated
+
+        if len(options) == 1:
+            fixed_choices[i] = options[0]
+            constants[(event.chapter, event.required_route)].append(
+                Event(
+                    chapter=event.chapter,
+                    date=event.date,
+                    name=event.name,
+                    completion=event.completion + event.choices[options[0]].impact,
+                    required_route=event.required_route,
+                    choices=(),
+                )
+            )
+        else:
+            choice_events.append((i, options))
+
+    reduced_events = []
+    for (chapter, route), folded in constants.items():
+        completion = Lgc(0, 0, 0)
+        for event in folded:
+            completion += event.completion
+
+        reduced_events.append(
+            Event(
+                chapter=chapter,
+                date=folded[0].date,
+                name=f"Chapter {chapter} constants"
+                + (f" ({route.name} route)" if route is not None else ""),
+                completion=completion,
+                required_route=route,
+                choices=(),
+            )
+        )
+
+    event_indices = {}
+    option_indices = {}
+    for i, options in choice_events:
+        event = events[i]
+
+        event_indices[len(reduced_events)] = i
+        option_indices[len(reduced_events)] = options
+        reduced_events.append(
+            Event(
+                chapter=event.chapter,
+                date=event.date,
+                name=event.name,
+                completion=event.completion,
+                required_route=event.required_route,
+                choices=tuple(event.choices[o] for o in options),
+            )
+        )
+
+    original_variables, original_constraints = _event_model_size(events)
+    reduced_variables, reduced_constraints = _event_model_size(reduced_events)
+
+    report = PresolveReport(
+        folded_events=len(events) - len(reduced_events),
+        merged_options=merged_options,
+        dominated_options=dominated_options,
+        removed_variables=original_variables - reduced_variables,
+        removed_constraints=original_constraints - reduced_constraints,
+    )
+
+    return PresolvedEvents(
+        original_events=events,
+        events=reduced_events,
+        event_indices=event_indices,
+        option_indices=option_indices,
+        fixed_choices=fixed_choices,
+        report=report,
+    )
+
+
+def _useful_options(event: Event, relevant: set[str]) -> tuple[list[int], int, int]:
+    projected = [
+        tuple(
+            getattr(choice.impact, alignment)
+            for alignment in ALIGNMENTS
+            if alignment in relevant
+        )
+        for choice in event.choices
+    ]
+
+    distinct: list[int] = []
+    for o, impact in enumerate(projected):
+        if all(projected[d] != impact for d in distinct):
+            distinct.append(o)
+
+    useful = [
+        o
+        for o in distinct
+        if not any(
+            projected[d] != projected[o]
+            and all(a >= b for a, b in zip(projected[d], projected[o]))
+            for d in distinct
+        )
+    ]
+
+    merged = len(projected) - len(distinct)
+    dominated = len(distinct) - len(useful)
+
+    return useful, merged, dominated
+
+
+def _event_model_size(events: list[Event]) -> tuple[int, int]:
+    # Counts the variables and constraints that create_milp adds per event: one
+    # variable per option plus the "pick one" constraint, and for route gated
+    # events a route and option product variable with three linking constraints
+    variables = 0
+    constraints = 0
+    for event in events:
+        if len(event.choices) == 0:
+            continue
+
+        variables += len(event.choices)
+        constraints += 1
+
+        if event.required_route is not None:
+            variables += len(event.choices)
+            constraints += 3 * len(event.choices)
+
+    return variables, constraints
@@ -0,0 +1,123 @@
+from dataclasses import dataclass, field
+from typing import Any, IO, Iterator, Optional
+
+import contextlib
+import json
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None  # type: ignore[assignment]
+
+
+@dataclass
+class PhaseMetrics:
+    name: str
+    seconds: float
+    # Peak memory allocated by Python during the phase, if it was traced
+    peak_bytes: Optional[int]
+    # Peak resident memory of any child process so far, such as the solver
+    max_child_rss_bytes: Optional[int]
+
+
+# Records the wall time and peak memory of each phase of a command, along with any
+# other metrics about it. A disabled profiler does nothing, so commands can always
+# profile their phases.
+@dataclass
+class Profiler:
+    enabled: bool = False
+    # Tracing allocations slows down the phases, so it's only on when asked for and
+    # the times should be measured in a separate untraced run
+    trace_memory: bool = False
+    phases: list[PhaseMetrics] = field(default_factory=lambda: [])
+    metrics: dict[str, Any] = field(default_factory=lambda: {})
+    started_tracing: bool = field(default=False, init=False)
+
+    def __post_init__(self) -> None:
+        if self.enabled and self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    # Stops tracing allocations, so that code run after profiling isn't slowed down
+    def stop(self) -> None:
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def phase(self, name: str) -> contextlib.AbstractContextManager[None]:
+        if not self.enabled:
+            return contextlib.nullcontext()
+
+        return self.__phase(name)
+
+    def record(self, name: str, value: Any) -> None:
+        if self.enabled:
+            self.metrics[name] = value
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "phases": [
+                {
+                    "name": phase.name,
+                    "seconds": phase.seconds,
+                    "peak_bytes": phase.peak_bytes,
+                    "max_child_rss_bytes": phase.max_child_rss_bytes,
+                }
+                for phase in self.phases
+            ],
+            "metrics": self.metrics,
+        }
+
+    def write_json(self, output_stream: IO[str]) -> None:
+        json.dump(self.to_json(), output_stream, indent=2)
+        output_stream.write("\n")
+
+    def summary_lines(self) -> list[str]:
+        lines = []
+        for phase in self.phases:
+            line = f"{phase.name:<20} {phase.seconds:9.4f} s"
+            if phase.peak_bytes is not None:
+                line += f" {phase.peak_bytes / 2**20:9.2f} MiB"
+            lines.append(line)
+
+        lines.extend(f"{name:<20} {value}" for name, value in self.metrics.items())
+
+        return lines
+
+    @contextlib.contextmanager
+    def __phase(self, name: str) -> Iterator[None]:
+        start_bytes = None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            start_bytes = tracemalloc.get_traced_memory()[0]
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+
+            peak_bytes = None
+            if start_bytes is not None:
+                peak_bytes = max(tracemalloc.get_traced_memory()[1] - start_bytes, 0)
+
+            self.phases.append(
+                PhaseMetrics(
+                    name=name,
+                    seconds=seconds,
+                    peak_bytes=peak_bytes,
+                    max_child_rss_bytes=_max_child_rss_bytes(),
+                )
+            )
+
+
+def _max_child_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return int(max_rss) if sys.platform == "darwin" else int(max_rss) * 1024
@@ -0,0 +1,64 @@
+import enum
+
+from .events import Route
+
+LAST_CHAPTER = 7
+ROUTE_REQUIREMENT_CHAPTER = 5
+
+LAW_LEVEL_3 = 60
+GREY_LEVEL_3 = 50
+CHAOS_LEVEL_3 = 30
+
+LAW_LEVEL_4 = 90
+GREY_LEVEL_4 = 75
+CHAOS_LEVEL_4 = 45
+
+LAW_LEVEL_5 = 120
+GREY_LEVEL_5 = 100
+CHAOS_LEVEL_5 = 75
+
+
+class Constraint(enum.Enum):
+    LawLv4AtEnd = "LawLv4AtEnd"
+    GreyLv4AtEnd = "GreyLv4AtEnd"
+    ChaosLv4AtEnd = "ChaosLv4AtEnd"
+    LawLv5AtEnd = "LawLv5AtEnd"
+    GreyLv5AtEnd = "GreyLv5AtEnd"
+    ChaosLv5AtEnd = "ChaosLv5AtEnd"
+
+
+class Goal(enum.Enum):
+    MaximizeLaw = "MaximizeLaw"
+    MaximizeGrey = "MaximizeGrey"
+    MaximizeChaos = "MaximizeChaos"
+
+
+ALIGNMENTS = ("law", "grey", "chaos")
+
+ROUTE_REQUIREMENTS = {
+    Route.Law: ("law", LAW_LEVEL_3),
+    Route.Grey: ("grey", GREY_LEVEL_3),
+    Route.Chaos: ("chaos", CHAOS_LEVEL_3),
+}
+
+CONSTRAINT_THRESHOLDS = {
+    Constraint.LawLv4AtEnd: ("law", LAW_LEVEL_4),
+    Constraint.GreyLv4AtEnd: ("grey", GREY_LEVEL_4),
+    Constraint.ChaosLv4AtEnd: ("chaos", CHAOS_LEVEL_4),
+    Constraint.LawLv5AtEnd: ("law", LAW_LEVEL_5),
+    Constraint.GreyLv5AtEnd: ("grey", GREY_LEVEL_5),
+    Constraint.ChaosLv5AtEnd: ("chaos", CHAOS_LEVEL_5),
+}
+
+GOAL_ALIGNMENTS = {
+    Goal.MaximizeLaw: "law",
+    Goal.MaximizeGrey: "grey",
+    Goal.MaximizeChaos: "chaos",
+}
+
+# Alignment needed to reach each level
+LEVEL_THRESHOLDS = {
+    "law": {3: LAW_LEVEL_3, 4: LAW_LEVEL_4, 5: LAW_LEVEL_5},
+    "grey": {3: GREY_LEVEL_3, 4: GREY_LEVEL_4, 5: GREY_LEVEL_5},
+    "chaos": {3: CHAOS_LEVEL_3, 4: CHAOS_LEVEL_4, 5: CHAOS_LEVEL_5},
+}
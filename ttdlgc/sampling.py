@@ -0,0 +1,282 @@
+from dataclasses import dataclass
+from typing import IO, Optional
+
+import csv
+import os
+
+import numpy as np
+import numpy.typing as npt
+
+from .batch_simulation import ROUTES, BatchSimulation
+from .events import Event, Lgc
+from .rules import (
+    ALIGNMENTS,
+    CONSTRAINT_THRESHOLDS,
+    LAST_CHAPTER,
+    LEVEL_THRESHOLDS,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+)
+from .workers import shared, worker_pool
+
+CONSTRAINTS = list(Constraint)
+
+# Memory each worker process samples a chunk of playthroughs in
+DEFAULT_MEMORY_BUDGET = 128 * 2**20
+
+
+@dataclass(frozen=True)
+class Policy:
+    # Each option is picked with probability proportional to
+    # 1 + law_weight * law + grey_weight * grey + chaos_weight * chaos, so all zero
+    # weights picks options uniformly at random
+    law_weight: float = 0.0
+    grey_weight: float = 0.0
+    chaos_weight: float = 0.0
+
+    def option_weight(self, impact: Lgc) -> float:
+        weight = (
+            1.0
+            + self.law_weight * impact.law
+            + self.grey_weight * impact.grey
+            + self.chaos_weight * impact.chaos
+        )
+        return max(weight, 1e-9)
+
+
+@dataclass
+class SampleResult:
+    samples: int
+    # Alignment value that the first bucket of each histogram counts
+    lower: int
+    # (routes, chapters, 3, values) counts of alignment values at the end of each
+    # chapter, when taking each route
+    histograms: npt.NDArray[np.int64]
+    # (routes,) counts of samples meeting each route's alignment requirement
+    eligible: npt.NDArray[np.int64]
+    # (routes, constraints) counts of samples meeting each route's requirement and
+    # the constraint's threshold at the end
+    eligible_constraints: npt.NDArray[np.int64]
+
+    def __add__(self, other: "SampleResult") -> "SampleResult":
+        assert self.lower == other.lower
+
+        return SampleResult(
+            samples=self.samples + other.samples,
+            lower=self.lower,
+            histograms=self.histograms + other.histograms,
+            eligible=self.eligible + other.eligible,
+            eligible_constraints=self.eligible_constraints + other.eligible_constraints,
+        )
+
+    def threshold_probability(
+        self, route_index: int, chapter: int, alignment: str, level: int
+    ) -> float:
+        histogram = self.histograms[
+            route_index, chapter - 1, ALIGNMENTS.index(alignment)
+        ]
+        at_least = int(histogram[max(level - self.lower, 0) :].sum())
+
+        return at_least / self.samples
+
+    def write_histograms(self, output_stream: IO[str]) -> None:
+        writer = csv.DictWriter(
+            output_stream,
+            fieldnames=["route", "chapter", "alignment", "value", "count"],
+        )
+
+        writer.writeheader()
+        for r, route in enumerate(ROUTES):
+            for chapter in range(1, LAST_CHAPTER + 1):
+                for a, alignment in enumerate(ALIGNMENTS):
+                    histogram = self.histograms[r, chapter - 1, a]
+                    for v in np.nonzero(histogram)[0]:
+                        writer.writerow(
+                            {
+                                "route": route.name,
+                                "chapter": chapter,
+                                "alignment": alignment,
+                                "value": int(v) + self.lower,
+                                "count": int(histogram[v]),
+                            }
+                        )
+
+    def write_probabilities(self, output_stream: IO[str]) -> None:
+        writer = csv.DictWriter(
+            output_stream,
+            fieldnames=["route", "chapter", "event", "probability"],
+        )
+
+        writer.writeheader()
+        for r, route in enumerate(ROUTES):
+            if route in ROUTE_REQUIREMENTS:
+                writer.writerow(
+                    {
+                        "route": route.name,
+                        "chapter": ROUTE_REQUIREMENT_CHAPTER,
+                        "event": "RouteRequirement",
+                        "probability": self.eligible[r] / self.samples,
+                    }
+                )
+
+                for c, constraint in enumerate(CONSTRAINTS):
+                    writer.writerow(
+                        {
+                            "route": route.name,
+                            "chapter": LAST_CHAPTER,
+                            "event": f"RouteRequirement+{constraint.value}",
+                            "probability": self.eligible_constraints[r, c]
+                            / self.samples,
+                        }
+                    )
+
+            for chapter in range(1, LAST_CHAPTER + 1):
+                for alignment in ALIGNMENTS:
+                    for n, level in LEVEL_THRESHOLDS[alignment].items():
+                        writer.writerow(
+                            {
+                                "route": route.name,
+                                "chapter": chapter,
+                                "event": f"{alignment.capitalize()}Lv{n}",
+                                "probability": self.threshold_probability(
+                                    r, chapter, alignment, level
+                                ),
+                            }
+                        )
+
+
+def sample(
+    events: list[Event],
+    samples: int,
+    policy: Policy = Policy(),
+    seed: Optional[int] = None,
+    memory_budget: int = DEFAULT_MEMORY_BUDGET,
+    processes: Optional[int] = None,
+) -> SampleResult:
+    # Probabilities are fractions of the samples
+    if samples < 1:
+        raise ValueError(f"Need at least 1 sample, got {samples}")
+
+    num_jobs = processes if processes is not None else (os.cpu_count() or 1)
+    num_jobs = max(min(num_jobs, samples), 1)
+
+    # Each job gets an independent random stream spawned from the same seed
+    seed_sequences = np.random.SeedSequence(seed).spawn(num_jobs)
+    job_samples = [
+        samples // num_jobs + (1 if j < samples % num_jobs else 0)
+        for j in range(num_jobs)
+    ]
+
+    with worker_pool(events, processes) as executor:
+        futures = [
+            executor.submit(_sample_job, seed_sequence, n, policy, memory_budget)
+            for seed_sequence, n in zip(seed_sequences, job_samples)
+        ]
+
+        results = [future.result() for future in futures]
+
+    result = results[0]
+    for other in results[1:]:
+        result += other
+
+    return result
+
+
+def _value_range(events: list[Event]) -> tuple[int, int]:
+    lower = [0, 0, 0]
+    upper = [0, 0, 0]
+    for event in events:
+        totals = [event.completion + choice.impact for choice in event.choices] or [
+            event.completion
+        ]
+        for a, alignment in enumerate(ALIGNMENTS):
+            values = [getattr(total, alignment) for total in totals]
+            lower[a] += min(min(values), 0)
+            upper[a] += max(max(values), 0)
+
+    return min(lower), max(upper)
+
+
+def _sample_job(
+    seed_sequence: np.random.SeedSequence,
+    samples: int,
+    policy: Policy,
+    memory_budget: int,
+) -> SampleResult:
+    events: list[Event] = shared()
+    simulation = BatchSimulation(events)
+    rng = np.random.default_rng(seed_sequence)
+
+    lower, upper = _value_range(events)
+
+    # Cumulative option probabilities per event with choices, padded with ones
+    choice_events = [events[i] for i in simulation.choice_events]
+    max_options = max((len(event.choices) for event in choice_events), default=1)
+    cumulative = np.ones((len(choice_events), max_options), dtype=np.float64)
+    for j, event in enumerate(choice_events):
+        weights = np.array([policy.option_weight(c.impact) for c in event.choices])
+        cumulative[j, : len(weights)] = np.cumsum(weights / weights.sum())
+        # Guard against rounding making an option past the last one reachable
+        cumulative[j, len(weights) - 1] = 1.0
+
+    # The uniform draws, their comparisons with the cumulative probabilities and the
+    # options, on top of what simulating them takes
+    bytes_per_sample = (
+        len(choice_events) * (8 + max_options + 8) + simulation.bytes_per_solution
+    )
+    chunk_size = max(memory_budget // bytes_per_sample, 1)
+
+    result = SampleResult(
+        samples=0,
+        lower=lower,
+        histograms=np.zeros(
+            (len(ROUTES), LAST_CHAPTER, len(ALIGNMENTS), upper - lower + 1),
+            dtype=np.int64,
+        ),
+        eligible=np.zeros(len(ROUTES), dtype=np.int64),
+        eligible_constraints=np.zeros((len(ROUTES), len(CONSTRAINTS)), dtype=np.int64),
+    )
+
+    remaining = samples
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        remaining -= n
+
+        uniform = rng.random((n, len(choice_events)))
+        options = (uniform[:, :, np.newaxis] >= cumulative[np.newaxis, :, :-1]).sum(
+            axis=2
+        )
+
+        for r, route in enumerate(ROUTES):
+            chapter_lgc = simulation.simulate_encoded(
+                options, np.full(n, r, dtype=np.int64)
+            ).chapter_lgc
+
+            for chapter in range(LAST_CHAPTER):
+                for a in range(len(ALIGNMENTS)):
+                    result.histograms[r, chapter, a] += np.bincount(
+                        chapter_lgc[:, chapter, a] - lower,
+                        minlength=upper - lower + 1,
+                    )
+
+            if route not in ROUTE_REQUIREMENTS:
+                continue
+
+            alignment, level = ROUTE_REQUIREMENTS[route]
+            eligible = (
+                chapter_lgc[
+                    :, ROUTE_REQUIREMENT_CHAPTER - 1, ALIGNMENTS.index(alignment)
+                ]
+                >= level
+            )
+            result.eligible[r] += int(eligible.sum())
+
+            for c, constraint in enumerate(CONSTRAINTS):
+                alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+                meets = chapter_lgc[:, -1, ALIGNMENTS.index(alignment)] >= level
+                result.eligible_constraints[r, c] += int((eligible & meets).sum())
+
+        result.samples += n
+
+    return result
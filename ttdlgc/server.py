@@ -0,0 +1,201 @@
+from typing import Any, IO, Optional
+
+import concurrent.futures
+import io
+import json
+import pathlib
+import socketserver
+import threading
+
+import pulp
+
+from .bounds import precheck
+from .events import Event, EventIndex, Lgc, Route, Solution
+from .rules import Constraint, Goal
+from .simulation import Simulation
+from .solver_settings import SolverSettings
+from .sparse_milp import create_base_sparse_milp
+
+# Requests and responses are JSON objects, one per line. Responses are written as
+# soon as they are ready, so may be out of order, and echo back the request's "id".
+#
+#   {"id": 1, "command": "solve", "constraints": ["LawLv4AtEnd"], "goal": "MaximizeLaw"}
+#   {"id": 2, "command": "simulate", "route": "Law", "choices": [["Event name", 0]]}
+
+
+class RequestError(Exception):
+    pass
+
+
+# Keeps the events and the base model in memory between requests. Each solve adds
+# its constraints and goal to a copy of the base model, so requests can be answered
+# concurrently.
+class Server:
+    def __init__(
+        self,
+        events: list[Event],
+        processes: Optional[int] = None,
+        settings: SolverSettings = SolverSettings(),
+    ) -> None:
+        # Requests are solved by running CBC on the model directly
+        settings.cbc_arguments()
+
+        self.index = EventIndex(events)
+        self.settings = settings
+        self.base_model = create_base_sparse_milp(events)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=processes)
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("command")
+        if command == "solve":
+            response = self.solve(request)
+        elif command == "simulate":
+            response = self.simulate(request)
+        else:
+            raise RequestError(f"Unknown command: {command}")
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        return response
+
+    def solve(self, request: dict[str, Any]) -> dict[str, Any]:
+        names = request.get("constraints", [])
+        if not isinstance(names, list) or not all(isinstance(c, str) for c in names):
+            raise RequestError("constraints must be a list of constraint names")
+        if not isinstance(request.get("goal"), (str, type(None))):
+            raise RequestError("goal must be a goal name or null")
+
+        try:
+            constraints = [Constraint(c) for c in names]
+            goal = Goal(request["goal"]) if request.get("goal") is not None else None
+        except ValueError as error:
+            raise RequestError(str(error)) from error
+
+        checked = precheck(self.index.events, constraints)
+        if not checked.feasible:
+            return {
+                "status": pulp.const.LpStatus[pulp.const.LpStatusInfeasible],
+                "reasons": list(checked.reasons),
+            }
+
+        model = self.base_model.with_query(constraints, goal)
+        report, values = model.solve(self.settings)
+        # CBC's values for an infeasible model are only its best attempt, not a plan
+        if not report.has_solution:
+            return {"status": pulp.const.LpStatus[report.status]}
+
+        solution = model.extract_solution(self.index, values)
+
+        response = solution_to_json(solution)
+        response["status"] = pulp.const.LpStatus[report.status]
+        response["lgc"] = lgc_to_json(self.__final_lgc(solution))
+
+        return response
+
+    def simulate(self, request: dict[str, Any]) -> dict[str, Any]:
+        solution = self.solution_from_json(request)
+
+        try:
+            lgc = self.__final_lgc(solution)
+        except (AssertionError, IndexError, ValueError) as error:
+            raise RequestError(f"Invalid solution: {error}") from error
+
+        return {"lgc": lgc_to_json(lgc)}
+
+    def solution_from_json(self, request: dict[str, Any]) -> Solution:
+        if not isinstance(request.get("route"), str):
+            raise RequestError("route must be a route name")
+
+        try:
+            route = Route[request["route"]]
+        except KeyError as error:
+            raise RequestError(f"Unknown route: {request.get('route')}") from error
+
+        pairs = request.get("choices", [])
+        if not isinstance(pairs, list) or not all(
+            isinstance(pair, list) and len(pair) == 2 and isinstance(pair[0], str)
+            # bool is an int, but true isn't an option
+            and type(pair[1]) is int
+            for pair in pairs
+        ):
+            raise RequestError("choices must be a list of [event name, option] pairs")
+
+        choices = []
+        for name, option in pairs:
+            event = self.index.find(name, route)
+            if event is None:
+                raise RequestError(f"Unknown event: {name}")
+            if not 0 <= option < len(event.choices):
+                raise RequestError(f"Unknown option of {name}: {option}")
+
+            choices.append((event, option))
+
+        return Solution(choices=choices, route=route)
+
+    def serve_stream(self, input_stream: IO[str], output_stream: IO[str]) -> None:
+        lock = threading.Lock()
+
+        def respond(response: dict[str, Any]) -> None:
+            with lock:
+                output_stream.write(json.dumps(response) + "\n")
+                output_stream.flush()
+
+        def answer(line: str) -> None:
+            request: Any = None
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise RequestError("Request must be a JSON object")
+
+                respond(self.handle(request))
+            except Exception as error:
+                # Answer every request, even if it hit a bug, rather than leaving the
+                # error until the end of the stream
+                response: dict[str, Any] = {"error": str(error)}
+                if isinstance(request, dict) and "id" in request:
+                    response["id"] = request["id"]
+
+                respond(response)
+
+        futures = [
+            self.executor.submit(answer, line)
+            for line in input_stream
+            if line.strip() != ""
+        ]
+        concurrent.futures.wait(futures)
+
+    def serve_socket(self, socket_filepath: pathlib.Path) -> None:
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                server.serve_stream(
+                    io.TextIOWrapper(self.rfile, encoding="utf8"),
+                    io.TextIOWrapper(self.wfile, encoding="utf8"),
+                )
+
+        with socketserver.ThreadingUnixStreamServer(
+            str(socket_filepath), Handler
+        ) as socket_server:
+            try:
+                socket_server.serve_forever()
+            finally:
+                socket_filepath.unlink(missing_ok=True)
+
+    def __final_lgc(self, solution: Solution) -> Lgc:
+        simulation = Simulation(self.index)
+        simulation.apply_solution(solution)
+
+        return simulation.lgc
+
+
+def solution_to_json(solution: Solution) -> dict[str, Any]:
+    return {
+        "route": solution.route.name,
+        "choices": [[event.name, option] for event, option in solution.choices],
+    }
+
+
+def lgc_to_json(lgc: Lgc) -> dict[str, int]:
+    return {"law": lgc.law, "grey": lgc.grey, "chaos": lgc.chaos}
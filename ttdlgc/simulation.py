@@ -2,22 +2,38 @@ from typing import Optional
 
 import logging
 
-from .events import Event, Lgc, Solution
+from .events import Event, EventIndex, Lgc, Solution
 
 
 class Simulation:
-    def __init__(self, events: list[Event]) -> None:
-        self.events = events
+    def __init__(self, events: list[Event] | EventIndex) -> None:
+        self.index = EventIndex.of(events)
+        self.events = self.index.events
         self.choices: list[tuple[Event, Optional[int]]] = []
-        self.lgc = Lgc(0, 0, 0)
+        self.applied: set[Event] = set()
+
+        # Totals are kept as plain integers, so applying an event doesn't create a
+        # new Lgc for every addition
+        self.law = 0
+        self.grey = 0
+        self.chaos = 0
+
+    @property
+    def lgc(self) -> Lgc:
+        return Lgc(law=self.law, grey=self.grey, chaos=self.chaos)
 
     def apply_solution(self, solution: Solution) -> None:
+        solution_choices = {
+            self.index.positions.get(event): choice_index
+            for event, choice_index in solution.choices
+        }
+
         def get_event_choice(event: Event) -> int:
-            for cur_event, choice_index in solution.choices:
-                if event == cur_event:
-                    return choice_index
+            choice_index = solution_choices.get(self.index.position(event))
+            if choice_index is None:
+                raise ValueError(f"Failed to find event: {event}")
 
-            raise ValueError(f"Failed to find event: {event}")
+            return choice_index
 
         for event in self.events:
             if (
@@ -32,26 +48,37 @@ class Simulation:
                 self.apply(event, get_event_choice(event))
 
     def apply(self, event: Event, choice_index: Optional[int]) -> None:
-        for old_event, _ in self.choices:
-            if event == old_event:
-                raise ValueError(
-                    f"Attempted to apply an event that has already been applied: {event}"
-                )
+        if event in self.applied:
+            raise ValueError(
+                f"Attempted to apply an event that has already been applied: {event}"
+            )
+
+        # The messages are expensive to build, so only build them when they're shown
+        debug = logging.root.isEnabledFor(logging.DEBUG)
 
-        logging.debug(f"Applying event: {(event.name, choice_index)}")
+        if debug:
+            logging.debug(f"Applying event: {(event.name, choice_index)}")
+        self.applied.add(event)
         self.choices.append((event, choice_index))
 
-        logging.debug(
-            f"  Applying completion LGC: {self.lgc.simple_str()} + {event.completion.simple_str()} = {(self.lgc + event.completion).simple_str()}"
-        )
-        self.lgc += event.completion
+        completion = event.completion
+        if debug:
+            logging.debug(
+                f"  Applying completion LGC: {self.lgc.simple_str()} + {completion.simple_str()} = {(self.lgc + completion).simple_str()}"
+            )
+        self.law += completion.law
+        self.grey += completion.grey
+        self.chaos += completion.chaos
         if choice_index is not None:
             assert len(event.choices) > 0
 
             choice_lgc = event.choices[choice_index].impact
-            logging.debug(
-                f"  Applying choice {choice_index} LGC: {self.lgc.simple_str()} + {choice_lgc.simple_str()} = {(self.lgc + choice_lgc).simple_str()}"
-            )
-            self.lgc += choice_lgc
+            if debug:
+                logging.debug(
+                    f"  Applying choice {choice_index} LGC: {self.lgc.simple_str()} + {choice_lgc.simple_str()} = {(self.lgc + choice_lgc).simple_str()}"
+                )
+            self.law += choice_lgc.law
+            self.grey += choice_lgc.grey
+            self.chaos += choice_lgc.chaos
         else:
             assert len(event.choices) == 0
@@ -0,0 +1,49 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import enum
+
+
+class SolverBackend(enum.Enum):
+    Cbc = "cbc"
+    # HiGHS through its Python bindings (highspy)
+    Highs = "highs"
+    # HiGHS through its command line executable
+    HighsCmd = "highs-cmd"
+
+
+@dataclass(frozen=True)
+class SolverSettings:
+    backend: SolverBackend = SolverBackend.Cbc
+    threads: Optional[int] = None
+    # Wall-clock limit in seconds
+    time_limit: Optional[float] = None
+    # Stop once the incumbent is within this relative or absolute gap of the bound
+    gap_rel: Optional[float] = None
+    gap_abs: Optional[float] = None
+    # Start from the values the variables already have
+    warm_start: bool = False
+
+    # Options for running the CBC executable directly
+    def cbc_arguments(self) -> list[str]:
+        if self.backend != SolverBackend.Cbc:
+            raise ValueError(f"Expected the cbc backend, got: {self.backend.value}")
+
+        arguments = []
+        if self.threads is not None:
+            arguments += ["-threads", str(self.threads)]
+        if self.time_limit is not None:
+            arguments += ["-sec", str(self.time_limit)]
+        if self.gap_rel is not None:
+            arguments += ["-ratioGap", str(self.gap_rel)]
+        if self.gap_abs is not None:
+            arguments += ["-allowableGap", str(self.gap_abs)]
+
+        return arguments
+
+    # Settings that can change which solution is found
+    def key(self) -> str:
+        return (
+            f"backend={self.backend.value};time_limit={self.time_limit};"
+            f"gap_rel={self.gap_rel};gap_abs={self.gap_abs}"
+        )
@@ -0,0 +1,130 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import os
+import re
+import tempfile
+
+import pulp
+
+from .solver_settings import SolverBackend, SolverSettings
+
+# Final bound lines of the solver logs. CBC reports an upper bound when
+# maximizing, and a lower bound when minimizing.
+_BOUND_PATTERNS = {
+    SolverBackend.Cbc: re.compile(r"^(?:Upper|Lower) bound:\s+(\S+)", re.MULTILINE),
+    SolverBackend.Highs: re.compile(r"^\s*Dual bound\s+(\S+)", re.MULTILINE),
+    SolverBackend.HighsCmd: re.compile(r"^\s*Dual bound\s+(\S+)", re.MULTILINE),
+}
+
+
+def create_solver(
+    settings: SolverSettings, log_path: Optional[str] = None
+) -> pulp.LpSolver:
+    options = {
+        "msg": False,
+        "timeLimit": settings.time_limit,
+        "gapRel": settings.gap_rel,
+        "gapAbs": settings.gap_abs,
+        "threads": settings.threads,
+        "warmStart": settings.warm_start,
+        "logPath": log_path,
+    }
+
+    solver: pulp.LpSolver
+    if settings.backend == SolverBackend.Cbc:
+        solver = pulp.PULP_CBC_CMD(**options)
+    elif settings.backend == SolverBackend.Highs:
+        solver = pulp.HiGHS(**options)
+    else:
+        solver = pulp.HiGHS_CMD(**options)
+
+    if not solver.available():
+        raise ValueError(f"Solver backend is not available: {settings.backend.value}")
+
+    return solver
+
+
+@dataclass(frozen=True)
+class SolveReport:
+    status: int
+    # Whether the solution is proven optimal, or only feasible, for example when
+    # the time limit was hit
+    solution_status: int
+    objective: Optional[float]
+    # Best bound on the objective that the solver proved, if it reported one
+    bound: Optional[float]
+
+    @property
+    def has_solution(self) -> bool:
+        return self.solution_status in (
+            pulp.const.LpSolutionOptimal,
+            pulp.const.LpSolutionIntegerFeasible,
+        )
+
+    @property
+    def gap(self) -> Optional[float]:
+        if self.objective is None or self.bound is None:
+            return None
+
+        return abs(self.bound - self.objective) / max(abs(self.objective), 1e-9)
+
+    def simple_str(self) -> str:
+        parts = [
+            f"status={pulp.const.LpStatus[self.status]}",
+            f"solution={pulp.const.LpSolution[self.solution_status]}",
+        ]
+        if self.objective is not None:
+            parts.append(f"objective={self.objective:g}")
+        if self.bound is not None:
+            parts.append(f"bound={self.bound:g}")
+        if self.gap is not None:
+            parts.append(f"gap={self.gap:.2%}")
+
+        return ", ".join(parts)
+
+
+def solve_problem(
+    problem: pulp.LpProblem, settings: SolverSettings = SolverSettings()
+) -> SolveReport:
+    with tempfile.TemporaryDirectory() as directory:
+        log_path = os.path.join(directory, "solver.log")
+        problem.solve(create_solver(settings, log_path))
+
+        try:
+            with open(log_path, "r", encoding="utf8") as input_stream:
+                log = input_stream.read()
+        except OSError:
+            log = ""
+
+    has_objective = (
+        problem.objective is not None
+        and len(problem.objective) > 0
+        and problem.sol_status
+        in (pulp.const.LpSolutionOptimal, pulp.const.LpSolutionIntegerFeasible)
+    )
+    objective = pulp.value(problem.objective) if has_objective else None
+
+    # Solves stopped by a gap tolerance are reported as optimal, so prefer the bound
+    # from the log
+    bound = parse_bound(settings.backend, log)
+    if bound is None and problem.sol_status == pulp.const.LpSolutionOptimal:
+        bound = objective
+
+    return SolveReport(
+        status=problem.status,
+        solution_status=problem.sol_status,
+        objective=objective,
+        bound=bound,
+    )
+
+
+def parse_bound(backend: SolverBackend, log: str) -> Optional[float]:
+    match = _BOUND_PATTERNS[backend].search(log)
+    if match is None:
+        return None
+
+    try:
+        return float(match.group(1))
+    except ValueError:
+        return None
@@ -0,0 +1,480 @@
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Optional
+
+import array
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+import numpy.typing as npt
+import pulp
+
+from .bounds import chapter_bounds
+from .event_table import EventTable, NO_OPTION, NO_ROUTE, TableSolution
+from .events import Event, EventIndex, Route, Solution
+from .milp import ModelSize
+from .solver_settings import SolverSettings
+from .solvers import parse_bound, SolveReport
+from .rules import (
+    ALIGNMENTS,
+    CONSTRAINT_THRESHOLDS,
+    GOAL_ALIGNMENTS,
+    LAST_CHAPTER,
+    ROUTE_REQUIREMENT_CHAPTER,
+    ROUTE_REQUIREMENTS,
+    Constraint,
+    Goal,
+)
+
+_INTEGER = "integer"
+_BINARY = "binary"
+
+
+# The same model as create_milp, but assembled directly as sparse coefficient
+# arrays instead of pulp expressions. Columns and rows are named by their index
+# when written, so solutions can be read back by column index.
+@dataclass
+class SparseModel:
+    column_names: list[str] = field(default_factory=lambda: [])
+    column_kinds: list[str] = field(default_factory=lambda: [])
+    # Lower and upper bounds of the integer columns that have them
+    column_bounds: dict[int, tuple[int, int]] = field(default_factory=lambda: {})
+    objective: dict[int, float] = field(default_factory=lambda: {})
+
+    row_names: list[str] = field(default_factory=lambda: [])
+    row_senses: list[str] = field(default_factory=lambda: [])
+    row_rhs: list[float] = field(default_factory=lambda: [])
+
+    # Coefficients in coordinate format
+    entry_rows: list[int] = field(default_factory=lambda: [])
+    entry_columns: list[int] = field(default_factory=lambda: [])
+    entry_values: list[float] = field(default_factory=lambda: [])
+
+    route_columns: dict[Route, int] = field(default_factory=lambda: {})
+    option_columns: dict[tuple[int, int], int] = field(default_factory=lambda: {})
+    final_columns: dict[str, int] = field(default_factory=lambda: {})
+
+    # Copy of the model with the constraints and goal of a query added, leaving
+    # this model untouched so it can be reused as the base of other queries. Nothing
+    # mutable is shared, so the copy can also be given its own columns.
+    def with_query(
+        self, constraints: Iterable[Constraint], goal: Optional[Goal]
+    ) -> "SparseModel":
+        model = SparseModel(
+            column_names=list(self.column_names),
+            column_kinds=list(self.column_kinds),
+            column_bounds=dict(self.column_bounds),
+            objective={},
+            row_names=list(self.row_names),
+            row_senses=list(self.row_senses),
+            row_rhs=list(self.row_rhs),
+            entry_rows=list(self.entry_rows),
+            entry_columns=list(self.entry_columns),
+            entry_values=list(self.entry_values),
+            route_columns=dict(self.route_columns),
+            option_columns=dict(self.option_columns),
+            final_columns=dict(self.final_columns),
+        )
+
+        if goal is not None:
+            model.objective[self.final_columns[GOAL_ALIGNMENTS[goal]]] = 1.0
+
+        for constraint in constraints:
+            alignment, level = CONSTRAINT_THRESHOLDS[constraint]
+            model.add_row(
+                constraint.value,
+                [(self.final_columns[alignment], 1.0)],
+                "G",
+                float(level),
+            )
+
+        return model
+
+    def add_column(
+        self, name: str, kind: str, bounds: Optional[tuple[int, int]] = None
+    ) -> int:
+        self.column_names.append(name)
+        self.column_kinds.append(kind)
+
+        column = len(self.column_names) - 1
+        if bounds is not None:
+            self.column_bounds[column] = bounds
+
+        return column
+
+    def add_row(
+        self, name: str, terms: Iterable[tuple[int, float]], sense: str, rhs: float
+    ) -> None:
+        row = len(self.row_names)
+        self.row_names.append(name)
+        self.row_senses.append(sense)
+        self.row_rhs.append(rhs)
+
+        # A column may appear more than once, such as a route shared by events
+        coefficients: dict[int, float] = {}
+        for column, value in terms:
+            coefficients[column] = coefficients.get(column, 0.0) + value
+
+        for column, value in coefficients.items():
+            if value == 0:
+                continue
+
+            self.entry_rows.append(row)
+            self.entry_columns.append(column)
+            self.entry_values.append(value)
+
+    def size(self) -> ModelSize:
+        return ModelSize(
+            variables=len(self.column_names),
+            constraints=len(self.row_names),
+            nonzeros=len(self.entry_values),
+        )
+
+    def write_mps(self, output_stream: IO[str]) -> None:
+        rows = np.array(self.entry_rows, dtype=np.int64)
+        columns = np.array(self.entry_columns, dtype=np.int64)
+        values = np.array(self.entry_values, dtype=np.float64)
+
+        # MPS lists coefficients column by column
+        order = np.lexsort((rows, columns))
+        rows, columns, values = rows[order], columns[order], values[order]
+        starts = np.searchsorted(columns, np.arange(len(self.column_names) + 1))
+
+        lines = ["NAME          LGC_Alignment", "ROWS", " N  OBJ"]
+        lines.extend(f" {sense}  R{r:07d}" for r, sense in enumerate(self.row_senses))
+
+        lines.append("COLUMNS")
+        lines.append("    MARK      'MARKER'                 'INTORG'")
+        for c in range(len(self.column_names)):
+            # CBC minimizes, so the objective is negated to maximize it
+            if c in self.objective or starts[c] == starts[c + 1]:
+                lines.append(
+                    f"    X{c:07d}  OBJ       {-self.objective.get(c, 0.0):.12g}"
+                )
+
+            lines.extend(
+                f"    X{c:07d}  R{r:07d}  {v:.12g}"
+                for r, v in zip(
+                    rows[starts[c] : starts[c + 1]].tolist(),
+                    values[starts[c] : starts[c + 1]].tolist(),
+                )
+            )
+        lines.append("    MARK      'MARKER'                 'INTEND'")
+
+        lines.append("RHS")
+        lines.extend(
+            f"    RHS       R{r:07d}  {rhs:.12g}"
+            for r, rhs in enumerate(self.row_rhs)
+            if rhs != 0
+        )
+
+        lines.append("BOUNDS")
+        for c, kind in enumerate(self.column_kinds):
+            if kind == _BINARY:
+                lines.append(f" BV BND       X{c:07d}")
+            elif c in self.column_bounds:
+                lower, upper = self.column_bounds[c]
+                lines.append(f" LO BND       X{c:07d}  {lower}")
+                lines.append(f" UP BND       X{c:07d}  {upper}")
+            else:
+                lines.append(f" FR BND       X{c:07d}")
+        lines.append("ENDATA")
+
+        output_stream.write("\n".join(lines))
+        output_stream.write("\n")
+
+    def solve(
+        self, settings: SolverSettings = SolverSettings()
+    ) -> tuple[SolveReport, npt.NDArray[np.float64]]:
+        values = np.zeros(len(self.column_names), dtype=np.float64)
+
+        with tempfile.TemporaryDirectory() as directory:
+            model_filepath = os.path.join(directory, "model.mps")
+            solution_filepath = os.path.join(directory, "model.sol")
+
+            with open(model_filepath, "w", encoding="utf8") as output_stream:
+                self.write_mps(output_stream)
+
+            result = subprocess.run(
+                [
+                    pulp.PULP_CBC_CMD().path,
+                    model_filepath,
+                    *settings.cbc_arguments(),
+                    "-solve",
+                    "-solution",
+                    solution_filepath,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                check=False,
+            )
+
+            try:
+                with open(solution_filepath, "r", encoding="utf8") as input_stream:
+                    status_line = input_stream.readline()
+                    for line in input_stream:
+                        parts = line.replace("**", "").split()
+                        if len(parts) >= 3 and parts[1].startswith("X"):
+                            values[int(parts[1][1:])] = float(parts[2])
+            except OSError:
+                status_line = ""
+
+        # For example "Stopped on time - objective value -132.00000000"
+        objective = None
+        if status_line.startswith(("Optimal", "Stopped")) and (
+            "objective value" in status_line
+        ):
+            # The objective was negated for CBC to minimize it
+            objective = -float(status_line.rsplit(maxsplit=1)[-1])
+
+        status = pulp.const.LpStatusNotSolved
+        solution_status = pulp.const.LpSolutionNoSolutionFound
+        if status_line.startswith("Optimal"):
+            status = pulp.const.LpStatusOptimal
+            solution_status = pulp.const.LpSolutionOptimal
+        elif "infeasible" in status_line.lower():
+            status = pulp.const.LpStatusInfeasible
+            solution_status = pulp.const.LpSolutionInfeasible
+        elif "unbounded" in status_line.lower():
+            status = pulp.const.LpStatusUnbounded
+            solution_status = pulp.const.LpSolutionUnbounded
+        elif status_line.startswith("Stopped") and objective is not None:
+            # Stopped early with a feasible solution, as pulp reports it
+            status = pulp.const.LpStatusOptimal
+            solution_status = pulp.const.LpSolutionIntegerFeasible
+
+        bound = parse_bound(settings.backend, result.stdout)
+        if bound is not None:
+            bound = -bound
+        elif solution_status == pulp.const.LpSolutionOptimal:
+            bound = objective
+
+        # Without a goal there's nothing to report, as with pulp's models
+        if len(self.objective) == 0:
+            objective = bound = None
+
+        report = SolveReport(
+            status=status,
+            solution_status=solution_status,
+            objective=objective,
+            bound=bound,
+        )
+
+        return report, values
+
+    def extract_solution(
+        self, events: list[Event] | EventIndex, values: npt.NDArray[np.float64]
+    ) -> Solution:
+        index = EventIndex.of(events)
+
+        # Infeasible solutions may not pick a route cleanly, so take the largest
+        route = max(
+            self.route_columns,
+            key=lambda candidate: values[self.route_columns[candidate]],
+        )
+
+        choices = []
+        for i, event in enumerate(index.events):
+            if event.required_route is not None and event.required_route != route:
+                continue
+
+            if len(event.choices) > 0:
+                option_values = [
+                    values[self.option_columns[(i, o)]]
+                    for o in range(0, len(event.choices))
+                ]
+                choices.append((event, int(np.argmax(option_values))))
+
+        return Solution(choices=choices, route=route)
+
+    def extract_table_solution(
+        self, table: EventTable, values: npt.NDArray[np.float64]
+    ) -> TableSolution:
+        route = max(
+            self.route_columns,
+            key=lambda candidate: values[self.route_columns[candidate]],
+        )
+
+        options = array.array("i", [NO_OPTION]) * len(table)
+        for i in range(len(table)):
+            choice_count = table.choice_count(i)
+            if choice_count == 0 or not table.applies(i, route):
+                continue
+
+            options[i] = int(
+                np.argmax(
+                    [values[self.option_columns[(i, o)]] for o in range(choice_count)]
+                )
+            )
+
+        return TableSolution(route=route, options=options)
+
+
+def create_sparse_milp(
+    events: list[Event] | EventTable,
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    route: Optional[Route] = None,
+) -> SparseModel:
+    return create_base_sparse_milp(events, route).with_query(constraints, goal)
+
+
+# The model without any constraints or goal, which only depend on the query
+def create_base_sparse_milp(
+    events: list[Event] | EventTable, route: Optional[Route] = None
+) -> SparseModel:
+    model = SparseModel()
+    table = EventTable.of(events)
+
+    bounds = chapter_bounds(table, route)
+    chapter_columns = {
+        alignment: [
+            model.add_column(
+                f"{alignment}_at_chapter_{chapter}_end",
+                _INTEGER,
+                bounds[alignment][chapter - 1],
+            )
+            for chapter in range(1, LAST_CHAPTER + 1)
+        ]
+        for alignment in ALIGNMENTS
+    }
+
+    for alignment in ALIGNMENTS:
+        model.final_columns[alignment] = chapter_columns[alignment][-1]
+
+    for candidate in Route:
+        model.route_columns[candidate] = model.add_column(
+            f"chapter_5_route_{candidate.name.lower()}", _BINARY
+        )
+
+    model.add_row(
+        "Must do one and only one route during chapter 5",
+        [(column, 1.0) for column in model.route_columns.values()],
+        "E",
+        1.0,
+    )
+
+    if route is not None:
+        model.add_row(
+            "Fixed chapter 5 route", [(model.route_columns[route], 1.0)], "E", 1.0
+        )
+
+    # Per alignment, the terms and constant added during each chapter
+    deltas: dict[str, list[list[tuple[int, float]]]] = {
+        alignment: [[] for _ in range(LAST_CHAPTER)] for alignment in ALIGNMENTS
+    }
+    constants = {alignment: [0.0] * LAST_CHAPTER for alignment in ALIGNMENTS}
+
+    # The events are read column by column, so no objects are created per event
+    for i in range(len(table)):
+        chapter = table.chapters[i]
+        if not 1 <= chapter <= LAST_CHAPTER:
+            continue
+
+        route_column = None
+        if table.routes[i] != NO_ROUTE:
+            if route is None:
+                route_column = model.route_columns[Route(table.routes[i])]
+            elif table.routes[i] != route.value:
+                # Event can never happen on the fixed route
+                continue
+
+        for a, alignment in enumerate(ALIGNMENTS):
+            effect = table.completions[3 * i + a]
+            if route_column is None:
+                constants[alignment][chapter - 1] += effect
+            else:
+                deltas[alignment][chapter - 1].append((route_column, effect))
+
+        first_choice = table.choice_starts[i]
+        choice_count = table.choice_starts[i + 1] - first_choice
+        if choice_count == 0:
+            continue
+
+        option_columns = []
+        for o in range(0, choice_count):
+            column = model.add_column(f"event_{i}_option_{o}", _BINARY)
+            model.option_columns[(i, o)] = column
+            option_columns.append(column)
+
+        model.add_row(
+            f"Pick one option for event {i}",
+            [(column, 1.0) for column in option_columns],
+            "E",
+            1.0,
+        )
+
+        for o, option_column in enumerate(option_columns):
+            impact_column = option_column
+            if route_column is not None:
+                impact_column = model.add_column(
+                    f"route_and_event_{i}_option_{o}", _BINARY
+                )
+                model.add_row(
+                    f"route_and_event_{i}_option_{o}_route",
+                    [(impact_column, 1.0), (route_column, -1.0)],
+                    "L",
+                    0.0,
+                )
+                model.add_row(
+                    f"route_and_event_{i}_option_{o}_option",
+                    [(impact_column, 1.0), (option_column, -1.0)],
+                    "L",
+                    0.0,
+                )
+                model.add_row(
+                    f"route_and_event_{i}_option_{o}_both",
+                    [
+                        (impact_column, 1.0),
+                        (route_column, -1.0),
+                        (option_column, -1.0),
+                    ],
+                    "G",
+                    -1.0,
+                )
+
+            for a, alignment in enumerate(ALIGNMENTS):
+                deltas[alignment][chapter - 1].append(
+                    (impact_column, table.impacts[3 * (first_choice + o) + a])
+                )
+
+    for required_route, (alignment, level) in ROUTE_REQUIREMENTS.items():
+        model.add_row(
+            f"{required_route.name} route alignment requirement",
+            [
+                (model.route_columns[required_route], float(level)),
+                (chapter_columns[alignment][ROUTE_REQUIREMENT_CHAPTER - 1], -1.0),
+            ],
+            "L",
+            0.0,
+        )
+
+    # TODO: actually model the fourth route constraint instead
+    model.add_row(
+        "Not modelling the fourth route for now...",
+        [(model.route_columns[Route.Fourth], 1.0)],
+        "E",
+        0.0,
+    )
+
+    for alignment in ALIGNMENTS:
+        columns = chapter_columns[alignment]
+        for chapter in range(1, LAST_CHAPTER + 1):
+            terms = [(columns[chapter - 1], 1.0)]
+            if chapter > 1:
+                terms.append((columns[chapter - 2], -1.0))
+            terms.extend(
+                (column, -float(effect))
+                for column, effect in deltas[alignment][chapter - 1]
+            )
+
+            model.add_row(
+                f"{alignment.capitalize()} value at end of chapter {chapter}",
+                terms,
+                "E",
+                constants[alignment][chapter - 1],
+            )
+
+    return model
@@ -0,0 +1,275 @@
+from dataclasses import dataclass
+from typing import IO, Iterable, Iterator, Optional
+
+import csv
+import glob
+import pathlib
+
+from .event_table import EventTable, NO_OPTION
+from .events import Lgc, Route
+from .incremental_simulation import Trajectory
+from .rules import ALIGNMENTS, LAST_CHAPTER
+from .workers import init_worker, shared, worker_pool
+
+# Solutions are sent to the workers in chunks, so that checking many small files
+# isn't dominated by sending each one over
+_CHUNK_SIZE = 16
+
+
+# Each worker looks up the positions of the events on a route once it first needs
+# them
+@dataclass(frozen=True)
+class _WorkerState:
+    table: EventTable
+    positions: dict[Route, dict[str, int]]
+
+    @staticmethod
+    def of(table: EventTable) -> "_WorkerState":
+        return _WorkerState(table, {})
+
+
+@dataclass(frozen=True)
+class SolutionCheck:
+    filepath: pathlib.Path
+    route: Optional[Route]
+    # Alignments at the end of each chapter, or empty if the solution couldn't be
+    # simulated
+    chapter_lgc: tuple[Lgc, ...]
+    # Events on the route with choices that the solution doesn't pick an option of
+    missing_events: tuple[str, ...]
+    # Events in the solution that aren't on its route
+    unknown_events: tuple[str, ...]
+    # Choices whose option isn't one of the event's, as <event name>=<option>
+    invalid_choices: tuple[str, ...]
+    # Why the file couldn't be read as a solution
+    error: Optional[str]
+
+    # Solutions that could be loaded and simulated but whose route can't be taken
+    # with their alignments aren't valid either
+    @property
+    def valid(self) -> bool:
+        trajectory = self.trajectory
+        return (
+            self.error is None
+            and len(self.missing_events) == 0
+            and len(self.unknown_events) == 0
+            and len(self.invalid_choices) == 0
+            and trajectory is not None
+            and trajectory.route_requirement_met is not False
+        )
+
+    @property
+    def lgc(self) -> Optional[Lgc]:
+        return self.chapter_lgc[-1] if len(self.chapter_lgc) > 0 else None
+
+    @property
+    def trajectory(self) -> Optional[Trajectory]:
+        if self.route is None or len(self.chapter_lgc) == 0:
+            return None
+
+        return Trajectory.of(self.route, self.chapter_lgc)
+
+
+# Solution files given as files, directories of CSV files, or glob patterns, in a
+# stable order
+def solution_filepaths(patterns: Iterable[str]) -> list[pathlib.Path]:
+    filepaths: list[pathlib.Path] = []
+    for pattern in patterns:
+        path = pathlib.Path(pattern)
+        if path.is_dir():
+            filepaths.extend(sorted(path.glob("*.csv")))
+        elif path.exists():
+            filepaths.append(path)
+        else:
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if len(matches) == 0:
+                raise ValueError(f"No solution files match: {pattern}")
+
+            filepaths.extend(pathlib.Path(match) for match in matches)
+
+    return filepaths
+
+
+# Checks and simulates the solutions across a pool of worker processes. Results are
+# yielded in the order of the filepaths as soon as they're ready, so that they can
+# be written out without waiting for the whole batch.
+def check_solutions(
+    table: EventTable,
+    filepaths: list[pathlib.Path],
+    processes: Optional[int] = None,
+) -> Iterator[SolutionCheck]:
+    if processes == 1:
+        init_worker(table, setup=_WorkerState.of)
+        yield from map(_check_solution, filepaths)
+        return
+
+    with worker_pool(table, processes, setup=_WorkerState.of) as executor:
+        yield from executor.map(_check_solution, filepaths, chunksize=_CHUNK_SIZE)
+
+
+def num_chapters(table: EventTable) -> int:
+    return max(LAST_CHAPTER, max(table.chapters, default=0))
+
+
+# Writes one row per solution, flushing after each so that the results can be
+# followed while the batch runs
+class CheckWriter:
+    def __init__(self, output_stream: IO[str], chapters: int) -> None:
+        self.output_stream = output_stream
+        self.chapters = chapters
+        self.writer = csv.DictWriter(
+            output_stream,
+            fieldnames=[
+                "filepath",
+                "valid",
+                "route",
+                *ALIGNMENTS,
+                *(f"{alignment}_level" for alignment in ALIGNMENTS),
+                "route_requirement_met",
+                "missing_events",
+                "unknown_events",
+                "invalid_choices",
+                "error",
+                *(
+                    f"chapter_{chapter}_{alignment}"
+                    for chapter in range(1, chapters + 1)
+                    for alignment in ALIGNMENTS
+                ),
+            ],
+        )
+
+        self.writer.writeheader()
+
+    def write(self, check: SolutionCheck) -> None:
+        row: dict[str, object] = {
+            "filepath": check.filepath,
+            "valid": check.valid,
+            "route": check.route.name if check.route is not None else "",
+            "missing_events": ";".join(check.missing_events),
+            "unknown_events": ";".join(check.unknown_events),
+            "invalid_choices": ";".join(check.invalid_choices),
+            "error": check.error or "",
+        }
+
+        trajectory = check.trajectory
+        if trajectory is not None:
+            for alignment in ALIGNMENTS:
+                row[alignment] = getattr(trajectory.final.lgc, alignment)
+                row[f"{alignment}_level"] = trajectory.final.level(alignment) or ""
+            if trajectory.route_requirement_met is not None:
+                row["route_requirement_met"] = trajectory.route_requirement_met
+
+            for point in trajectory.chapters:
+                for alignment in ALIGNMENTS:
+                    row[f"chapter_{point.chapter}_{alignment}"] = getattr(
+                        point.lgc, alignment
+                    )
+
+        self.writer.writerow(row)
+        self.output_stream.flush()
+
+
+def _positions(state: _WorkerState, route: Route) -> dict[str, int]:
+    positions = state.positions.get(route)
+    if positions is None:
+        positions = state.positions[route] = state.table.positions(route)
+
+    return positions
+
+
+def _failed(filepath: pathlib.Path, error: str) -> SolutionCheck:
+    return SolutionCheck(filepath, None, (), (), (), (), error)
+
+
+def _check_solution(filepath: pathlib.Path) -> SolutionCheck:
+    state: _WorkerState = shared()
+    table = state.table
+
+    try:
+        with open(filepath, "r", encoding="utf8") as input_stream:
+            rows = list(csv.DictReader(input_stream))
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        return _failed(filepath, str(e))
+
+    if len(rows) == 0 or rows[0].get("name") != "Route":
+        return _failed(filepath, "First row isn't the route")
+
+    try:
+        route = Route[rows[0].get("choice") or ""]
+    except KeyError:
+        return _failed(filepath, f"Unknown route: {rows[0].get('choice')}")
+
+    positions = _positions(state, route)
+    options = [NO_OPTION] * len(table)
+    unknown_events = []
+    invalid_choices = []
+    # Events with an invalid choice aren't reported as missing as well
+    invalid_events = set()
+    for row in rows[1:]:
+        name = row.get("name") or ""
+        choice = row.get("choice") or ""
+
+        i = positions.get(name)
+        if i is None:
+            unknown_events.append(name)
+            continue
+
+        if not choice.isdigit() or int(choice) >= table.choice_count(i):
+            invalid_choices.append(f"{name}={choice}")
+            invalid_events.add(i)
+            continue
+
+        options[i] = int(choice)
+
+    missing_events = [
+        table.names[i]
+        for i in range(len(table))
+        if table.applies(i, route)
+        and table.choice_count(i) > 0
+        and options[i] == NO_OPTION
+        and i not in invalid_events
+    ]
+
+    chapter_lgc: tuple[Lgc, ...] = ()
+    if len(missing_events) == 0 and len(invalid_choices) == 0:
+        chapter_lgc = _chapter_lgc(table, route, options)
+
+    return SolutionCheck(
+        filepath,
+        route,
+        chapter_lgc,
+        tuple(missing_events),
+        tuple(unknown_events),
+        tuple(invalid_choices),
+        None,
+    )
+
+
+def _chapter_lgc(
+    table: EventTable, route: Route, options: list[int]
+) -> tuple[Lgc, ...]:
+    completions = table.completions
+    impacts = table.impacts
+
+    # Law, grey and chaos added in each chapter, one after another
+    totals = [0] * (3 * num_chapters(table))
+    for i in range(len(table)):
+        if not table.applies(i, route):
+            continue
+
+        c = 3 * (table.chapters[i] - 1)
+        for a in range(3):
+            totals[c + a] += completions[3 * i + a]
+
+        option = options[i]
+        if option != NO_OPTION:
+            o = 3 * (table.choice_starts[i] + option)
+            for a in range(3):
+                totals[c + a] += impacts[o + a]
+
+    for c in range(3, len(totals)):
+        totals[c] += totals[c - 3]
+
+    return tuple(
+        Lgc(totals[c], totals[c + 1], totals[c + 2]) for c in range(0, len(totals), 3)
+    )
@@ -0,0 +1,218 @@
+from dataclasses import dataclass, field, replace
+from typing import Iterable, Optional
+
+import pulp
+
+from .events import Event, EventIndex, Route, Solution
+from .milp import create_milp, extract_solution
+from .rules import ALIGNMENTS, LAST_CHAPTER, Constraint, Goal
+from .solver_settings import SolverSettings
+from .solvers import solve_problem
+
+
+# Changes a player wants to make to an existing plan
+@dataclass
+class Edits:
+    pinned_choices: list[tuple[Event, int]] = field(default_factory=lambda: [])
+    forbidden_choices: list[tuple[Event, int]] = field(default_factory=lambda: [])
+    pinned_route: Optional[Route] = None
+    forbidden_routes: list[Route] = field(default_factory=lambda: [])
+
+
+@dataclass
+class SolutionDelta:
+    # (original, new) route, if the route changed
+    route: Optional[tuple[Route, Route]]
+    # (event, original option, new option) of each event whose choice changed. The
+    # option is None when the event isn't taken on that plan's route.
+    choices: list[tuple[Event, Optional[int], Optional[int]]]
+
+    @staticmethod
+    def between(
+        events: list[Event] | EventIndex, original: Solution, new: Solution
+    ) -> "SolutionDelta":
+        index = EventIndex.of(events)
+
+        original_choices = {
+            index.position(event): option for event, option in original.choices
+        }
+        new_choices = {index.position(event): option for event, option in new.choices}
+
+        choices = []
+        for i, event in enumerate(index.events):
+            before = original_choices.get(i)
+            after = new_choices.get(i)
+            if before != after:
+                choices.append((event, before, after))
+
+        return SolutionDelta(
+            route=(
+                (original.route, new.route) if original.route != new.route else None
+            ),
+            choices=choices,
+        )
+
+
+# Parses "<event name>=<option>", looking the event up on the given routes in order
+def parse_choice(
+    events: list[Event] | EventIndex, string: str, routes: Iterable[Route]
+) -> tuple[Event, int]:
+    name, separator, option = string.rpartition("=")
+    if separator == "":
+        raise ValueError(f"Expected <event name>=<option>: {string}")
+
+    index = EventIndex.of(events)
+    for route in routes:
+        event = index.find(name.strip(), route)
+        if event is not None:
+            return event, int(option)
+
+    raise ValueError(f"Failed to find event: {name}")
+
+
+# Re-solves plans with edits on a single model. The edits only change the bounds of
+# the route and option variables they touch, which are put back after each solve, so
+# trying many edits doesn't rebuild the model.
+class WhatIf:
+    def __init__(
+        self,
+        events: list[Event],
+        constraints: Iterable[Constraint],
+        goal: Optional[Goal],
+        settings: SolverSettings = SolverSettings(),
+    ) -> None:
+        self.index = EventIndex(events)
+        self.goal = goal
+        # Each solve starts from the original plan
+        self.settings = replace(settings, warm_start=True)
+
+        self.problem = create_milp(events, constraints, goal)
+        self.variables = self.problem.variablesDict()
+
+    def resolve(
+        self, original: Solution, edits: Edits
+    ) -> tuple[int, Solution, SolutionDelta]:
+        # Bounds of the variables changed by the edits, to put back afterwards
+        changed: dict[str, tuple[Optional[float], Optional[float]]] = {}
+
+        def set_bounds(
+            variable: pulp.LpVariable,
+            low: Optional[float] = None,
+            up: Optional[float] = None,
+        ) -> None:
+            changed.setdefault(variable.name, (variable.lowBound, variable.upBound))
+            if low is not None:
+                variable.lowBound = low
+            if up is not None:
+                variable.upBound = up
+
+        try:
+            for route in edits.forbidden_routes:
+                set_bounds(self.__route_variable(route), up=0)
+
+            if edits.pinned_route is not None:
+                set_bounds(self.__route_variable(edits.pinned_route), low=1)
+
+            for event, option in edits.forbidden_choices:
+                set_bounds(self.__option_variable(event, option), up=0)
+
+            for event, option in edits.pinned_choices:
+                set_bounds(self.__option_variable(event, option), low=1)
+
+                # A choice can only be made if its event happens, so pinning it also
+                # pins the event's route
+                if event.required_route is not None:
+                    set_bounds(self.__route_variable(event.required_route), low=1)
+
+            # Without a goal, keep as much of the original plan as possible
+            if self.goal is None:
+                self.problem.setObjective(
+                    pulp.lpSum(
+                        [self.__route_variable(original.route)]
+                        + [
+                            self.__option_variable(event, option)
+                            for event, option in original.choices
+                        ]
+                    )
+                )
+
+            set_initial_values(self.index, self.problem, original)
+
+            solve_problem(self.problem, self.settings)
+            status = self.problem.status
+            solution = extract_solution(self.index, self.problem)
+        finally:
+            for name, (low, up) in changed.items():
+                self.variables[name].lowBound = low
+                self.variables[name].upBound = up
+
+        return status, solution, SolutionDelta.between(self.index, original, solution)
+
+    def __route_variable(self, route: Route) -> pulp.LpVariable:
+        return self.variables[f"chapter_5_route_{route.name.lower()}"]
+
+    def __option_variable(self, event: Event, option: int) -> pulp.LpVariable:
+        if not 0 <= option < len(event.choices):
+            raise ValueError(f"Event has no option {option}: {event.name}")
+
+        return self.variables[f"event_{self.index.position(event)}_option_{option}"]
+
+
+def resolve(
+    events: list[Event],
+    original: Solution,
+    edits: Edits,
+    constraints: Iterable[Constraint],
+    goal: Optional[Goal],
+    settings: SolverSettings = SolverSettings(),
+) -> tuple[int, Solution, SolutionDelta]:
+    return WhatIf(events, constraints, goal, settings).resolve(original, edits)
+
+
+# Sets the variables of a problem created by create_milp to the values they take
+# for the given solution, to start the solver from it. The edits may make the
+# solution infeasible, which the solver repairs, so bounds aren't checked.
+def set_initial_values(
+    events: list[Event] | EventIndex, problem: pulp.LpProblem, solution: Solution
+) -> None:
+    index = EventIndex.of(events)
+    variables = problem.variablesDict()
+
+    for route in Route:
+        variables[f"chapter_5_route_{route.name.lower()}"].setInitialValue(
+            1 if route == solution.route else 0, check=False
+        )
+
+    chosen = {index.position(event): option for event, option in solution.choices}
+
+    totals = {alignment: [0] * (LAST_CHAPTER + 1) for alignment in ALIGNMENTS}
+    for i, event in enumerate(index.events):
+        taken = event.required_route is None or event.required_route == solution.route
+
+        for o in range(0, len(event.choices)):
+            picked = chosen.get(i, 0) == o
+            variables[f"event_{i}_option_{o}"].setInitialValue(
+                1 if picked else 0, check=False
+            )
+
+            product = variables.get(f"route_and_event_{i}_option_{o}")
+            if product is not None:
+                product.setInitialValue(1 if picked and taken else 0, check=False)
+
+        if not taken or not 1 <= event.chapter <= LAST_CHAPTER:
+            continue
+
+        lgc = event.completion
+        if len(event.choices) > 0:
+            lgc += event.choices[chosen.get(i, 0)].impact
+
+        for alignment in ALIGNMENTS:
+            totals[alignment][event.chapter] += getattr(lgc, alignment)
+
+    for alignment in ALIGNMENTS:
+        total = 0
+        for chapter in range(1, LAST_CHAPTER + 1):
+            total += totals[alignment][chapter]
+            variables[f"{alignment}_at_chapter_{chapter}_end"].setInitialValue(
+                total, check=False
+            )
@@ -0,0 +1,34 @@
+from typing import Any, Callable, Iterator, Optional
+
+import concurrent.futures
+import contextlib
+
+# What the jobs of a pool share, such as the events. It's set in each worker process
+# when the worker starts, so that it's only sent over once per worker rather than
+# with every job.
+_shared: Any = None
+
+
+# A process pool whose workers all share the value. The setup, if given, is run on
+# the value in each worker and its result is shared instead, for state that is
+# expensive to send over but cheap to rebuild, like a model.
+@contextlib.contextmanager
+def worker_pool(
+    value: Any,
+    processes: Optional[int] = None,
+    setup: Optional[Callable[[Any], Any]] = None,
+) -> Iterator[concurrent.futures.ProcessPoolExecutor]:
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes, initializer=init_worker, initargs=(value, setup)
+    ) as executor:
+        yield executor
+
+
+# Shares the value in the current process, for running the jobs without a pool
+def init_worker(value: Any, setup: Optional[Callable[[Any], Any]] = None) -> None:
+    global _shared
+    _shared = setup(value) if setup is not None else value
+
+
+def shared() -> Any:
+    return _shared